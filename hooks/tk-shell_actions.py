@@ -110,6 +110,33 @@ class ShellActions(HookBaseClass):
             )
         return action_instances
 
+    def generate_actions_for_publishes(self, sg_publish_data_list, actions, ui_area):
+        """
+        Return the action instances for several publishes of the same type.
+        This method is called when several publishes are selected in the UI, once
+        for each publish type in the selection.
+
+        The shell actions don't depend on the publish, so they are generated once
+        and returned for each publish.
+
+        :param sg_publish_data_list: List of Shotgun data dictionaries with all the
+                                     standard publish fields.
+        :param actions: List of action strings which have been defined in the app configuration.
+        :param ui_area: String denoting the UI Area (see generate_actions).
+        :returns List holding a list of dictionaries for each publish, each with keys
+                 name, params, caption and description
+        """
+        app = self.parent
+        app.log_debug(
+            "Generate actions called for %d publishes in UI element %s. "
+            "Actions: %s." % (len(sg_publish_data_list), ui_area, actions)
+        )
+
+        action_instances = self.generate_actions(
+            sg_publish_data_list[0], actions, ui_area
+        )
+        return [[dict(x) for x in action_instances] for _ in sg_publish_data_list]
+
     def execute_multiple_actions(self, actions):
         """
         Executes the specified action on a list of items.
@@ -14,6 +14,9 @@ import sgtk
 from sgtk import TankError
 from tank_vendor import shotgun_api3
 
+from .. import constants, utils
+from ..base_hooks import ActionsHook
+from ..publish_index import get_publish_index
 
 logger = sgtk.platform.get_logger(__name__)
 
@@ -55,6 +58,58 @@ class LoaderManager(object):
             self._publish_type_field = "published_file_type"
         else:
             self._publish_type_field = "tank_type"
+        self._publish_entity_type = publish_entity_type
+
+        # the action mappings, compiled into a table holding a tuple of actions
+        # for each publish type, with the actions mapped to all types merged in.
+        # The table is compiled again when the context changes, as the settings
+        # of the bundle are then resolved again.
+        self._action_mappings = {}
+        self._all_types_actions = ()
+        self._action_mappings_context = None
+        # actions resolved per (publish type, UI area), when the actions hook
+        # declares they don't depend on anything else. Both are reset when the
+        # table is compiled.
+        self._type_pure_actions = None
+        self._resolved_actions = {}
+        self._num_resolved_actions_hits = 0
+        self._num_resolved_actions_misses = 0
+        self._compile_action_mappings()
+
+    def get_publishes(self, publish_ids, fields=None):
+        """
+        Returns the publishes with the given ids.
+
+        If the local publish index is enabled with the use_publish_index
+        setting, only the publishes which aren't in the index or which have
+        been updated since they were stored are retrieved from Shotgun.
+
+        :param publish_ids: List of publish ids.
+        :param fields: List of fields to retrieve. Defaults to all the
+                       standard publish fields.
+        :return: List of Shotgun data dictionaries, in the same order as the
+                 ids. Date time values are returned as unix time stamps, like
+                 in the loader models. Publishes which don't exist are omitted.
+        """
+        if fields is None:
+            fields = [self._publish_type_field] + constants.PUBLISHED_FILES_FIELDS
+
+        publish_index = get_publish_index(self._bundle)
+        if publish_index:
+            return publish_index.sync(
+                self._bundle.shotgun,
+                self._publish_entity_type,
+                publish_ids,
+                fields,
+                self._publish_type_field,
+            )
+
+        return [
+            utils.convert_timestamps(sg_data)
+            for sg_data in utils.find_publishes_by_ids(
+                self._bundle.shotgun, self._publish_entity_type, publish_ids, fields
+            )
+        ]
 
     def get_actions_for_publish(self, sg_data, ui_area):
         """
@@ -74,60 +129,7 @@ class LoaderManager(object):
         :return: List of dictionaries, each with keys name, params, caption and description
         """
 
-        if self._publish_type_field not in sg_data.keys():
-            raise TankError(
-                "Missing {} field in Shotgun data dictionary.".format(
-                    self._publish_type_field
-                )
-            )
-
-        # Figure out the type of the publish
-        publish_type_dict = sg_data.get(self._publish_type_field)
-        if publish_type_dict is None:
-            # this publish does not have a type
-            publish_type = "undefined"
-        else:
-            publish_type = publish_type_dict["name"]
-
-        # check if we have logic configured to handle this publish type.
-        mappings = self._bundle.get_setting("action_mappings")
-        if not mappings:
-            return []
-        # returns a structure on the form
-        # { "Maya Scene": ["reference", "import"] }
-        actions = mappings.get(publish_type, [])
-        actions.extend(mappings.get("All", []))
-        if len(actions) == 0:
-            return []
-
-        # cool so we have one or more actions for this publish type.
-        # resolve UI area
-        if ui_area == LoaderManager.UI_AREA_DETAILS:
-            ui_area_str = "details"
-        elif ui_area == LoaderManager.UI_AREA_HISTORY:
-            ui_area_str = "history"
-        elif ui_area == LoaderManager.UI_AREA_MAIN:
-            ui_area_str = "main"
-        else:
-            raise TankError("Unsupported UI_AREA. Contact support.")
-
-        # convert created_at unix time stamp to shotgun time stamp
-        self._fix_timestamp(sg_data)
-
-        action_defs = []
-        try:
-            # call out to hook to give us the specifics.
-            action_defs = self._bundle.execute_hook_method(
-                "actions_hook",
-                "generate_actions",
-                sg_publish_data=sg_data,
-                actions=actions,
-                ui_area=ui_area_str,
-            )
-        except Exception:
-            self._logger.exception("Could not execute generate_actions hook.")
-
-        return action_defs
+        return self._generate_actions_for_publishes([sg_data], ui_area)[0]
 
     def get_actions_for_publishes(self, sg_data_list, ui_area):
         """
@@ -152,26 +154,24 @@ class LoaderManager(object):
         if len(sg_data_list) == 0:
             return {}
 
+        # Get the actions of all the publishes, with one hook call per publish type.
+        publish_actions_list = self._generate_actions_for_publishes(
+            sg_data_list, ui_area
+        )
+
         # We are going to do an intersection of all the entities' actions. We'll pick the actions from
         # the first item to initialize the intersection...
-        first_entity_actions = self.get_actions_for_publish(sg_data_list[0], ui_area)
-
         # Dictionary of all actions that are common to all publishes in the selection.
         # The key is the action name, the value is the action item
         intersection_actions_per_name = dict(
             [
                 (action["name"], [(sg_data_list[0], action)])
-                for action in first_entity_actions
+                for action in publish_actions_list[0]
             ]
         )
 
         # So, for each publishes in the selection after the first one...
-        for sg_data in sg_data_list[1:]:
-
-            # Get all the actions for a publish.
-            publish_actions = self.get_actions_for_publish(
-                sg_data, self.UI_AREA_DETAILS
-            )
+        for sg_data, publish_actions in zip(sg_data_list[1:], publish_actions_list[1:]):
 
             # Turn the list of actions into a dictionary of actions using the key
             # as the name.
@@ -214,8 +214,7 @@ class LoaderManager(object):
         :param action: Dictionary containing the action data has defined in the hook.
         """
         try:
-            self._bundle.execute_hook_method(
-                "actions_hook",
+            self._execute_actions_hook(
                 "execute_action",
                 name=action["name"],
                 params=action["params"],
@@ -239,9 +238,7 @@ class LoaderManager(object):
         """
 
         try:
-            self._bundle.execute_hook_method(
-                "actions_hook", "execute_multiple_actions", actions=actions
-            )
+            self._execute_actions_hook("execute_multiple_actions", actions=actions)
         except Exception as e:
             self._logger.exception(
                 "Could not execute execute_action hook: {}".format(e)
@@ -276,8 +273,7 @@ class LoaderManager(object):
         action_defs = []
         try:
             # call out to hook to give us the specifics.
-            action_defs = self._bundle.execute_hook_method(
-                "actions_hook",
+            action_defs = self._execute_actions_hook(
                 "generate_actions",
                 sg_publish_data=sg_data,
                 actions=actions,
@@ -288,6 +284,105 @@ class LoaderManager(object):
 
         return action_defs
 
+    def _generate_actions_for_publishes(self, sg_data_list, ui_area):
+        """
+        Returns the actions of each publish of a list.
+
+        The publishes are grouped by publish type and the actions of each
+        group are generated with a single call to the
+        generate_actions_for_publishes hook method.
+
+        :param sg_data_list: List of Shotgun data dictionary with all the standard publish fields.
+        :param ui_area: Indicates which part of the UI the request is coming from.
+        :return: List holding a list of action dictionaries for each publish,
+                 in the same order as the publishes.
+        """
+        ui_area_str = self._get_ui_area_str(ui_area)
+
+        # indexes of the publishes of each type in the list
+        indexes_per_type = {}
+        for idx, sg_data in enumerate(sg_data_list):
+            publish_type = self._get_publish_type(sg_data)
+            indexes_per_type.setdefault(publish_type, []).append(idx)
+
+        publish_actions_list = [[] for _ in sg_data_list]
+        for publish_type, indexes in indexes_per_type.items():
+            actions = self._get_type_actions(publish_type)
+            if len(actions) == 0:
+                continue
+
+            publishes = [sg_data_list[idx] for idx in indexes]
+            for sg_data in publishes:
+                # convert created_at unix time stamp to shotgun time stamp
+                self._fix_timestamp(sg_data)
+
+            if self._has_type_pure_actions():
+                # the actions only depend on the type of the publishes and
+                # on the UI area, they are resolved once for all of them.
+                cache_key = (publish_type, ui_area_str)
+                action_defs = self._resolved_actions.get(cache_key)
+                if action_defs is None:
+                    self._num_resolved_actions_misses += 1
+                    type_actions_list = self._execute_generate_actions_for_publishes(
+                        publishes[:1], actions, ui_area_str
+                    )
+                    if not type_actions_list:
+                        continue
+                    action_defs = type_actions_list[0]
+                    self._resolved_actions[cache_key] = action_defs
+                else:
+                    self._num_resolved_actions_hits += 1
+
+                # each publish gets its own copies, which callers may modify
+                for idx in indexes:
+                    publish_actions_list[idx] = [dict(x) for x in action_defs]
+                continue
+
+            type_actions_list = self._execute_generate_actions_for_publishes(
+                publishes, actions, ui_area_str
+            )
+            if type_actions_list is None:
+                continue
+
+            for idx, action_defs in zip(indexes, type_actions_list):
+                publish_actions_list[idx] = action_defs
+
+        return publish_actions_list
+
+    def _execute_generate_actions_for_publishes(self, publishes, actions, ui_area_str):
+        """
+        Executes the generate_actions_for_publishes hook method.
+
+        :param publishes: List of Shotgun data dictionaries of the same type.
+        :param actions: Tuple of the actions mapped to the publish type.
+        :param ui_area_str: Name of the UI area.
+        :return: List holding a list of action dictionaries for each publish,
+                 None if the hook failed.
+        """
+        try:
+            # call out to hook to give us the specifics.
+            return self._execute_actions_hook(
+                "generate_actions_for_publishes",
+                sg_publish_data_list=publishes,
+                actions=list(actions),
+                ui_area=ui_area_str,
+            )
+        except Exception:
+            self._logger.exception(
+                "Could not execute generate_actions_for_publishes hook."
+            )
+            return None
+
+    def get_resolved_actions_statistics(self):
+        """
+        Returns the statistics of the cache of the actions resolved per
+        publish type and UI area, used when the actions hook declares its
+        actions only depend on them.
+
+        :return: Tuple holding the number of cache hits and misses.
+        """
+        return (self._num_resolved_actions_hits, self._num_resolved_actions_misses)
+
     def has_actions(self, publish_type):
         """
         Returns true if the given publish type has any actions associated with it.
@@ -295,16 +390,109 @@ class LoaderManager(object):
         :param publish_type: A Shotgun publish type (e.g. 'Maya Render')
         :return:: True if the current actions setup knows how to handle this.
         """
-        mappings = self._bundle.get_setting("action_mappings")
-        if not mappings:
-            return False
+        return len(self._get_type_actions(publish_type)) > 0
+
+    def _get_type_actions(self, publish_type):
+        """
+        Returns the actions mapped to a publish type, including the actions
+        mapped to all types.
+
+        :param publish_type: A Shotgun publish type (e.g. 'Maya Render')
+        :return: Tuple of action names.
+        """
+        if self._bundle.context is not self._action_mappings_context:
+            self._compile_action_mappings()
 
+        return self._action_mappings.get(publish_type, self._all_types_actions)
+
+    def _compile_action_mappings(self):
+        """
+        Compiles the action_mappings setting into a table of action names
+        keyed by publish type.
+
+        The setting is never modified, and the tuples of the table can't be,
+        so that the actions of a type stay the same however often they are
+        requested.
+        """
         # returns a structure on the form
         # { "Maya Scene": ["reference", "import"] }
-        my_mappings = mappings.get(publish_type, [])
-        my_mappings.extend(mappings.get("All", []))
+        mappings = self._bundle.get_setting("action_mappings") or {}
+
+        self._all_types_actions = tuple(mappings.get("All", []))
+        self._action_mappings = dict(
+            (publish_type, tuple(actions) + self._all_types_actions)
+            for (publish_type, actions) in mappings.items()
+            if publish_type != "All"
+        )
+        self._action_mappings_context = self._bundle.context
+        self._type_pure_actions = None
+        self._resolved_actions = {}
+
+    def _has_type_pure_actions(self):
+        """
+        Returns True if the actions hook declares that the actions of a
+        publish only depend on its type and on the UI area.
+        """
+        if self._type_pure_actions is None:
+            try:
+                self._type_pure_actions = bool(
+                    self._execute_actions_hook("has_type_pure_actions")
+                )
+            except Exception:
+                self._logger.exception("Could not execute has_type_pure_actions hook.")
+                self._type_pure_actions = False
+        return self._type_pure_actions
+
+    def _get_publish_type(self, sg_data):
+        """
+        Returns the name of the type of a publish.
+
+        :param sg_data: Shotgun data dictionary with all the standard publish fields.
+        :return: Name of the publish type, "undefined" if the publish has none.
+        """
+        if self._publish_type_field not in sg_data.keys():
+            raise TankError(
+                "Missing {} field in Shotgun data dictionary.".format(
+                    self._publish_type_field
+                )
+            )
+
+        # Figure out the type of the publish
+        publish_type_dict = sg_data.get(self._publish_type_field)
+        if publish_type_dict is None:
+            # this publish does not have a type
+            return "undefined"
+        return publish_type_dict["name"]
+
+    @staticmethod
+    def _get_ui_area_str(ui_area):
+        """
+        Returns the name of a UI area passed to the hooks.
+
+        :param ui_area: One of the UI_AREA_MAIN, UI_AREA_DETAILS and UI_AREA_HISTORY values.
+        :return: One of "main", "details" and "history".
+        """
+        if ui_area == LoaderManager.UI_AREA_DETAILS:
+            return "details"
+        elif ui_area == LoaderManager.UI_AREA_HISTORY:
+            return "history"
+        elif ui_area == LoaderManager.UI_AREA_MAIN:
+            return "main"
+        else:
+            raise TankError("Unsupported UI_AREA. Contact support.")
 
-        return len(my_mappings) > 0
+    def _execute_actions_hook(self, method_name, **kwargs):
+        """
+        Executes a method of the actions hook, which derives from
+        :class:`ActionsHook` to provide the methods it doesn't implement.
+
+        :param method_name: Name of the method to execute.
+        :param kwargs: Arguments of the method.
+        :return: Value returned by the method.
+        """
+        return self._bundle.execute_hook_method(
+            "actions_hook", method_name, base_class=ActionsHook, **kwargs
+        )
 
     @staticmethod
     def _fix_timestamp(sg_data):
@@ -0,0 +1,196 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import functools
+
+import sgtk
+from sgtk.platform.qt import QtCore, QtGui
+
+shotgun_data = sgtk.platform.import_framework(
+    "tk-framework-shotgunutils", "shotgun_data"
+)
+
+# cache shared by all the dialogs of the app
+_avatar_cache = None
+
+
+def get_avatar_cache():
+    """
+    Returns the avatar cache shared by all the dialogs of the app, e.g. the
+    main dialog and the open publish form.
+
+    :returns: :class:`AvatarCache`
+    """
+    global _avatar_cache
+    if _avatar_cache is None:
+        _avatar_cache = AvatarCache()
+    return _avatar_cache
+
+
+class AvatarCache(QtCore.QObject):
+    """
+    In-memory cache of the thumbnails of users, keyed by HumanUser id.
+
+    Thumbnails are downloaded and decoded in the background once per user,
+    and kept scaled down to the size they are displayed at. Requesting the
+    thumbnail of a user while it is being downloaded doesn't start another
+    download.
+
+    Downloads run on the background task managers of the dialogs, which
+    register them while they are open. See register_bg_task_manager().
+    """
+
+    # size the thumbnails are scaled down to, in pixels
+    SIZE = 30
+
+    # emitted with the id of a user once their thumbnail is available
+    avatar_loaded = QtCore.Signal(object)
+
+    def __init__(self, parent=None):
+        """
+        :param parent: Parent QObject.
+        """
+        super(AvatarCache, self).__init__(parent)
+
+        # user id -> QPixmap
+        self._avatars = {}
+        # (task manager, task id) -> id of the user whose thumbnail is downloaded
+        self._tasks = {}
+        self._pending_user_ids = set()
+        # task manager -> slots connected to its signals, in registration order
+        self._bg_task_managers = {}
+
+    def register_bg_task_manager(self, bg_task_manager):
+        """
+        Registers a background task manager to download thumbnails with.
+        The most recently registered one is used.
+
+        :param bg_task_manager: :class:`~task_manager.BackgroundTaskManager`.
+        """
+        if bg_task_manager in self._bg_task_managers:
+            return
+
+        slots = (
+            functools.partial(self._on_task_completed, bg_task_manager),
+            functools.partial(self._on_task_failed, bg_task_manager),
+        )
+        bg_task_manager.task_completed.connect(slots[0])
+        bg_task_manager.task_failed.connect(slots[1])
+        self._bg_task_managers[bg_task_manager] = slots
+
+    def unregister_bg_task_manager(self, bg_task_manager):
+        """
+        Unregisters a background task manager, typically before it is shut
+        down. The downloads it runs are given up and can be requested again.
+
+        :param bg_task_manager: :class:`~task_manager.BackgroundTaskManager`.
+        """
+        slots = self._bg_task_managers.pop(bg_task_manager, None)
+        if slots is None:
+            return
+
+        bg_task_manager.task_completed.disconnect(slots[0])
+        bg_task_manager.task_failed.disconnect(slots[1])
+
+        for key in list(self._tasks):
+            if key[0] is bg_task_manager:
+                self._pending_user_ids.discard(self._tasks.pop(key))
+
+    def get_avatar(self, user_id):
+        """
+        Returns the thumbnail of a user, if cached.
+
+        :param user_id: Id of the HumanUser.
+        :returns: QPixmap or None.
+        """
+        return self._avatars.get(user_id)
+
+    def request_avatar(self, user_id, url):
+        """
+        Returns the thumbnail of a user, downloading it in the background
+        if it isn't cached.
+
+        :param user_id: Id of the HumanUser.
+        :param url: Url of the thumbnail of the user.
+        :returns: QPixmap or None if the thumbnail isn't available yet, in
+                  which case avatar_loaded is emitted once it is.
+        """
+        avatar = self._avatars.get(user_id)
+        if (
+            avatar is not None
+            or user_id in self._pending_user_ids
+            or not self._bg_task_managers
+        ):
+            return avatar
+
+        bg_task_manager = list(self._bg_task_managers)[-1]
+        uid = bg_task_manager.add_task(self._task_load_avatar, task_kwargs={"url": url})
+        self._tasks[(bg_task_manager, uid)] = user_id
+        self._pending_user_ids.add(user_id)
+        return None
+
+    def _task_load_avatar(self, url):
+        """
+        Background task downloading and decoding a thumbnail.
+
+        :param url: Url of the thumbnail.
+        :returns: QImage scaled down to the size of the thumbnails.
+        """
+        app = sgtk.platform.current_bundle()
+        path = shotgun_data.ShotgunDataRetriever.download_thumbnail(url, app)
+        image = QtGui.QImage(path)
+        if image.isNull():
+            return image
+
+        return image.scaled(
+            self.SIZE,
+            self.SIZE,
+            QtCore.Qt.KeepAspectRatioByExpanding,
+            QtCore.Qt.SmoothTransformation,
+        )
+
+    def _on_task_completed(self, bg_task_manager, uid, group, result):
+        """
+        Slot triggered when a background task completes.
+
+        :param bg_task_manager: Task manager which ran the task.
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param result: Result returned by the task.
+        """
+        user_id = self._tasks.pop((bg_task_manager, uid), None)
+        if user_id is None:
+            return
+        self._pending_user_ids.discard(user_id)
+
+        if result.isNull():
+            return
+
+        self._avatars[user_id] = QtGui.QPixmap.fromImage(result)
+        self.avatar_loaded.emit(user_id)
+
+    def _on_task_failed(self, bg_task_manager, uid, group, msg, stack_trace):
+        """
+        Slot triggered when a background task fails.
+
+        :param bg_task_manager: Task manager which ran the task.
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param msg: Error message.
+        :param stack_trace: Stack trace of the error.
+        """
+        user_id = self._tasks.pop((bg_task_manager, uid), None)
+        if user_id is None:
+            return
+        # the thumbnail is simply requested again next time
+        self._pending_user_ids.discard(user_id)
+
+        app = sgtk.platform.current_bundle()
+        app.log_warning("Could not download the thumbnail of a user: %s" % msg)
@@ -0,0 +1,62 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from sgtk import Hook
+
+
+class ActionsHook(Hook):
+    """
+    Base class of the actions hooks.
+
+    It is used as the base class of the hooks configured with the
+    actions_hook setting, so that it provides the optional methods those
+    hooks don't implement.
+    """
+
+    def has_type_pure_actions(self):
+        """
+        Returns True if the actions generated for a publish only depend on
+        its type and on the UI area, and not on the publish itself nor on the
+        state of the scene.
+
+        The actions of the publishes of a type are then only generated once
+        for each UI area, and reused until the context changes. Hooks opt in
+        by overriding this method.
+
+        :returns: False by default.
+        """
+        return False
+
+    def generate_actions_for_publishes(self, sg_publish_data_list, actions, ui_area):
+        """
+        Returns the action instances for several publishes of the same type.
+
+        This method is called when several publishes are selected in the UI,
+        once for each publish type in the selection. Hooks can implement it
+        to generate the actions of all the publishes at once, for example to
+        introspect the scene only once.
+
+        The default implementation calls ``generate_actions`` for each publish.
+
+        :param sg_publish_data_list: List of Shotgun data dictionaries with all
+                                     the standard publish fields.
+        :param actions: List of action strings which have been defined in the
+                        app configuration for the publish type.
+        :param ui_area: String denoting the UI Area, see ``generate_actions``.
+        :returns: List holding a list of action dictionaries for each publish,
+                  in the same order as the publishes. Action dictionaries have
+                  name, params, caption and description keys.
+        """
+        return [
+            self.generate_actions(
+                sg_publish_data=sg_publish_data, actions=actions, ui_area=ui_area
+            )
+            for sg_publish_data in sg_publish_data_list
+        ]
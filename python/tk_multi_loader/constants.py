@@ -32,8 +32,64 @@ PUBLISHED_FILES_FIELDS = [
     "version",  # note: not supported on TankPublishedFile so always None
     "version.Version.sg_status_list",
     "created_by.HumanUser.image",
+    "updated_at",
 ]
 
+# fields which are only needed when looking at the details of a publish, for
+# example in the details panel or by the actions hooks. These are expensive to
+# retrieve and are fetched on demand for the selected and visible publishes.
+PUBLISHED_FILES_DETAIL_FIELDS = [
+    "task.Task.content",
+    "version.Version.sg_status_list",
+    "created_by.HumanUser.image",
+]
+
+# fields needed to display and filter publishes in the main view
+PUBLISHED_FILES_GRID_FIELDS = [
+    x for x in PUBLISHED_FILES_FIELDS if x not in PUBLISHED_FILES_DETAIL_FIELDS
+]
+
+# fields needed to work out which publish is the latest version of its
+# stream (name, type and task). Used when only the latest publishes are
+# fetched in full, see the fetch_latest_publishes_only setting.
+# The updated_at field is used to only retrieve the records which have changed
+# since the last time they were fetched.
+LATEST_PUBLISH_KEY_FIELDS = ["name", "task", "version_number", "updated_at"]
+
+# maximum number of ids passed to a single "id in" query
+PUBLISH_ID_QUERY_CHUNK_SIZE = 500
+
+# minimum number of publishes for the latest versions to be worked out with
+# NumPy, when available. Smaller lists are faster to reduce in pure python.
+VECTORIZED_REDUCTION_MIN_ROWS = 5000
+
+# bounds of the in-memory cache of publish result sets, which makes
+# navigating back to recently visited locations instant. Result sets
+# older than the maximum age (in seconds) are retrieved again.
+PUBLISH_RESULT_CACHE_MAX_SIZE = 64 * 1024 * 1024
+PUBLISH_RESULT_CACHE_MAX_AGE = 300
+
+# maximum number of versions held by the in-memory cache of publish histories,
+# and maximum number of publish histories retrieved by a single query when
+# the histories of the visible publishes are prefetched.
+PUBLISH_HISTORY_CACHE_MAX_VERSIONS = 10000
+PUBLISH_HISTORY_PREFETCH_CHUNK_SIZE = 50
+
+# maximum number of prefetched queries remembered to work out the hit rate of
+# publish prefetching.
+PUBLISH_PREFETCH_MAX_QUERIES = 1000
+
+# maximum number of publishes whose QActions are kept, so that selecting them
+# again doesn't rebuild their actions menus.
+PUBLISH_ACTIONS_CACHE_MAX_SIZE = 200
+
+# size of the publish and folder thumbnails composited for the main view,
+# see utils.create_overlayed_publish_thumbnail().
+PUBLISH_THUMBNAIL_SIZE = (512, 400)
+
 # left hand side tree view search only kicks in
 # after a certain number have been typed in.
 TREE_SEARCH_TRIGGER_LENGTH = 2
+
+# maximum number of nodes displayed for a fuzzy search of the tree views.
+TREE_FUZZY_SEARCH_MAX_RESULTS = 200
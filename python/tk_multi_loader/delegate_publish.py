@@ -71,6 +71,13 @@ class PublishWidget(QtGui.QWidget):
         for a in self._actions:
             self._menu.addAction(a)
 
+    def clear_actions(self):
+        """
+        Removes all the actions from the actions menu for this widget.
+        """
+        self._menu.clear()
+        self._actions = []
+
     def set_button_visible(self, is_visible):
         """
         Shows or hides the action button.
@@ -164,25 +171,58 @@ class PublishDelegate(shotgun_view.EditSelectedWidgetDelegate):
             # a folder widget with shotgun data
             widget.set_actions(self._action_manager.get_actions_for_folder(sg_item))
         else:
-            actions = self._action_manager.get_actions_for_publish(
-                sg_item, self._action_manager.UI_AREA_MAIN
-            )
-            widget.set_actions(actions)
-            # If there is only one selected item and there are actions for it, update the
-            # delegate's tooltip to mention what a double click can achieve.
-            if (
-                len(self._view.selectionModel().selectedIndexes()) == 1
-                and len(actions) > 0
-            ):
-                primary_action = actions[0]
-                widget.setToolTip(
-                    "Double click for the <i>%s</i> action." % primary_action.text()
-                )
+            # the actions are built from the fields already retrieved for the
+            # publish and are rebuilt once its detail fields are loaded, see
+            # update_selection_actions().
+            self._set_publish_actions(widget, sg_item)
 
         # Hide the widget action menu when it is empty.
         if widget.action_menu_is_empty:
             widget.set_button_visible(False)
 
+    def update_selection_actions(self, publish_ids):
+        """
+        Rebuilds the actions of the selected publishes, for example once
+        their detail fields have been loaded.
+
+        :param publish_ids: Ids of the publishes to rebuild the actions for.
+        """
+        publish_ids = set(publish_ids)
+        for model_index in self._view.selectionModel().selectedIndexes():
+            widget = self._view.indexWidget(model_index)
+            sg_item = shotgun_model.get_sg_data(model_index)
+            if widget is None or sg_item is None or sg_item["id"] not in publish_ids:
+                continue
+            if shotgun_model.get_sanitized_data(
+                model_index, SgLatestPublishModel.IS_FOLDER_ROLE
+            ):
+                continue
+            widget.clear_actions()
+            self._set_publish_actions(widget, sg_item)
+            widget.set_button_visible(
+                not widget.action_menu_is_empty
+                and len(self._view.selectionModel().selectedIndexes()) == 1
+            )
+
+    def _set_publish_actions(self, widget, sg_item):
+        """
+        Sets up the actions menu of a publish widget.
+
+        :param widget: The widget to operate on (created via _create_widget)
+        :param sg_item: Shotgun data of the publish
+        """
+        actions = self._action_manager.get_actions_for_publish(
+            sg_item, self._action_manager.UI_AREA_MAIN
+        )
+        widget.set_actions(actions)
+        # If there is only one selected item and there are actions for it, update the
+        # delegate's tooltip to mention what a double click can achieve.
+        if len(self._view.selectionModel().selectedIndexes()) == 1 and len(actions) > 0:
+            primary_action = actions[0]
+            widget.setToolTip(
+                "Double click for the <i>%s</i> action." % primary_action.text()
+            )
+
     def _on_before_paint(self, widget, model_index, style_options):
         """
         Called by the base class when the associated widget should be
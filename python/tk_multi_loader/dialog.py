@@ -13,11 +13,13 @@ import sgtk
 from sgtk import TankError
 from sgtk.platform.qt import QtCore, QtGui
 
+from .avatar_cache import get_avatar_cache
 from .model_hierarchy import SgHierarchyModel
 from .model_entity import SgEntityModel
 from .model_latestpublish import SgLatestPublishModel
 from .model_publishtype import SgPublishTypeModel
 from .model_status import SgStatusModel
+from .publish_prefetcher import PublishPrefetcher
 from .proxymodel_latestpublish import SgLatestPublishProxyModel
 from .proxymodel_entity import SgEntityProxyModel
 from .delegate_publish_thumb import SgPublishThumbDelegate
@@ -106,6 +108,7 @@ class AppDialog(QtGui.QWidget):
         )
 
         shotgun_globals.register_bg_task_manager(self._task_manager)
+        get_avatar_cache().register_bg_task_manager(self._task_manager)
 
         # set up the UI
         self.ui = Ui_Dialog()
@@ -219,6 +222,20 @@ class AppDialog(QtGui.QWidget):
             self._publish_model, self.ui.publish_view
         )
 
+        # optionally retrieve the publishes of the tree view items next
+        # to the selected one ahead of time
+        app = sgtk.platform.current_bundle()
+        if app.get_setting("prefetch_publishes", False):
+            self._publish_prefetcher = PublishPrefetcher(
+                self._publish_model,
+                self._task_manager,
+                app.get_setting("prefetch_fan_out", 4),
+                app.get_setting("prefetch_budget", 8),
+                self,
+            )
+        else:
+            self._publish_prefetcher = None
+
         # set up a proxy model to cull results based on type selection
         self._publish_proxy_model = SgLatestPublishProxyModel(self)
         self._publish_proxy_model.setSourceModel(self._publish_model)
@@ -227,6 +244,9 @@ class AppDialog(QtGui.QWidget):
         # check if we should display the "sorry, no publishes found" overlay
         self._publish_model.cache_loaded.connect(self._on_publish_content_change)
         self._publish_model.data_refreshed.connect(self._on_publish_content_change)
+        self._publish_model.sub_items_progress.connect(
+            self._on_publish_sub_items_progress
+        )
         self._publish_proxy_model.layoutChanged.connect(
             lambda parents, hint: self._on_publish_content_change()
         )
@@ -267,6 +287,28 @@ class AppDialog(QtGui.QWidget):
             self._on_publish_selection
         )
 
+        # the fields only needed to display the details of a publish are retrieved
+        # for the selected and visible publishes. Visible publishes are handled
+        # once scrolling or loading has settled down.
+        self._publish_model.publish_details_loaded.connect(
+            self._on_publish_details_loaded
+        )
+        self._visible_publish_details_timer = QtCore.QTimer(self)
+        self._visible_publish_details_timer.setSingleShot(True)
+        self._visible_publish_details_timer.setInterval(250)
+        self._visible_publish_details_timer.timeout.connect(
+            self._fetch_visible_publish_details
+        )
+        self.ui.publish_view.verticalScrollBar().valueChanged.connect(
+            lambda value: self._visible_publish_details_timer.start()
+        )
+        self._publish_model.cache_loaded.connect(
+            self._visible_publish_details_timer.start
+        )
+        self._publish_model.data_refreshed.connect(
+            lambda data_changed: self._visible_publish_details_timer.start()
+        )
+
         # set up right click menu for the main publish view
         self._refresh_action = QtGui.QAction("Refresh", self.ui.publish_view)
         self._refresh_action.triggered.connect(self._publish_model.async_refresh)
@@ -446,6 +488,20 @@ class AppDialog(QtGui.QWidget):
     def selected_publishes(self):
         """
         Get the selected sg_publish details
+
+        The detail fields of the publishes selected in the main view may not
+        have been retrieved yet, see :meth:`get_selected_publishes`.
+        """
+        return self.get_selected_publishes()
+
+    def get_selected_publishes(self, with_details=False):
+        """
+        Get the selected sg_publish details
+
+        :param with_details: If True, the detail fields of the publishes
+                             selected in the main view are retrieved if they
+                             haven't been yet. This queries Shotgun synchronously.
+        :returns: List of Shotgun publish records.
         """
         # check to see if something is selected in the details history view:
         selection_model = self.ui.history_view.selectionModel()
@@ -473,6 +529,7 @@ class AppDialog(QtGui.QWidget):
         selection_model = self.ui.publish_view.selectionModel()
         if selection_model.hasSelection():
 
+            items = []
             for proxy_index in selection_model.selection().indexes():
 
                 # the incoming model index is an index into our proxy model
@@ -482,10 +539,12 @@ class AppDialog(QtGui.QWidget):
 
                 # now we have arrived at our model derived from StandardItemModel
                 # so let's retrieve the standarditem object associated with the index
-                item = source_index.model().itemFromIndex(source_index)
+                items.append(source_index.model().itemFromIndex(source_index))
 
-                sg_data = item.get_sg_data()
+            if with_details:
+                self._publish_model.ensure_publish_details(items)
 
+            for item in items:
                 sg_data = item.get_sg_data()
                 if sg_data and not item.data(SgLatestPublishModel.IS_FOLDER_ROLE):
                     sg_data_list.append(sg_data)
@@ -530,7 +589,10 @@ class AppDialog(QtGui.QWidget):
                     app.log_debug("Error disconnecting on closeEvent()")
 
             # gracefully close all connections
+            if self._publish_prefetcher:
+                self._publish_prefetcher.stop()
             shotgun_globals.unregister_bg_task_manager(self._task_manager)
+            get_avatar_cache().unregister_bg_task_manager(self._task_manager)
             self._task_manager.shut_down()
 
         except:
@@ -851,10 +913,15 @@ class AppDialog(QtGui.QWidget):
 
                 sg_item = item.get_sg_data()
 
-                # sort out the actions button
-                actions = self._action_manager.get_actions_for_publish(
-                    sg_item, self._action_manager.UI_AREA_DETAILS
-                )
+                # sort out the actions button. The actions are passed the
+                # detail fields of the publish, if they are still being
+                # retrieved the panel is set up again once they have arrived.
+                if self._publish_model.has_publish_details(sg_item):
+                    actions = self._action_manager.get_actions_for_publish(
+                        sg_item, self._action_manager.UI_AREA_DETAILS
+                    )
+                else:
+                    actions = []
                 if len(actions) == 0:
                     self.ui.detail_actions_btn.setVisible(False)
                 else:
@@ -935,8 +1002,11 @@ class AppDialog(QtGui.QWidget):
                 self.ui.details_header.setText("<table>%s</table>" % msg)
 
                 # tell details pane to load stuff
+                # the versions of the publish are usually known already
                 sg_data = item.get_sg_data()
-                self._publish_history_model.load_data(sg_data)
+                self._publish_history_model.load_data(
+                    sg_data, self._publish_model.get_publish_versions(sg_data)
+                )
 
             self.ui.details_header.updateGeometry()
 
@@ -1130,6 +1200,19 @@ class AppDialog(QtGui.QWidget):
         else:
             self._publish_main_overlay.hide()
 
+    def _on_publish_sub_items_progress(self, num_loaded, num_total):
+        """
+        Triggered while publishes are being retrieved in batches
+        in the "Show items in subfolders" mode.
+
+        :param num_loaded: Number of batches loaded so far.
+        :param num_total: Total number of batches.
+        """
+        if num_loaded < num_total:
+            self._publish_main_overlay.show_message(
+                "Loading publishes... (%d of %d batches)" % (num_loaded, num_total)
+            )
+
     def _on_show_subitems_toggled(self):
         """
         Triggered when the show sub items checkbox is clicked
@@ -1178,11 +1261,79 @@ class AppDialog(QtGui.QWidget):
         if len(selected_indexes) == 0:
             self._setup_details_panel([])
         else:
+            # make sure the details of the selected publishes are available
+            items = [self._get_publish_item(x) for x in selected_indexes]
+            self._publish_model.fetch_publish_details(items)
+            if len(items) > 1:
+                # and their histories, in case the selection gets narrowed down
+                self._publish_history_model.prefetch([x.get_sg_data() for x in items])
             self._setup_details_panel(selected_indexes)
 
         # emit the selection changed signal:
         self.selection_changed.emit()
 
+    def _get_publish_item(self, proxy_index):
+        """
+        Returns the publish model item for an index of the publish proxy model.
+
+        :param proxy_index: Index in the publish proxy model.
+        :returns: Item in the publish model.
+        """
+        source_index = self._publish_proxy_model.mapToSource(proxy_index)
+        return self._publish_model.itemFromIndex(source_index)
+
+    def _fetch_visible_publish_details(self):
+        """
+        Requests the details and histories of the publishes visible in the main view.
+        """
+        viewport_rect = self.ui.publish_view.viewport().rect()
+
+        # the publishes are laid out in row order, only the rows between the
+        # ones at the top left and bottom right corners can be visible. The
+        # corners can fall between items, in which case the range is extended
+        # to the first or last row.
+        first_index = self.ui.publish_view.indexAt(viewport_rect.topLeft())
+        last_index = self.ui.publish_view.indexAt(viewport_rect.bottomRight())
+        first_row = first_index.row() if first_index.isValid() else 0
+        if last_index.isValid():
+            last_row = last_index.row()
+        else:
+            last_row = self._publish_proxy_model.rowCount() - 1
+
+        items = []
+        for row in range(first_row, last_row + 1):
+            proxy_index = self._publish_proxy_model.index(row, 0)
+            if self.ui.publish_view.visualRect(proxy_index).intersects(viewport_rect):
+                items.append(self._get_publish_item(proxy_index))
+        self._publish_model.fetch_publish_details(items)
+
+        # as well as their histories, so that moving the selection from one
+        # publish to another doesn't run a query each time.
+        self._publish_history_model.prefetch([x.get_sg_data() for x in items])
+
+    def _on_publish_details_loaded(self, publish_ids):
+        """
+        Triggered when the details of publishes have been retrieved.
+        Refreshes the actions of the selection, the history and the details
+        panel if it displays one of them.
+
+        :param publish_ids: List of publish ids.
+        """
+        # the actions of the selected publishes and the history were built
+        # without their detail fields.
+        self.ui.publish_view.itemDelegate().update_selection_actions(publish_ids)
+        self._publish_history_model.merge_publish_details(
+            dict((x, self._publish_model.get_publish_details(x)) for x in publish_ids)
+        )
+
+        selected_indexes = self.ui.publish_view.selectionModel().selectedIndexes()
+        if len(selected_indexes) != 1:
+            return
+
+        sg_data = self._get_publish_item(selected_indexes[0]).get_sg_data()
+        if sg_data and sg_data.get("id") in publish_ids:
+            self._setup_details_panel(selected_indexes)
+
     def _on_publish_double_clicked(self, model_index):
         """
         When someone double clicks on a publish, run the default action
@@ -1209,8 +1360,9 @@ class AppDialog(QtGui.QWidget):
             )
 
         else:
-            # Run default action.
-            sg_item = shotgun_model.get_sg_data(model_index)
+            # Run default action, which is passed the detail fields.
+            self._publish_model.ensure_publish_details([item])
+            sg_item = item.get_sg_data()
             default_action = self._action_manager.get_default_action_for_publish(
                 sg_item, self._action_manager.UI_AREA_MAIN
             )
@@ -1549,6 +1701,10 @@ class AppDialog(QtGui.QWidget):
                     )
                 )
 
+                # Searches typed before the search index of the model is built
+                # get their results later, expand the tree to show them.
+                proxy_model.search_results_ready.connect(view.expandAll)
+
                 # Keep a handle to all the new Qt objects, otherwise the GC may not work.
                 self._dynamic_widgets.extend(
                     [search_layout, search, clear_search, icon]
@@ -2011,6 +2167,12 @@ class AppDialog(QtGui.QWidget):
             item, child_folders, show_sub_items, publish_filters
         )
 
+        if self._publish_prefetcher:
+            if item is None or show_sub_items:
+                self._publish_prefetcher.stop()
+            else:
+                self._publish_prefetcher.prefetch(item, publish_filters)
+
     def _populate_entity_breadcrumbs(self, selected_item):
         """
         Computes the current entity breadcrumbs
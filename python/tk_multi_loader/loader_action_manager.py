@@ -11,11 +11,13 @@
 import functools
 import os
 import sys
+from collections import OrderedDict
 
 import sgtk
 from sgtk.platform.qt import QtCore, QtGui
 from sgtk.util import login
 
+from . import constants
 from .action_manager import ActionManager
 from .api import LoaderManager
 
@@ -41,6 +43,13 @@ class LoaderActionManager(ActionManager):
         self._app = sgtk.platform.current_bundle()
         self._loader_manager = LoaderManager(self._app, self._app.logger)
 
+        # QActions of single publishes, keyed by publish, update time and UI area,
+        # so that selecting a publish again doesn't run the hook and rebuild them.
+        # They are discarded when an action is executed, as it may change the
+        # scene, and when the context changes.
+        self._publish_actions = OrderedDict()
+        self._publish_actions_context = self._app.context
+
     def get_actions_for_publishes(self, sg_data_list, ui_area):
         """
         Returns a list of actions for a publish.
@@ -114,8 +123,30 @@ class LoaderActionManager(ActionManager):
         """
         See documentation for get_actions_for_publish. The functionality is the same, but only for
         a single publish.
+
+        The QActions are cached and reused the next time the actions of the same
+        version of the publish are requested for the same UI area, with the
+        same fields. Publishes of the main view only hold their detail fields
+        once they have been retrieved, which doesn't change their updated_at
+        value.
         """
-        return self.get_actions_for_publishes([sg_data], ui_area)
+        if self._app.context is not self._publish_actions_context:
+            self._clear_publish_actions()
+
+        has_details = all(x in sg_data for x in constants.PUBLISHED_FILES_DETAIL_FIELDS)
+        key = (sg_data.get("id"), sg_data.get("updated_at"), has_details, ui_area)
+        qt_actions = self._publish_actions.get(key)
+        if qt_actions is None:
+            qt_actions = self.get_actions_for_publishes([sg_data], ui_area)
+            self._publish_actions[key] = qt_actions
+            if len(self._publish_actions) > constants.PUBLISH_ACTIONS_CACHE_MAX_SIZE:
+                # discard the least recently used actions
+                self._publish_actions.popitem(last=False)
+        else:
+            self._publish_actions.move_to_end(key)
+
+        # callers may add their own actions to the list
+        return list(qt_actions)
 
     def get_default_action_for_publish(self, sg_data, ui_area):
         """
@@ -210,9 +241,56 @@ class LoaderActionManager(ActionManager):
 
         return qt_actions
 
+    def _clear_publish_actions(self):
+        """
+        Discards the cached QActions of the publishes.
+        """
+        self._publish_actions = OrderedDict()
+        self._publish_actions_context = self._app.context
+
     ########################################################################################
     # callbacks
 
+    def _add_publish_details(self, actions):
+        """
+        Completes the publish data of the given actions with the detail
+        fields of the publishes which haven't been retrieved yet.
+
+        The actions of the main view are built from the fields displayed in
+        the view, the detail fields are only needed once they are executed.
+
+        :param actions: List of action dictionaries.
+        :returns: List of action dictionaries holding the detail fields.
+        """
+        missing_ids = set(
+            action["sg_publish_data"]["id"]
+            for action in actions
+            if not all(
+                x in action["sg_publish_data"]
+                for x in constants.PUBLISHED_FILES_DETAIL_FIELDS
+            )
+        )
+        if not missing_ids:
+            return actions
+
+        details = dict(
+            (sg_data["id"], sg_data)
+            for sg_data in self._loader_manager.get_publishes(
+                list(missing_ids), constants.PUBLISHED_FILES_DETAIL_FIELDS
+            )
+        )
+
+        completed_actions = []
+        for action in actions:
+            sg_publish_data = action["sg_publish_data"]
+            if sg_publish_data["id"] in details:
+                sg_publish_data = dict(sg_publish_data)
+                for field in constants.PUBLISHED_FILES_DETAIL_FIELDS:
+                    sg_publish_data[field] = details[sg_publish_data["id"]].get(field)
+                action = dict(action, sg_publish_data=sg_publish_data)
+            completed_actions.append(action)
+        return completed_actions
+
     def _execute_hook(self, qt_action, actions):
         """
         callback - executes a hook
@@ -222,6 +300,7 @@ class LoaderActionManager(ActionManager):
         self.pre_execute_action.emit(qt_action)
 
         try:
+            actions = self._add_publish_details(actions)
             self._loader_manager.execute_multiple_actions(actions)
         except Exception as e:
             self._app.log_exception("Could not execute execute_action hook: %s" % e)
@@ -282,6 +361,9 @@ class LoaderActionManager(ActionManager):
                 pass
 
         finally:
+            # the action may have changed the scene, and the actions
+            # the hook generates for it.
+            self._clear_publish_actions()
             self.post_execute_action.emit(qt_action)
 
     def _show_in_sg(self, entity):
@@ -0,0 +1,119 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Bounded in-memory cache, evicting the least recently used entries once
+    the total size of the entries exceeds the maximum size.
+
+    The size of each entry is measured with the function given to the cache,
+    for example in bytes or in number of items. Entries can be stored with a
+    tag, typically identifying the version of the data they were retrieved
+    with, and are then only returned for the same tag. Entries older than
+    the maximum age, if any, are considered stale and are never returned.
+    """
+
+    def __init__(self, max_size, get_size, max_age=None):
+        """
+        :param max_size: Maximum total size of the entries.
+        :param get_size: Function returning the size of the value of an entry.
+        :param max_age: Optional number of seconds after which an entry is stale.
+        """
+        self._max_size = max_size
+        self._get_size = get_size
+        self._max_age = max_age
+        self._size = 0
+        # key -> (value, tag, time it was stored, size)
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        """
+        Checks if an entry which isn't stale is stored for the given key,
+        whatever its tag.
+        """
+        entry = self._entries.get(key)
+        return entry is not None and not self._is_stale(entry)
+
+    @property
+    def size(self):
+        """
+        Total size of the entries held by the cache.
+        """
+        return self._size
+
+    def get(self, key, tag=None):
+        """
+        Returns the value stored for the given key.
+
+        :param key: Key of the entry.
+        :param tag: Tag the entry must have been stored with.
+        :returns: The value or None if there is no entry for this key, if it
+                  is stale or if it was stored with another tag.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry[1] != tag or self._is_stale(entry):
+            self.remove(key)
+            return None
+
+        # mark as most recently used
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, value, tag=None):
+        """
+        Stores a value, evicting the least recently used entries if needed.
+
+        :param key: Key of the entry.
+        :param value: Value to store.
+        :param tag: Optional tag to store the entry with.
+        """
+        self.remove(key)
+
+        size = self._get_size(value)
+        if size > self._max_size:
+            # would evict everything else and still not fit
+            return
+
+        self._entries[key] = (value, tag, time.time(), size)
+        self._size += size
+
+        while self._size > self._max_size:
+            (_, (_, _, _, evicted_size)) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def remove(self, key):
+        """
+        Removes the entry stored for the given key, if any.
+
+        :param key: Key of the entry.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[3]
+
+    def clear(self):
+        """
+        Removes all the entries.
+        """
+        self._entries.clear()
+        self._size = 0
+
+    def _is_stale(self, entry):
+        """
+        Checks if a cache entry is older than the maximum age.
+        """
+        return self._max_age is not None and time.time() - entry[2] > self._max_age
@@ -11,6 +11,8 @@
 import sgtk
 from sgtk.platform.qt import QtCore, QtGui
 
+from .search_index import TreeSearchIndex
+
 # import the shotgun_model module from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework(
     "tk-framework-shotgunutils", "shotgun_model"
@@ -24,6 +26,9 @@ class SgEntityModel(ShotgunModel):
     on the left hand side.
     """
 
+    # emitted when the search index of the tree has been rebuilt
+    search_index_built = QtCore.Signal()
+
     def __init__(self, parent, entity_type, filters, hierarchy, bg_task_manager):
         """
         Constructor
@@ -78,6 +83,23 @@ class SgEntityModel(ShotgunModel):
         fields = ["image", "sg_status_list", "description"]
         self._load_data(entity_type, filters, hierarchy, fields)
 
+        # the tree is only created as it gets expanded. To search it without
+        # creating it all, the paths of all its leaves are indexed in the
+        # background each time the data is refreshed, from the data retrieved
+        # by the model.
+        self._hierarchy = hierarchy
+        self._search_index_data = None
+        self._search_index = None
+        self._search_index_task = None
+        # ranked fuzzy searches need the index to hold more information
+        app = sgtk.platform.current_bundle()
+        self._fuzzy_search = app.get_setting("fuzzy_tree_search", False)
+
+        self._bg_task_manager = bg_task_manager
+        self._bg_task_manager.task_completed.connect(self._on_task_completed)
+        self._bg_task_manager.task_failed.connect(self._on_task_failed)
+        self.data_refreshed.connect(self._on_data_refreshed)
+
     ############################################################################################
     # public methods
     def async_refresh(self):
@@ -86,9 +108,120 @@ class SgEntityModel(ShotgunModel):
         """
         self._refresh_data()
 
+    def get_search_index(self):
+        """
+        Returns the search index of the tree.
+
+        :returns: :class:`TreeSearchIndex` or None if it hasn't been built.
+        """
+        return self._search_index
+
+    def is_building_search_index(self):
+        """
+        Returns True if the search index of the tree is being built.
+        """
+        return self._search_index_task is not None
+
+    def get_item_path(self, item):
+        """
+        Returns the path of an item in the tree, as used by the search index.
+
+        :param item: Item in the tree.
+        :returns: Tuple of the texts of the item and its ancestors, top first.
+        """
+        path = []
+        while item is not None:
+            path.append(item.text())
+            item = item.parent()
+        return tuple(reversed(path))
+
+    ############################################################################################
+    # private methods
+
+    def _on_data_refreshed(self, data_changed):
+        """
+        Slot triggered when the data has been refreshed from Shotgun, rebuilds
+        the search index if needed.
+
+        :param data_changed: True if the data has changed.
+        """
+        (sg_data_list, self._search_index_data) = (self._search_index_data, None)
+        if sg_data_list is None or (
+            self._search_index is not None and not data_changed
+        ):
+            return
+
+        if self._search_index_task is not None:
+            self._bg_task_manager.stop_task(self._search_index_task)
+        self._search_index_task = self._bg_task_manager.add_task(
+            self._task_build_search_index, task_kwargs={"sg_data_list": sg_data_list}
+        )
+
+    def _task_build_search_index(self, sg_data_list):
+        """
+        Background task indexing the leaves of the tree.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the
+                             query of the model.
+        :returns: :class:`TreeSearchIndex`.
+        """
+        # nodes are named the way the model names its items
+        return TreeSearchIndex(
+            [
+                tuple(self._generate_display_name(x, sg_data) for x in self._hierarchy)
+                for sg_data in sg_data_list
+            ],
+            fuzzy=self._fuzzy_search,
+        )
+
+    def _on_task_completed(self, uid, group, result):
+        """
+        Slot triggered when a background task completes.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param result: Result returned by the task.
+        """
+        if uid != self._search_index_task:
+            return
+        self._search_index_task = None
+        self._search_index = result
+        self.search_index_built.emit()
+
+    def _on_task_failed(self, uid, group, msg, stack_trace):
+        """
+        Slot triggered when a background task fails.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param msg: Error message.
+        :param stack_trace: Stack trace of the error.
+        """
+        if uid != self._search_index_task:
+            return
+        self._search_index_task = None
+
+        # searching falls back on loading the whole tree
+        app = sgtk.platform.current_bundle()
+        app.log_warning("Could not build the tree search index: %s" % msg)
+        app.log_debug(stack_trace)
+        self.search_index_built.emit()
+
     ############################################################################################
     # subclassed methods
 
+    def _before_data_processing(self, sg_data_list):
+        """
+        Called just after data has been retrieved from Shotgun but before any processing
+        takes place. Keeps the data of all the leaves of the tree for the search index
+        to be built from, see _on_data_refreshed().
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the find() call.
+        :returns: should return a list of shotgun dictionaries, on the same form as the input.
+        """
+        self._search_index_data = sg_data_list
+        return sg_data_list
+
     def _populate_default_thumbnail(self, item):
         """
         Whenever an item is constructed, this methods is called. It allows subclasses to intercept
@@ -13,8 +13,14 @@ from sgtk.platform.qt import QtCore, QtGui
 
 import sgtk
 import datetime
+import sqlite3
+import time
 from . import utils, constants
 from . import model_item_data
+from .publish_result_cache import PublishResultCache
+from .publish_index import get_publish_index
+from .search_index import SearchIndex
+from .thumbnail_cache import get_thumbnail_cache
 
 # import the shotgun_model module from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework(
@@ -37,6 +43,14 @@ class SgLatestPublishModel(ShotgunModel):
     PUBLISH_TYPE_NAME_ROLE = QtCore.Qt.UserRole + 104
     SEARCHABLE_NAME = QtCore.Qt.UserRole + 105
 
+    # emitted while publishes are retrieved in batches in sub items mode,
+    # with the number of batches loaded and the total number of batches.
+    sub_items_progress = QtCore.Signal(int, int)
+
+    # emitted with a list of publish ids when their detail fields
+    # have been retrieved, see fetch_publish_details().
+    publish_details_loaded = QtCore.Signal(object)
+
     def __init__(self, parent, publish_type_model, bg_task_manager):
         """
         Model which represents the latest publishes for an entity
@@ -45,9 +59,93 @@ class SgLatestPublishModel(ShotgunModel):
         self._folder_icon = QtGui.QIcon(QtGui.QPixmap(":/res/folder_512x400.png"))
         self._loading_icon = QtGui.QIcon(QtGui.QPixmap(":/res/loading_512x400.png"))
         self._associated_items = {}
+        self._publish_data = []
 
         app = sgtk.platform.current_bundle()
 
+        # all the publishes matching the query, as retrieved, keyed by id. On
+        # refresh, only the publishes created or updated since the latest
+        # updated_at value of the listing are listed, along with the ids of
+        # all the publishes to drop the ones which have been removed since.
+        #
+        # When only the latest publishes are fetched in full, the model doesn't
+        # run its query. The listing, with the fields needed to work out the
+        # latest version of each publish only, is retrieved in the background
+        # instead. The complete records are then retrieved by id and kept here,
+        # keyed by id, so that the model can be built once they have arrived
+        # without listing the publishes again. Only the records which are new
+        # or have been updated since they were retrieved are fetched again.
+        self._latest_publishes_only = app.get_setting(
+            "fetch_latest_publishes_only", False
+        )
+        self._publish_listing = None
+        self._publish_listing_watermark = None
+        self._publish_listing_task = None
+        self._latest_publish_records = {}
+        self._latest_publish_records_task = None
+        self._requested_publish_ids = []
+        self._unavailable_publish_ids = set()
+
+        # optional local index of publishes shared across sessions. Records
+        # which are up to date in the index don't need to be retrieved.
+        self._publish_index = get_publish_index(app)
+
+        # optional disk cache of the composited thumbnails. Cached thumbnails
+        # are looked up in the background, keyed by task id.
+        self._thumbnail_cache = get_thumbnail_cache(app)
+        self._thumbnail_tasks = {}
+
+        # state of the batched retrieval of publishes used in sub items mode
+        # when the selection can't be expressed as a publish filter.
+        self._chunked_query = None
+        self._chunk_task_group = None
+        self._chunk_load_count = 0
+        self._entity_listing_task = None
+        self._num_chunks = 0
+        self._num_chunks_loaded = 0
+        # latest publishes of the batches loaded so far and their items, keyed
+        # by name, type id and task id, keys grouped by name and type id, and
+        # number of publishes of each name and type id and of each type id.
+        self._chunk_latest = {}
+        self._chunk_items = {}
+        self._chunk_keys = defaultdict(set)
+        self._chunk_name_type_counts = defaultdict(int)
+        self._chunk_type_counts = defaultdict(int)
+
+        # result sets of recently loaded queries. When a query is loaded again
+        # while its result set is still fresh, the model is built from memory
+        # and no query is run. The query is kept in _result_cache_query so
+        # that a refresh can run it.
+        self._result_cache = PublishResultCache(
+            constants.PUBLISH_RESULT_CACHE_MAX_SIZE,
+            constants.PUBLISH_RESULT_CACHE_MAX_AGE,
+        )
+        self._result_cache_key = None
+        self._result_cache_query = None
+
+        # filters, folder items and fields of the query loaded by the model
+        self._publish_query = None
+
+        # detail fields retrieved for publishes, keyed by publish id
+        self._publish_details = {}
+        self._publish_details_tasks = set()
+
+        # tooltips formatted so far, keyed by publish id
+        self._tooltips = {}
+
+        # all the versions of each publish returned by the model query, keyed
+        # by publish stream, for the history of a publish to be displayed
+        # without running a query. See get_publish_versions(). Versions are
+        # kept as tuples of the values of _publish_version_fields to save memory.
+        self._publish_versions = {}
+        self._publish_version_fields = ()
+        self._publish_versions_time = None
+        self._complete_publish_streams = False
+
+        # index of the searchable names of the items, used by the proxy model
+        # to filter items without comparing the search text with each of them.
+        self._search_index = SearchIndex()
+
         # init base class
         ShotgunModel.__init__(
             self,
@@ -58,6 +156,10 @@ class SgLatestPublishModel(ShotgunModel):
             bg_task_manager=bg_task_manager,
         )
 
+        self._bg_task_manager = bg_task_manager
+        self._bg_task_manager.task_completed.connect(self._on_task_completed)
+        self._bg_task_manager.task_failed.connect(self._on_task_failed)
+
     ############################################################################################
     # public interface
 
@@ -83,8 +185,7 @@ class SgLatestPublishModel(ShotgunModel):
                                'below' the selected item in Shotgun and hides any folders items.
         :param additional_sg_filters: List of shotgun filters to add to the shotgun query when retrieving publishes.
         """
-
-        app = sgtk.platform.current_bundle()
+        chunked_query = None
 
         if item is None:
             # nothing selected in the treeview
@@ -110,25 +211,28 @@ class SgLatestPublishModel(ShotgunModel):
                 partial_filters = model.get_filters(item)
                 entity_type = model.get_entity_type()
 
-                # now get a list of matches from the above query from
-                # shotgun - note that this is a synchronous call so
-                # it may 'pause' execution briefly for the user
-                data = app.shotgun.find(entity_type, partial_filters)
-
-                # now create the final query for the model - this will be
-                # a big in statement listing all the ids returned from
-                # the previous query, asking the model to only show the
-                # items matching the previous query.
-                #
                 # note that for tasks, we link via the task field
                 # rather than the std entity link field
-                #
                 if entity_type == "Task":
-                    sg_filters = [["task", "in", data]]
+                    link_field = "task"
                 elif entity_type == "Version":
-                    sg_filters = [["version", "in", data]]
+                    link_field = "version"
                 else:
-                    sg_filters = [["entity", "in", data]]
+                    link_field = "entity"
+
+                # push the query down to the publishes by filtering on fields of
+                # the linked entity, e.g. entity.Shot.sg_sequence is xxx, so that
+                # a single query returns all the publishes we are after.
+                sg_filters = utils.get_linked_filters(
+                    partial_filters, link_field, entity_type
+                )
+                if sg_filters is not None:
+                    sg_filters.append([link_field, "type_is", entity_type])
+                else:
+                    # the filters can't be expressed through the publish link.
+                    # In this case, the matching entities are retrieved in the
+                    # background and their publishes fetched in batches.
+                    chunked_query = (entity_type, partial_filters, link_field)
 
                 # lastly, when we are in this special mode, the main view
                 # is no longer functioning as a browsable hierarchy
@@ -141,85 +245,295 @@ class SgLatestPublishModel(ShotgunModel):
                 # for leaf nodes and for tree nodes which are connected to an entity,
                 # show matches.
 
-                # Extract the Shotgun data and field value from the node item.
-                (sg_data, field_value) = model_item_data.get_item_data(item)
+                sg_filters = self._get_item_filters(item)
 
-                if sg_data:
-                    # leaf node!
-                    # show the items associated. Handle tasks
-                    # via the task field instead of the entity field
-                    if sg_data.get("type") == "Task":
-                        sg_filters = [
-                            [
-                                "task",
-                                "is",
-                                {"type": sg_data["type"], "id": sg_data["id"]},
-                            ]
-                        ]
-                    elif sg_data.get("type") == "Version":
-                        sg_filters = [
-                            ["version", "is", {"type": "Version", "id": sg_data["id"]}]
-                        ]
-                    else:
-                        sg_filters = [
-                            [
-                                "entity",
-                                "is",
-                                {"type": sg_data["type"], "id": sg_data["id"]},
-                            ]
-                        ]
+        pub_filters = self._get_publish_filters(additional_sg_filters)
 
-                else:
-                    # intermediate node.
-
-                    if (
-                        isinstance(field_value, dict)
-                        and "name" in field_value
-                        and "type" in field_value
-                    ):
-                        # this is an intermediate node like a sequence or an asset which
-                        # can have publishes of its own associated
-                        sg_filters = [["entity", "is", field_value]]
-
-                    else:
-                        # this is an intermediate node like status or asset type which does not
-                        # have any publishes of its own, because the value (e.g. the status or the asset type)
-                        # is nothing that you could link up a publish to.
-                        sg_filters = None
+        # the versions of a publish returned by the query are its complete
+        # history only if the query doesn't filter on anything else than what
+        # the publishes are linked to.
+        self._complete_publish_streams = not additional_sg_filters and not any(
+            isinstance(sg_filter, list)
+            and sg_filter
+            and sg_filter[0].split(".")[0] == "version"
+            for sg_filter in sg_filters or []
+        )
+
+        if chunked_query:
+            self._do_load_chunked_data(*chunked_query, publish_filters=pub_filters)
+            return
 
         # now if sg_filters is not None (None indicates that no data should be fetched by the model),
         # add our external filter settings
         if sg_filters:
-            # first apply any global sg filters, as specified in the config that we should append
-            # to the main entity filters before getting publishes from shotgun. This may be stuff
-            # like 'only status approved'
-            pub_filters = app.get_setting("publish_filters", [])
             sg_filters.extend(pub_filters)
 
-            # now, on top of that, apply any session specific filters
-            # these typically come from the treeview and are pulled from a per-tab config setting,
-            # allowing users to configure tabs with different publish filters, so that one
-            # tab can contain approved shot publishes, another can contain only items from
-            # your current department, etc.
-            sg_filters.extend(additional_sg_filters)
-
         # now that we have establishes the sg filters and which
         # folders to load, set up the actual model
         self._do_load_data(sg_filters, child_folders)
 
+    def get_publish_filters(self, item, additional_sg_filters):
+        """
+        Returns the shotgun filters load_data() would use to retrieve the
+        publishes of a tree view item in the standard mode.
+
+        :param item: Item in the tree view.
+        :param additional_sg_filters: List of shotgun filters to add to the query.
+        :returns: List of shotgun filters or None if the item can't have any publishes.
+        """
+        sg_filters = self._get_item_filters(item)
+        if sg_filters:
+            sg_filters.extend(self._get_publish_filters(additional_sg_filters))
+        return sg_filters
+
+    def get_publish_versions(self, sg_data):
+        """
+        Returns all the versions of a publish retrieved by the last query of
+        the model, so that its history can be displayed without running a query.
+
+        Versions are only known if the query returned all of them and was run
+        less than PUBLISH_RESULT_CACHE_MAX_AGE seconds ago. As the query only
+        retrieves the fields of the main view, the detail fields of the
+        versions which haven't been retrieved yet are requested in the
+        background, publish_details_loaded is emitted once they have arrived,
+        see get_publish_details().
+
+        :param sg_data: Shotgun data dictionary for a publish.
+        :returns: List of shotgun dictionaries holding the standard publish
+                  fields, with date time values as unix timestamps, or None if
+                  the versions of the publish are unknown.
+        """
+        if (
+            self._publish_versions_time is None
+            or time.time() - self._publish_versions_time
+            > constants.PUBLISH_RESULT_CACHE_MAX_AGE
+        ):
+            return None
+
+        versions = self._publish_versions.get(
+            utils.get_publish_stream_key(sg_data, self._publish_type_field)
+        )
+        if not versions:
+            return None
+
+        sg_data_list = []
+        missing_ids = []
+        for version in versions:
+            version = utils.convert_timestamps(
+                dict(zip(self._publish_version_fields, version))
+            )
+            if not self.has_publish_details(version):
+                if version["id"] in self._publish_details:
+                    version.update(self._publish_details[version["id"]])
+                else:
+                    missing_ids.append(version["id"])
+            sg_data_list.append(version)
+
+        if missing_ids:
+            self._request_publish_details(missing_ids)
+        return sg_data_list
+
+    def get_publish_details(self, publish_id):
+        """
+        Returns the detail fields retrieved for a publish.
+
+        :param publish_id: Id of the publish.
+        :returns: Dictionary holding the fields listed in
+                  constants.PUBLISHED_FILES_DETAIL_FIELDS, or None if they
+                  haven't been retrieved.
+        """
+        return self._publish_details.get(publish_id)
+
+    def is_result_cached(self, sg_filters):
+        """
+        Checks if the publishes of a query are held in memory.
+
+        :param sg_filters: Shotgun filters of the query.
+        :returns: True if loading this query wouldn't run it.
+        """
+        return str(sg_filters) in self._result_cache
+
+    def find_publishes(self, sg, sg_filters):
+        """
+        Retrieves the publishes matching the given filters, the same way the
+        model would. This doesn't touch the model and can be called from a
+        background thread. The result should be passed to cache_publishes().
+
+        :param sg: Shotgun API handle to use for the queries.
+        :param sg_filters: Shotgun filters of the query.
+        :returns: list of shotgun dictionaries.
+        """
+        if self._latest_publishes_only:
+            return utils.find_latest_publishes(
+                sg,
+                self._publish_entity_type,
+                sg_filters,
+                self._publish_type_field,
+                self._publish_fields + ["code"],
+            )
+
+        return sg.find(
+            self._publish_entity_type,
+            sg_filters,
+            self._publish_fields + ["code"],
+            order=[{"field_name": "created_at", "direction": "asc"}],
+        )
+
+    def cache_publishes(self, sg_filters, sg_data_list):
+        """
+        Processes publishes retrieved with find_publishes() and keeps them in
+        memory, so that loading the query later on doesn't need to run it.
+
+        :param sg_filters: Shotgun filters of the query.
+        :param sg_data_list: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        sg_data_list = utils.filter_publishes(app, sg_data_list)
+        if not self._latest_publishes_only:
+            sg_data_list = utils.get_latest_publishes(
+                sg_data_list, self._publish_type_field
+            )
+        # result sets are held with unix timestamps, see _before_data_processing()
+        self._result_cache.set(
+            str(sg_filters),
+            [utils.convert_timestamps(sg_data) for sg_data in sg_data_list],
+        )
+
+    def fetch_publish_details(self, items):
+        """
+        Makes sure the given publish items hold the fields listed in
+        constants.PUBLISHED_FILES_DETAIL_FIELDS, which are not retrieved by
+        the model query. Details which have already been retrieved are merged
+        into the items straight away, the others are requested in a single
+        batch in the background and merged once they have arrived, at which
+        point publish_details_loaded is emitted.
+
+        :param items: List of model items.
+        """
+        missing_ids = self._merge_known_publish_details(items)
+        if missing_ids:
+            self._request_publish_details(missing_ids)
+
+    def ensure_publish_details(self, items):
+        """
+        Same as fetch_publish_details(), except that the missing details are
+        retrieved straight away, so that the items hold them when this
+        returns. This is meant for the publishes actions are requested for,
+        since the actions hook is passed the detail fields.
+
+        :param items: List of model items.
+        """
+        missing_ids = self._merge_known_publish_details(items)
+        if missing_ids:
+            self._on_publish_details_found(self._task_find_publish_details(missing_ids))
+
+    def has_publish_details(self, sg_data):
+        """
+        Checks if the given publish data holds the detail fields.
+
+        :param sg_data: Shotgun data dictionary for a publish.
+        :returns: True if all the detail fields are present.
+        """
+        return all(x in sg_data for x in constants.PUBLISHED_FILES_DETAIL_FIELDS)
+
     def async_refresh(self):
         """
         Refresh the current data set
         """
-        self._refresh_data()
+        self._publish_details = {}
+        if self._chunked_query:
+            self._do_load_chunked_data(*self._chunked_query)
+        elif self._publish_listing_watermark is not None:
+            self._refresh_publish_listing()
+        elif self._result_cache_query:
+            self._do_load_data(*self._result_cache_query, use_result_cache=False)
+        else:
+            self._refresh_data()
+
+    def hard_refresh(self):
+        """
+        Clears any caches on disk, then refreshes the data.
+        """
+        # all the publishes are listed again
+        self._stop_publish_listing_task()
+        self._publish_listing = None
+        self._publish_listing_watermark = None
+        self._latest_publish_records = {}
+        self._unavailable_publish_ids = set()
+        self._publish_details = {}
+        self._result_cache.clear()
+        super(SgLatestPublishModel, self).hard_refresh()
+        if self._chunked_query:
+            self._do_load_chunked_data(*self._chunked_query)
+        elif self._result_cache_query:
+            self._do_load_data(*self._result_cache_query, use_result_cache=False)
+
+    def get_search_matches(self, search_filter):
+        """
+        Returns the searchable names of the items matching a search filter.
+
+        :param search_filter: Search filter string. Matching is case insensitive.
+        :returns: Set of SEARCHABLE_NAME values. It must not be modified.
+        """
+        return self._search_index.search(search_filter)
+
+    def get_search_statistics(self):
+        """
+        Returns statistics about the last search, see get_search_matches().
+
+        :returns: Tuple of the number of searchable names and of the number
+                  of names the last search filter was compared with.
+        """
+        return len(self._search_index), self._search_index.num_compared
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        Returns the data stored under the given role for the item at the given index.
+
+        Publish tooltips are not stored in the model but formatted the first
+        time they are requested, see _set_tooltip().
+
+        :param index: QModelIndex of the item.
+        :param role: Qt role of the data.
+        :returns: The data for the role.
+        """
+        if role == QtCore.Qt.ToolTipRole and index.isValid():
+            item = self.itemFromIndex(index)
+            if not item.data(SgLatestPublishModel.IS_FOLDER_ROLE):
+                sg_data = item.get_sg_data()
+                if sg_data:
+                    return self._get_tooltip(sg_data)
+
+        return super(SgLatestPublishModel, self).data(index, role)
 
     def _set_tooltip(self, item, sg_item):
         """
         Sets a tooltip for this model item.
 
+        Formatting a tooltip for every publish when the model is populated is
+        wasteful since very few of them are ever displayed. Tooltips are
+        instead formatted on demand by data().
+
         :param item: ShotgunStandardItem associated with the publish.
         :param sg_item: Publish information from Shotgun.
         """
+        pass
+
+    ############################################################################################
+    # private methods
+
+    def _get_tooltip(self, sg_item):
+        """
+        Returns the tooltip of a publish, formatting it the first time it
+        is requested.
+
+        :param sg_item: Publish information from Shotgun.
+        :returns: Tooltip string.
+        """
+        tooltip = self._tooltips.get(sg_item.get("id"))
+        if tooltip is not None:
+            return tooltip
+
         tooltip = "<b>Name:</b> %s" % (sg_item.get("code") or "No name given.")
 
         # Version 012 by John Smith at 2014-02-23 10:34
@@ -252,12 +566,84 @@ class SgLatestPublishModel(ShotgunModel):
             sg_item.get("description") or "No description given."
         )
 
-        item.setToolTip(tooltip)
+        self._tooltips[sg_item.get("id")] = tooltip
+        return tooltip
 
-    ############################################################################################
-    # private methods
+    def _get_item_filters(self, item):
+        """
+        Returns the shotgun filters matching the publishes of a tree view item
+        in the standard mode, i.e. not in sub items mode.
+
+        :param item: Item in the tree view.
+        :returns: List of shotgun filters or None if the item can't have
+                  any publishes.
+        """
+        # Extract the Shotgun data and field value from the node item.
+        (sg_data, field_value) = model_item_data.get_item_data(item)
+
+        if sg_data:
+            # leaf node!
+            # show the items associated. Handle tasks
+            # via the task field instead of the entity field
+            if sg_data.get("type") == "Task":
+                return [
+                    [
+                        "task",
+                        "is",
+                        {"type": sg_data["type"], "id": sg_data["id"]},
+                    ]
+                ]
+            elif sg_data.get("type") == "Version":
+                return [["version", "is", {"type": "Version", "id": sg_data["id"]}]]
+            else:
+                return [
+                    [
+                        "entity",
+                        "is",
+                        {"type": sg_data["type"], "id": sg_data["id"]},
+                    ]
+                ]
 
-    def _do_load_data(self, sg_filters, treeview_folder_items):
+        else:
+            # intermediate node.
+
+            if (
+                isinstance(field_value, dict)
+                and "name" in field_value
+                and "type" in field_value
+            ):
+                # this is an intermediate node like a sequence or an asset which
+                # can have publishes of its own associated
+                return [["entity", "is", field_value]]
+
+            else:
+                # this is an intermediate node like status or asset type which does not
+                # have any publishes of its own, because the value (e.g. the status or the asset type)
+                # is nothing that you could link up a publish to.
+                return None
+
+    def _get_publish_filters(self, additional_sg_filters):
+        """
+        Returns the shotgun filters which apply to all the publishes loaded.
+
+        :param additional_sg_filters: List of session specific shotgun filters.
+        :returns: List of shotgun filters.
+        """
+        app = sgtk.platform.current_bundle()
+
+        # first apply any global sg filters, as specified in the config that we should append
+        # to the main entity filters before getting publishes from shotgun. This may be stuff
+        # like 'only status approved'
+        pub_filters = app.get_setting("publish_filters", [])
+
+        # now, on top of that, apply any session specific filters
+        # these typically come from the treeview and are pulled from a per-tab config setting,
+        # allowing users to configure tabs with different publish filters, so that one
+        # tab can contain approved shot publishes, another can contain only items from
+        # your current department, etc.
+        return pub_filters + additional_sg_filters
+
+    def _do_load_data(self, sg_filters, treeview_folder_items, use_result_cache=True):
         """
         Load and refresh data.
 
@@ -265,6 +651,8 @@ class SgLatestPublishModel(ShotgunModel):
         :param child_folders: List of items ('folders') from the tree view. These are to be
                               added to the model in addition to the publishes, so that you get a mix
                               of folders and files.
+        :param use_result_cache: If True and the result set of this query is held in memory,
+                                 build the model from it instead of running the query.
         """
         # first figure out which fields to get from shotgun
         app = sgtk.platform.current_bundle()
@@ -275,12 +663,63 @@ class SgLatestPublishModel(ShotgunModel):
         else:
             self._publish_type_field = "tank_type"
 
-        publish_fields = [self._publish_type_field] + constants.PUBLISHED_FILES_FIELDS
+        self._publish_entity_type = publish_entity_type
+        self._publish_fields = [
+            self._publish_type_field
+        ] + constants.PUBLISHED_FILES_GRID_FIELDS
+
+        if self._latest_publishes_only:
+            # only ask for the fields needed to figure out the latest publishes,
+            # the complete records are retrieved by id later on.
+            # See _get_latest_publish_records().
+            publish_fields = [
+                self._publish_type_field
+            ] + constants.LATEST_PUBLISH_KEY_FIELDS
+        else:
+            publish_fields = self._publish_fields
+
+        # forget about any publishes retrieved for the previous query. The
+        # records of the latest publishes are kept when the query is reloaded,
+        # only the ones updated since are retrieved again.
+        result_cache_key = str(sg_filters) if sg_filters else None
+        self._stop_latest_publish_records_task()
+        self._stop_publish_listing_task()
+        self._stop_chunked_load()
+        self._publish_listing = None
+        self._publish_listing_watermark = None
+        if result_cache_key != self._result_cache_key:
+            self._latest_publish_records = {}
+            self._unavailable_publish_ids = set()
+        self._tooltips = {}
+        self._search_index.clear()
+        self._publish_versions = {}
+        self._publish_versions_time = None
 
         # first add our folders to the model
         # make gc happy by keeping handle to all items
         self._treeview_folder_items = treeview_folder_items
 
+        # publishes retrieved for this query are kept in memory under this key
+        self._result_cache_key = result_cache_key
+        self._result_cache_query = None
+        self._publish_query = (sg_filters, treeview_folder_items, publish_fields)
+
+        if use_result_cache and self._result_cache_key in self._result_cache:
+            self._load_publish_items(self._result_cache.get(self._result_cache_key))
+            self.cache_loaded.emit()
+            return
+
+        if self._latest_publishes_only:
+            # the model query would only return the listing of the publishes,
+            # while the records of the latest ones arrive later on. The disk
+            # cache of the model is bypassed in this mode: the listing is
+            # retrieved in the background, and the records are kept across
+            # sessions by the publish index, if enabled.
+            self._load_publish_items([])
+            if sg_filters is not None:
+                self._refresh_publish_listing()
+            return
+
         # load cached data
         ShotgunModel._load_data(
             self,
@@ -291,21 +730,731 @@ class SgLatestPublishModel(ShotgunModel):
             order=[{"field_name": "created_at", "direction": "asc"}],
         )
 
-        # now calculate type aggregates
+        # now calculate type aggregates and keep track of the publishes
+        # loaded from the cache.
+        self._publish_data = []
         type_id_aggregates = defaultdict(int)
         for x in range(self.invisibleRootItem().rowCount()):
-            type_id = (
-                self.invisibleRootItem()
-                .child(x)
-                .data(SgLatestPublishModel.TYPE_ID_ROLE)
-            )
+            item = self.invisibleRootItem().child(x)
+            type_id = item.data(SgLatestPublishModel.TYPE_ID_ROLE)
             type_id_aggregates[type_id] += 1
+            if not item.data(SgLatestPublishModel.IS_FOLDER_ROLE):
+                self._publish_data.append(item.get_sg_data())
 
         self._publish_type_model.set_active_types(type_id_aggregates)
 
         # and now trigger a refresh
         self._refresh_data()
 
+    def _load_publish_items(self, sg_data_list):
+        """
+        Clears the model and fills it with publishes held in memory, without
+        running the query. The query is kept in _result_cache_query so that
+        a refresh can run it.
+
+        :param sg_data_list: list of shotgun dictionaries.
+        """
+        (sg_filters, treeview_folder_items, publish_fields) = self._publish_query
+
+        # clear the model and add the folders, without running any query
+        ShotgunModel._load_data(
+            self,
+            entity_type=self._publish_entity_type,
+            filters=None,
+            hierarchy=["code"],
+            fields=publish_fields,
+        )
+
+        type_id_aggregates = defaultdict(int)
+        for sg_data in sg_data_list:
+            self._create_publish_item(sg_data)
+            type_link = sg_data[self._publish_type_field]
+            type_id_aggregates[type_link["id"] if type_link else None] += 1
+        self._publish_type_model.set_active_types(type_id_aggregates)
+
+        self._publish_data = list(sg_data_list)
+        self._result_cache_query = (sg_filters, treeview_folder_items)
+
+    def _do_load_chunked_data(
+        self, entity_type, entity_filters, link_field, publish_filters
+    ):
+        """
+        Clears the model and retrieves the publishes linked to all the entities
+        matching the given filters in the background. The entities are split
+        into batches, whose publishes are fetched concurrently and added to the
+        model as they arrive.
+
+        :param entity_type: Type of the entities to retrieve publishes for.
+        :param entity_filters: Shotgun filters matching the entities.
+        :param link_field: Publish field linking to the entities.
+        :param publish_filters: Additional shotgun filters on the publishes.
+        """
+        # clear the model, it doesn't run any query itself in this mode.
+        self._do_load_data(None, [])
+
+        self._chunked_query = (entity_type, entity_filters, link_field, publish_filters)
+        self._chunk_load_count += 1
+        self._chunk_task_group = "sub_items_%d" % self._chunk_load_count
+        self._num_chunks = 0
+        self._num_chunks_loaded = 0
+
+        self.data_refreshing.emit()
+        self._entity_listing_task = self._bg_task_manager.add_task(
+            self._task_find_entities,
+            group=self._chunk_task_group,
+            task_kwargs={"entity_type": entity_type, "sg_filters": entity_filters},
+        )
+
+    def _task_find_entities(self, entity_type, sg_filters):
+        """
+        Background task retrieving the entities to load publishes for.
+
+        :param entity_type: Type of the entities to retrieve.
+        :param sg_filters: Shotgun filters matching the entities.
+        :returns: list of shotgun entity dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        return app.shotgun.find(entity_type, sg_filters)
+
+    def _task_find_chunk_publishes(self, sg_filters):
+        """
+        Background task retrieving a batch of publishes.
+
+        :param sg_filters: Shotgun filters matching the publishes.
+        :returns: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        return app.shotgun.find(
+            self._publish_entity_type,
+            sg_filters,
+            self._publish_fields + ["code"],
+            order=[{"field_name": "created_at", "direction": "asc"}],
+        )
+
+    def _on_entities_found(self, entities):
+        """
+        Called when the entities to load publishes for have been retrieved.
+        Requests their publishes in batches.
+
+        :param entities: List of shotgun entity dictionaries.
+        """
+        entity_type, _, link_field, publish_filters = self._chunked_query
+
+        chunk_size = constants.PUBLISH_ID_QUERY_CHUNK_SIZE
+        for start in range(0, len(entities), chunk_size):
+            sg_filters = [[link_field, "in", entities[start : start + chunk_size]]]
+            self._bg_task_manager.add_task(
+                self._task_find_chunk_publishes,
+                group=self._chunk_task_group,
+                task_kwargs={"sg_filters": sg_filters + publish_filters},
+            )
+            self._num_chunks += 1
+
+        if self._num_chunks == 0:
+            # nothing to load
+            self._on_chunk_loaded([])
+        else:
+            self.sub_items_progress.emit(0, self._num_chunks)
+
+    def _on_chunk_loaded(self, sg_data_list):
+        """
+        Called when a batch of publishes has been retrieved. The batch is
+        reduced to its latest publishes on its own, which are then merged
+        with the latest publishes of the batches loaded so far: they are
+        added to the model or replace the ones they supersede.
+
+        :param sg_data_list: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+
+        if self._num_chunks:
+            self._num_chunks_loaded += 1
+
+        # date time values are stored as unix timestamps, like the
+        # model does for the publishes it retrieves itself.
+        sg_data_list = [
+            utils.convert_timestamps(sg_data)
+            for sg_data in utils.filter_publishes(app, sg_data_list)
+        ]
+
+        # the task uniqueness flag depends on all the publishes with the
+        # same name and type, which may span several batches.
+        name_types = set()
+        for sg_data in sg_data_list:
+            type_link = sg_data[self._publish_type_field]
+            name_type = (sg_data["name"], type_link["id"] if type_link else None)
+            self._chunk_name_type_counts[name_type] += 1
+            name_types.add(name_type)
+
+        # batches can arrive in any order, keep the latest created publish
+        # of each name, type and task.
+        for sg_data in utils.get_latest_publishes(
+            sg_data_list, self._publish_type_field
+        ):
+            type_link = sg_data[self._publish_type_field]
+            task_link = sg_data["task"]
+            name_type = (sg_data["name"], type_link["id"] if type_link else None)
+            key = name_type + (task_link["id"] if task_link else None,)
+
+            current = self._chunk_latest.get(key)
+            if current is None:
+                self._chunk_keys[name_type].add(key)
+                self._chunk_type_counts[name_type[1]] += 1
+            elif (current.get("created_at") or 0, current["id"]) > (
+                sg_data.get("created_at") or 0,
+                sg_data["id"],
+            ):
+                continue
+            else:
+                item = self._chunk_items.pop(key)
+                self.invisibleRootItem().removeRow(item.row())
+
+            sg_data["task_uniqueness"] = self._chunk_name_type_counts[name_type] <= 1
+            self._chunk_latest[key] = sg_data
+            self._chunk_items[key] = self._create_publish_item(sg_data)
+
+        # update the flag of the publishes loaded earlier on
+        for name_type in name_types:
+            task_uniqueness = self._chunk_name_type_counts[name_type] <= 1
+            for key in self._chunk_keys[name_type]:
+                sg_data = self._chunk_latest[key]
+                if sg_data["task_uniqueness"] != task_uniqueness:
+                    sg_data = dict(sg_data, task_uniqueness=task_uniqueness)
+                    self._chunk_latest[key] = sg_data
+                    self._chunk_items[key].setData(
+                        sg_data, SgLatestPublishModel.SG_DATA_ROLE
+                    )
+
+        self._publish_type_model.set_active_types(dict(self._chunk_type_counts))
+
+        self.sub_items_progress.emit(self._num_chunks_loaded, self._num_chunks)
+        if self._num_chunks_loaded == self._num_chunks:
+            self._chunk_task_group = None
+            self.data_refreshed.emit(True)
+
+    def _create_publish_item(self, sg_data):
+        """
+        Creates a model item for a publish retrieved outside of the model query
+        and adds it to the model.
+
+        :param sg_data: Shotgun data dictionary for the publish.
+        :returns: The new item.
+        """
+        item = shotgun_model.ShotgunStandardItem(sg_data.get("code"))
+        item.setData(sg_data, SgLatestPublishModel.SG_DATA_ROLE)
+        item.setData(
+            {"name": "code", "value": sg_data.get("code")},
+            SgLatestPublishModel.SG_ASSOCIATED_FIELD_ROLE,
+        )
+        self._populate_default_thumbnail(item)
+        self._populate_item(item, sg_data)
+        self._set_tooltip(item, sg_data)
+
+        if sg_data.get("image"):
+            self._request_thumbnail_download(
+                item, "image", sg_data["image"], sg_data["type"], sg_data["id"]
+            )
+
+        self.appendRow(item)
+        return item
+
+    def _merge_known_publish_details(self, items):
+        """
+        Merges the detail fields which have already been retrieved into the
+        given publish items.
+
+        :param items: List of model items.
+        :returns: List of the ids of the publishes whose details haven't
+                  been retrieved yet.
+        """
+        missing_ids = []
+        for item in items:
+            if item.data(SgLatestPublishModel.IS_FOLDER_ROLE):
+                continue
+            sg_data = item.get_sg_data()
+            if not sg_data or self.has_publish_details(sg_data):
+                continue
+            if sg_data["id"] in self._publish_details:
+                self._merge_publish_details(item, sg_data)
+            else:
+                missing_ids.append(sg_data["id"])
+        return missing_ids
+
+    def _request_publish_details(self, publish_ids):
+        """
+        Requests the detail fields of publishes in the background, see
+        _on_publish_details_found().
+
+        :param publish_ids: List of publish ids.
+        """
+        self._publish_details_tasks.add(
+            self._bg_task_manager.add_task(
+                self._task_find_publish_details,
+                task_kwargs={"publish_ids": publish_ids},
+            )
+        )
+
+    def _merge_publish_details(self, item, sg_data):
+        """
+        Merges the retrieved detail fields into the data of a publish item.
+
+        :param item: Model item for the publish.
+        :param sg_data: Shotgun data dictionary of the item.
+        """
+        sg_data = dict(sg_data)
+        sg_data.update(self._publish_details[sg_data["id"]])
+        # the tooltip shows some of the detail fields
+        self._tooltips.pop(sg_data["id"], None)
+        item.setData(sg_data, SgLatestPublishModel.SG_DATA_ROLE)
+
+    def _task_find_publish_details(self, publish_ids):
+        """
+        Background task retrieving the detail fields of the given publishes.
+
+        :param publish_ids: List of publish ids.
+        :returns: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        return utils.find_publishes_by_ids(
+            app.shotgun,
+            self._publish_entity_type,
+            publish_ids,
+            constants.PUBLISHED_FILES_DETAIL_FIELDS,
+        )
+
+    def _on_publish_details_found(self, sg_data_list):
+        """
+        Called when the detail fields of publishes have been retrieved.
+        Merges them into the matching items.
+
+        :param sg_data_list: list of shotgun dictionaries.
+        """
+        for sg_data in sg_data_list:
+            self._publish_details[sg_data["id"]] = dict(
+                (x, sg_data.get(x)) for x in constants.PUBLISHED_FILES_DETAIL_FIELDS
+            )
+
+        for x in range(self.invisibleRootItem().rowCount()):
+            item = self.invisibleRootItem().child(x)
+            if item.data(SgLatestPublishModel.IS_FOLDER_ROLE):
+                continue
+            item_sg_data = item.get_sg_data()
+            if (
+                item_sg_data
+                and item_sg_data["id"] in self._publish_details
+                and not self.has_publish_details(item_sg_data)
+            ):
+                self._merge_publish_details(item, item_sg_data)
+
+        self.publish_details_loaded.emit([x["id"] for x in sg_data_list])
+
+    def _index_publish_versions(self, sg_data_list):
+        """
+        Keeps the versions of each publish returned by the model query,
+        see get_publish_versions().
+
+        :param sg_data_list: List of shotgun dictionaries for all the versions
+                             of the publishes, as returned by the query.
+        """
+        self._publish_version_fields = tuple(sg_data_list[0]) if sg_data_list else ()
+        publish_versions = defaultdict(list)
+        for sg_data in sg_data_list:
+            publish_versions[
+                utils.get_publish_stream_key(sg_data, self._publish_type_field)
+            ].append(tuple(sg_data.get(x) for x in self._publish_version_fields))
+        self._publish_versions = dict(publish_versions)
+        self._publish_versions_time = time.time()
+
+    def _stop_chunked_load(self):
+        """
+        Stops any batched retrieval of publishes in progress.
+        """
+        if self._chunk_task_group is not None:
+            self._bg_task_manager.stop_task_group(self._chunk_task_group)
+            self._chunk_task_group = None
+        self._chunked_query = None
+        self._entity_listing_task = None
+        self._chunk_latest = {}
+        self._chunk_items = {}
+        self._chunk_keys = defaultdict(set)
+        self._chunk_name_type_counts = defaultdict(int)
+        self._chunk_type_counts = defaultdict(int)
+
+    def _get_latest_publish_records(self, sg_data_list):
+        """
+        Given the lightweight listing of all the publishes matching the
+        query, returns the complete records of the latest publishes.
+
+        If some of these records haven't been retrieved yet, or have been
+        updated since they were, a background request is issued for them and
+        None is returned. The model is refreshed again once they have arrived.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the
+                             find() call.
+        :returns: list of shotgun dictionaries or None.
+        """
+        latest_publishes = utils.get_latest_publishes(
+            sg_data_list, self._publish_type_field
+        )
+
+        latest_publishes = [
+            sg_data
+            for sg_data in latest_publishes
+            if sg_data["id"] not in self._unavailable_publish_ids
+        ]
+
+        if self._publish_index:
+            # pick up the records stored by previous sessions
+            unknown_ids = [
+                sg_data["id"]
+                for sg_data in latest_publishes
+                if sg_data["id"] not in self._latest_publish_records
+            ]
+            self._latest_publish_records.update(
+                self._publish_index.get_publishes(unknown_ids, self._publish_fields)
+            )
+
+        missing_ids = []
+        for sg_data in latest_publishes:
+            record = self._latest_publish_records.get(sg_data["id"])
+            if record is None or (
+                utils.get_timestamp(record.get("updated_at")) or 0
+            ) < (utils.get_timestamp(sg_data.get("updated_at")) or 0):
+                missing_ids.append(sg_data["id"])
+        if missing_ids:
+            self._stop_latest_publish_records_task()
+            self._requested_publish_ids = missing_ids
+            self._latest_publish_records_task = self._bg_task_manager.add_task(
+                self._task_find_latest_publish_records,
+                task_kwargs={"publish_ids": missing_ids},
+            )
+            return None
+
+        records = []
+        for sg_data in latest_publishes:
+            record = self._latest_publish_records[sg_data["id"]]
+            # the uniqueness flag was computed against all the versions
+            record["task_uniqueness"] = sg_data["task_uniqueness"]
+            records.append(record)
+
+        # only keep the records of the latest publishes around, the ones which
+        # have been superseded or removed are not needed anymore.
+        self._latest_publish_records = dict(
+            (record["id"], record) for record in records
+        )
+        return records
+
+    def _task_find_latest_publish_records(self, publish_ids):
+        """
+        Background task retrieving the complete records of the given publishes.
+
+        :param publish_ids: List of publish ids to retrieve.
+        :returns: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        sg_data_list = utils.find_publishes_by_ids(
+            app.shotgun,
+            self._publish_entity_type,
+            publish_ids,
+            self._publish_fields + ["code"],
+        )
+        if self._publish_index:
+            try:
+                self._publish_index.update(sg_data_list, self._publish_type_field)
+            except sqlite3.Error as e:
+                # the index is only an optimization, the records are still
+                # displayed.
+                app.log_warning("Could not update the publish index: %s" % e)
+        return sg_data_list
+
+    def _stop_latest_publish_records_task(self):
+        """
+        Stops any pending retrieval of latest publish records.
+        """
+        if self._latest_publish_records_task is not None:
+            self._bg_task_manager.stop_task(self._latest_publish_records_task)
+            self._latest_publish_records_task = None
+
+    def _set_publish_listing(self, sg_data_list):
+        """
+        Keeps the listing of all the publishes matching the query, along
+        with the latest updated_at value it holds, which later
+        refreshes list the changes from.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the
+                             find() call.
+        """
+        self._publish_listing = dict((x["id"], x) for x in sg_data_list)
+        self._publish_listing_watermark = None
+        self._update_publish_listing_watermark(sg_data_list)
+
+    def _update_publish_listing_watermark(self, sg_data_list):
+        """
+        Moves the watermark of the listing to the latest updated_at value of
+        the given publishes, if later.
+
+        :param sg_data_list: list of shotgun dictionaries.
+        """
+        for sg_data in sg_data_list:
+            updated_at = sg_data.get("updated_at")
+            # the watermark is used in a query filter and must be
+            # a date time value as returned by Shotgun.
+            if isinstance(updated_at, datetime.datetime) and (
+                self._publish_listing_watermark is None
+                or updated_at > self._publish_listing_watermark
+            ):
+                self._publish_listing_watermark = updated_at
+
+    def _refresh_publish_listing(self):
+        """
+        Lists the publishes created or updated since the watermark of the
+        listing in the background, rather than listing all of them again.
+        All the publishes are listed if there is no listing yet.
+        """
+        (sg_filters, _, publish_fields) = self._publish_query
+        if not self._latest_publishes_only:
+            # the model query also retrieves the field of its hierarchy
+            publish_fields = publish_fields + ["code"]
+
+        self._stop_publish_listing_task()
+        self.data_refreshing.emit()
+        self._publish_listing_task = self._bg_task_manager.add_task(
+            self._task_find_publish_listing,
+            task_kwargs={
+                "sg_filters": sg_filters,
+                "fields": publish_fields,
+                "watermark": self._publish_listing_watermark,
+            },
+        )
+
+    def _task_find_publish_listing(self, sg_filters, fields, watermark):
+        """
+        Background task listing the publishes matching the query which have
+        been created or updated since the given time, along with the ids of
+        all the publishes matching the query.
+
+        :param sg_filters: Shotgun filters of the query.
+        :param fields: Fields to retrieve for each publish.
+        :param watermark: Date time to list the changes from, or None to list
+                          all the publishes.
+        :returns: Tuple of a list of shotgun dictionaries and of the set of
+                  the ids of all the publishes matching the query, or None
+                  if all the publishes were listed.
+        """
+        app = sgtk.platform.current_bundle()
+        order = [{"field_name": "created_at", "direction": "asc"}]
+        if watermark is None:
+            return (
+                app.shotgun.find(self._publish_entity_type, sg_filters, fields, order),
+                None,
+            )
+
+        # updated_at values only have a one second resolution, publishes
+        # updated within the same second as the watermark are listed again.
+        since = watermark - datetime.timedelta(seconds=1)
+        sg_data_list = app.shotgun.find(
+            self._publish_entity_type,
+            sg_filters + [["updated_at", "greater_than", since]],
+            fields,
+            order,
+        )
+        # publishes deleted or retired since, or which don't match the query
+        # anymore, are missing from the ids.
+        publish_ids = set(
+            sg_data["id"]
+            for sg_data in app.shotgun.find(
+                self._publish_entity_type, sg_filters, ["id"]
+            )
+        )
+        return (sg_data_list, publish_ids)
+
+    def _on_publish_listing_found(self, result):
+        """
+        Called when the publishes created or updated since the watermark
+        have been listed. Merges them into the listing, drops the publishes
+        which don't match the query anymore and builds the model again if
+        anything changed.
+
+        :param result: Result of _task_find_publish_listing().
+        """
+        (sg_data_list, publish_ids) = result
+        if self._publish_listing is None or publish_ids is None:
+            # all the publishes have been listed
+            self._set_publish_listing(sg_data_list)
+            self._load_publish_listing()
+            return
+
+        changed = False
+        for publish_id in list(self._publish_listing):
+            if publish_id not in publish_ids:
+                del self._publish_listing[publish_id]
+                changed = True
+
+        for sg_data in sg_data_list:
+            if sg_data["id"] not in publish_ids:
+                # removed between both queries
+                continue
+            known = self._publish_listing.get(sg_data["id"])
+            if known is None or utils.get_timestamp(
+                known.get("updated_at")
+            ) != utils.get_timestamp(sg_data.get("updated_at")):
+                changed = True
+            # updated publishes keep their position, new ones are the latest
+            # created and go last, so that the listing stays in creation order.
+            self._publish_listing[sg_data["id"]] = sg_data
+        self._update_publish_listing_watermark(sg_data_list)
+
+        if not changed:
+            self.data_refreshed.emit(False)
+            return
+
+        self._load_publish_listing()
+
+    def _load_publish_listing(self):
+        """
+        Builds the model from the listing of the publishes, without running
+        the query again.
+        """
+        if self._latest_publishes_only:
+            # retrieves the records of the publishes which have changed, if
+            # any, and builds the model from the listing.
+            self._load_latest_publish_records()
+            return
+
+        app = sgtk.platform.current_bundle()
+        sg_data_list = utils.filter_publishes(app, list(self._publish_listing.values()))
+        if self._complete_publish_streams:
+            self._index_publish_versions(sg_data_list)
+
+        (latest_publishes, _) = utils.reduce_publishes(
+            sg_data_list, self._publish_type_field
+        )
+        # date time values are stored as unix timestamps, like the
+        # model does for the publishes it retrieves itself.
+        sg_data_list = [utils.convert_timestamps(x) for x in latest_publishes]
+        self._load_publish_items(sg_data_list)
+        if self._result_cache_key:
+            self._result_cache.set(self._result_cache_key, sg_data_list)
+        self.data_refreshed.emit(True)
+
+    def _stop_publish_listing_task(self):
+        """
+        Stops any pending listing of updated publishes.
+        """
+        if self._publish_listing_task is not None:
+            self._bg_task_manager.stop_task(self._publish_listing_task)
+            self._publish_listing_task = None
+
+    def _on_task_completed(self, uid, group, result):
+        """
+        Slot triggered when a background task completes.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param result: Result returned by the task.
+        """
+        if group is not None and group == self._chunk_task_group:
+            if uid == self._entity_listing_task:
+                self._on_entities_found(result)
+            else:
+                self._on_chunk_loaded(result)
+            return
+
+        if uid in self._publish_details_tasks:
+            self._publish_details_tasks.discard(uid)
+            self._on_publish_details_found(result)
+            return
+
+        if uid in self._thumbnail_tasks:
+            self._on_thumbnail_loaded(self._thumbnail_tasks.pop(uid), *result)
+            return
+
+        if uid == self._publish_listing_task:
+            self._publish_listing_task = None
+            self._on_publish_listing_found(result)
+            return
+
+        if uid != self._latest_publish_records_task:
+            return
+        self._latest_publish_records_task = None
+
+        # merge the new and updated records
+        for sg_data in result:
+            self._latest_publish_records[sg_data["id"]] = sg_data
+
+        # publishes which couldn't be retrieved, e.g. because they have been
+        # deleted in the meantime, are not requested again.
+        self._unavailable_publish_ids.update(
+            set(self._requested_publish_ids) - set(sg_data["id"] for sg_data in result)
+        )
+
+        # now that the records are available, build the model from the
+        # listing returned by the query.
+        self._load_latest_publish_records()
+
+    def _load_latest_publish_records(self):
+        """
+        Builds the model from the complete records of the latest publishes,
+        once they have been retrieved, without running the query again.
+        """
+        if self._publish_listing is None:
+            # the query has been reloaded in the meantime
+            return
+
+        records = self._get_latest_publish_records(list(self._publish_listing.values()))
+        if records is None:
+            # some records are still being retrieved
+            return
+
+        # date time values are stored as unix timestamps, like the
+        # model does for the publishes it retrieves itself.
+        app = sgtk.platform.current_bundle()
+        sg_data_list = [
+            utils.convert_timestamps(sg_data)
+            for sg_data in utils.filter_publishes(app, records)
+        ]
+        self._load_publish_items(sg_data_list)
+        if self._result_cache_key:
+            self._result_cache.set(self._result_cache_key, sg_data_list)
+        self.data_refreshed.emit(True)
+
+    def _on_task_failed(self, uid, group, msg, stack_trace):
+        """
+        Slot triggered when a background task fails.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param msg: Error message.
+        :param stack_trace: Stack trace of the error.
+        """
+        if uid in self._thumbnail_tasks:
+            # composite the thumbnail as if it wasn't cached
+            self._on_thumbnail_loaded(self._thumbnail_tasks.pop(uid), None, None)
+            return
+
+        if uid in self._publish_details_tasks:
+            # the details panel simply shows what is available
+            self._publish_details_tasks.discard(uid)
+            app = sgtk.platform.current_bundle()
+            app.log_warning("Could not retrieve publish details: %s" % msg)
+            return
+
+        if group is not None and group == self._chunk_task_group:
+            # give up on the whole batched retrieval
+            self._bg_task_manager.stop_task_group(group)
+            self._chunk_task_group = None
+        elif uid == self._latest_publish_records_task:
+            self._latest_publish_records_task = None
+        elif uid == self._publish_listing_task:
+            self._publish_listing_task = None
+        else:
+            return
+
+        app = sgtk.platform.current_bundle()
+        app.log_warning("Could not retrieve the latest publishes: %s" % msg)
+        app.log_debug(stack_trace)
+        self.data_refresh_fail.emit(msg)
+
     ############################################################################################
     # subclassed methods
 
@@ -337,6 +1486,7 @@ class SgLatestPublishModel(ShotgunModel):
 
             # make the item searchable by name
             item.setData(tree_view_item.text(), SgLatestPublishModel.SEARCHABLE_NAME)
+            self._search_index.add(tree_view_item.text())
 
             # all of the items created in this class get special role data assigned.
             item.setData(True, SgLatestPublishModel.IS_FOLDER_ROLE)
@@ -416,6 +1566,7 @@ class SgLatestPublishModel(ShotgunModel):
             # exclude v112:s
             search_str += " v%03d" % sg_data["version_number"]
         item.setData(search_str, SgLatestPublishModel.SEARCHABLE_NAME)
+        self._search_index.add(search_str)
 
     def _populate_default_thumbnail(self, item):
         """
@@ -458,15 +1609,85 @@ class SgLatestPublishModel(ShotgunModel):
             # ignore and not display.
             return
 
-        # pass the thumbnail through out special image compositing methods
-        # before associating it with the model
-        is_folder = item.data(SgLatestPublishModel.IS_FOLDER_ROLE)
+        is_folder = bool(item.data(SgLatestPublishModel.IS_FOLDER_ROLE))
+        if self._thumbnail_cache and path:
+            # look for the thumbnail composited in a previous session in the
+            # background, it is only composited again if it isn't found.
+            uid = self._bg_task_manager.add_task(
+                self._task_load_thumbnail,
+                task_kwargs={"path": path, "is_folder": is_folder},
+            )
+            self._thumbnail_tasks[uid] = (
+                QtCore.QPersistentModelIndex(item.index()),
+                image,
+                is_folder,
+            )
+            return
+
+        item.setIcon(QtGui.QIcon(self._create_thumbnail(image, is_folder)))
+
+    def _create_thumbnail(self, image, is_folder):
+        """
+        Passes a thumbnail through our special image compositing methods
+        before associating it with the model.
+
+        :param image: QImage of the thumbnail.
+        :param is_folder: True to composite the thumbnail for a folder item.
+        :returns: QPixmap.
+        """
         if is_folder:
             # composite the thumbnail nicely on top of the folder icon
-            thumb = utils.create_overlayed_folder_thumbnail(image)
+            return utils.create_overlayed_folder_thumbnail(image)
+        return utils.create_overlayed_publish_thumbnail(image)
+
+    def _task_load_thumbnail(self, path, is_folder):
+        """
+        Background task loading a composited thumbnail from the disk cache.
+
+        :param path: Path to the source thumbnail.
+        :param is_folder: True if the thumbnail is composited for a folder item.
+        :returns: Tuple of the key of the composited thumbnail, or None if the
+                  source thumbnail can't be read, and of the composited thumbnail
+                  QImage, or None if it isn't cached.
+        """
+        (width, height) = constants.PUBLISH_THUMBNAIL_SIZE
+        key = self._thumbnail_cache.get_key(
+            path, "folder" if is_folder else "publish", width, height
+        )
+        if key is None:
+            return (None, None)
+        return (key, self._thumbnail_cache.load(key))
+
+    def _on_thumbnail_loaded(self, task_data, key, thumb_image):
+        """
+        Called when a composited thumbnail has been looked up in the disk
+        cache. Thumbnails which aren't cached are composited and stored in the
+        background.
+
+        :param task_data: Tuple of the persistent index of the item, of the
+                          source thumbnail QImage and of the folder flag.
+        :param key: Key of the composited thumbnail, or None.
+        :param thumb_image: Composited thumbnail QImage, or None.
+        """
+        (index, image, is_folder) = task_data
+        if not index.isValid():
+            # the item was removed in the meantime
+            return
+
+        if thumb_image is None:
+            thumb = self._create_thumbnail(image, is_folder)
+            if key is not None:
+                self._bg_task_manager.add_task(
+                    self._thumbnail_cache.store,
+                    task_kwargs={"key": key, "image": thumb.toImage()},
+                )
         else:
-            thumb = utils.create_overlayed_publish_thumbnail(image)
-        item.setIcon(QtGui.QIcon(thumb))
+            thumb = QtGui.QPixmap.fromImage(thumb_image)
+
+        # publishes and folders are all top level items
+        item = self.item(index.row())
+        if item is not None:
+            item.setIcon(QtGui.QIcon(thumb))
 
     def _before_data_processing(self, sg_data_list):
         """
@@ -480,104 +1701,48 @@ class SgLatestPublishModel(ShotgunModel):
         """
         app = sgtk.platform.current_bundle()
 
+        # the publishes may have been updated, their tooltips
+        # need to be formatted again.
+        self._tooltips = {}
+
+        # keep the publishes around, so that refreshes only need to list the
+        # changes, see async_refresh().
+        self._set_publish_listing(sg_data_list)
+
         # First, let the filter_publishes hook have a chance to filter the list
         # of publishes:
         sg_data_list = utils.filter_publishes(app, sg_data_list)
 
-        # filter the shotgun data so that we only return the latest publish for each file.
-        # also perform aggregate computations and push those summaries into the associated
-        # publish type model.
+        # keep all the versions around for the publish history
+        if self._complete_publish_streams:
+            self._index_publish_versions(sg_data_list)
 
-        if len(sg_data_list) == 0 and len(self._treeview_folder_items) == 0:
+        # then filter the shotgun data so that we only return the latest
+        # publish for each file, counting them by type along the way.
+        (new_sg_data, type_id_aggregates) = utils.reduce_publishes(
+            sg_data_list, self._publish_type_field
+        )
+
+        # also perform aggregate computations and push those summaries into the
+        # associated publish type model.
+        if len(new_sg_data) == 0 and len(self._treeview_folder_items) == 0:
             # tell publish type setup that there is nothing to display
             self._publish_type_model.set_active_types({})
+            self._publish_data = []
+            if self._result_cache_key:
+                self._result_cache.set(self._result_cache_key, [])
             return []
 
-        # and process sg publish data
-
-        # add data to our model and also collect a distinct
-        # list of type ids contained within this data set.
-        # count the number of times each type is used
-        type_id_aggregates = defaultdict(int)
-
-        # FIRST PASS!
-        # get a dict with only the latest versions, grouped by type and task
-        # rely on the fact that versions are returned in asc order from sg.
-        # (see filter query above)
-        #
-        # for example, if there are these publishes:
-        # name FOO, version 1, task ANIM, type XXX
-        # name FOO, version 2, task ANIM, type XXX
-        # name FOO, version 3, task ANIM, type XXX
-        # name FOO, version 1, task ANIM, type YYY
-        # name FOO, version 2, task ANIM, type YYY
-        # name FOO, version 5, task LAY,  type YYY
-        # name FOO, version 6, task LAY,  type YYY
-        # name FOO, version 7, task LAY,  type YYY
-        #
-        # three items should show up:
-        # - Foo v3 (type XXX)
-        # - Foo v2 (type YYY, task ANIM)
-        # - Foo v7 (type YYY, task LAY)
-
-        # also, if there are cases where there are two items with the same name and the same type,
-        # but with different tasks, indicate this with a special boolean flag
-
-        unique_data = {}
-        name_type_aggregates = defaultdict(int)
-
-        for sg_item in sg_data_list:
-
-            # get the associated type
-            type_id = None
-            type_link = sg_item[self._publish_type_field]
-            if type_link:
-                type_id = type_link["id"]
-
-            # also get the associated task
-            task_id = None
-            task_link = sg_item["task"]
-            if task_link:
-                task_id = task_link["id"]
-
-            # key publishes in dict by type and name
-            unique_data[(sg_item["name"], type_id, task_id)] = {
-                "sg_item": sg_item,
-                "type_id": type_id,
-            }
-
-            # count how many items of this type we have
-            name_type_aggregates[(sg_item["name"], type_id)] += 1
-
-        # SECOND PASS
-        # We now have the latest versions only
-        # Go ahead count types for the aggregate
-        # and assemble filtered sg data set
-        new_sg_data = []
-        for second_pass_data in unique_data.values():
-
-            # get the shotgun data for this guy
-            sg_item = second_pass_data["sg_item"]
-
-            # now add a flag to indicate if this item is "task unique" or not
-            # e.g. if there are other items in the listing with the same name
-            # and same type but with a different task
-            if name_type_aggregates[(sg_item["name"], second_pass_data["type_id"])] > 1:
-                # there are more than one item with this same name/type combo!
-                sg_item["task_uniqueness"] = False
-            else:
-                # no other item with this task/name/type combo
-                sg_item["task_uniqueness"] = True
-
-            # append to new sg data
-            new_sg_data.append(sg_item)
-
-            # update our aggregate counts for the publish type view
-            type_id = second_pass_data["type_id"]
-            type_id_aggregates[type_id] += 1
-
         # tell the type model to reshuffle and reformat itself
         # based on the types contained in this search
         self._publish_type_model.set_active_types(type_id_aggregates)
 
+        self._publish_data = new_sg_data
+        if self._result_cache_key:
+            # items built from the result set must hold unix timestamps,
+            # like the ones the model builds from the data returned here.
+            self._result_cache.set(
+                self._result_cache_key,
+                [utils.convert_timestamps(sg_data) for sg_data in new_sg_data],
+            )
         return new_sg_data
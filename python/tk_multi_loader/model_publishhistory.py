@@ -8,10 +8,16 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import sqlite3
+from collections import defaultdict
+
 import sgtk
 from sgtk.platform.qt import QtCore, QtGui
 
 from . import utils, constants
+from .avatar_cache import get_avatar_cache
+from .publish_history_cache import PublishHistoryCache
+from .publish_index import get_publish_index
 
 # import the shotgun_model module from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework(
@@ -35,6 +41,39 @@ class SgPublishHistoryModel(ShotgunModel):
         # folder icon
         self._loading_icon = QtGui.QPixmap(":/res/loading_100x100.png")
         app = sgtk.platform.current_bundle()
+
+        # the versions retrieved by this model are stored in the optional
+        # local publish index, for other sessions and models to read from.
+        self._publish_index = get_publish_index(app)
+
+        self._publish_entity_type = sgtk.util.get_published_file_entity_type(app.sgtk)
+        if self._publish_entity_type == "PublishedFile":
+            self._publish_type_field = "published_file_type"
+        else:
+            self._publish_type_field = "tank_type"
+
+        # histories retrieved so far, keyed by publish stream, and the
+        # background tasks prefetching histories, see prefetch().
+        self._history_cache = PublishHistoryCache(
+            constants.PUBLISH_HISTORY_CACHE_MAX_VERSIONS
+        )
+        self._prefetch_tasks = {}
+        self._prefetching_keys = set()
+
+        # background task checking a history read from the publish index
+        self._index_check_task = None
+
+        # publish whose history is displayed. When it was built from versions
+        # already retrieved, a refresh needs to run the query.
+        self._sg_data = None
+        self._stream_key = None
+        self._loaded_from_memory = False
+
+        # the thumbnails of the users are shared by all the models of the app
+        self._download_thumbs = app.get_setting("download_thumbnails")
+        self._avatar_cache = get_avatar_cache()
+        self._avatar_cache.avatar_loaded.connect(self._on_avatar_loaded)
+
         ShotgunModel.__init__(
             self,
             parent,
@@ -44,48 +83,188 @@ class SgPublishHistoryModel(ShotgunModel):
             bg_task_manager=bg_task_manager,
         )
 
+        self._bg_task_manager = bg_task_manager
+        self._bg_task_manager.task_completed.connect(self._on_task_completed)
+        self._bg_task_manager.task_failed.connect(self._on_task_failed)
+
     ############################################################################################
     # public interface
 
-    def load_data(self, sg_data):
+    def load_data(self, sg_data, versions=None):
         """
         Load the details for the shotgun publish entity described by sg_data.
 
+        Histories retrieved before are reused as long as the latest version of
+        the publish hasn't changed, in which case no query is run. Otherwise
+        the versions stored in the publish index, if any, are displayed while
+        they are checked against Shotgun in the background.
+
         :param sg_data: dictionary describing a publish in shotgun, including all the common
                         publish fields.
+        :param versions: Optional list of shotgun dictionaries for all the versions
+                         of the publish, already retrieved. The model is then built
+                         from them without running any query.
         """
+        # fields to pull down
+        fields = [self._publish_type_field] + constants.PUBLISHED_FILES_FIELDS
 
-        app = sgtk.platform.current_bundle()
-        publish_entity_type = sgtk.util.get_published_file_entity_type(app.sgtk)
+        self._sg_data = sg_data
+        self._index_check_task = None
+        self._stream_key = utils.get_publish_stream_key(
+            sg_data, self._publish_type_field
+        )
+
+        cached_versions = self._history_cache.get(
+            self._stream_key, self._get_version_tag(sg_data)
+        )
+        if cached_versions is not None:
+            versions = cached_versions
+
+        if versions is not None:
+            self._load_versions(fields, sg_data, versions)
+            return
+
+        versions = self._get_indexed_versions(fields, sg_data)
+        if versions is not None:
+            self._load_versions(fields, sg_data, versions)
+            # the index only holds the versions retrieved so far, by this or
+            # other sessions, some of them may be missing or outdated.
+            self._index_check_task = self._bg_task_manager.add_task(
+                self._task_find_histories, task_kwargs={"sg_data_list": [sg_data]}
+            )
+            self._prefetch_tasks[self._index_check_task] = [self._stream_key]
+            self._prefetching_keys.add(self._stream_key)
+            return
+
+        self._query_history(fields, sg_data)
 
-        if publish_entity_type == "PublishedFile":
-            publish_type_field = "published_file_type"
+    def async_refresh(self):
+        """
+        Refresh the current data set
+        """
+        if self._stream_key is not None:
+            self._history_cache.remove(self._stream_key)
+
+        if self._loaded_from_memory:
+            self.load_data(self._sg_data)
         else:
-            publish_type_field = "tank_type"
+            self._refresh_data()
 
-        # fields to pull down
-        fields = [publish_type_field] + constants.PUBLISHED_FILES_FIELDS
+    def hard_refresh(self):
+        """
+        Clears any caches on disk and in memory, then refreshes the data.
+        """
+        self._history_cache.clear()
+        super(SgPublishHistoryModel, self).hard_refresh()
+
+        if self._loaded_from_memory:
+            self.load_data(self._sg_data)
+
+    def merge_publish_details(self, publish_details):
+        """
+        Merges the detail fields of versions retrieved after the history was
+        displayed, see SgLatestPublishModel.get_publish_versions().
+
+        :param publish_details: Dictionary of detail fields keyed by publish id.
+                                Values can be None for unknown details.
+        """
+        for row in range(self.rowCount()):
+            item = self.item(row)
+            sg_data = item.get_sg_data()
+            details = publish_details.get(sg_data["id"]) if sg_data else None
+            if not details:
+                continue
+            sg_data = dict(sg_data)
+            sg_data.update(details)
+            item.setData(sg_data, SgPublishHistoryModel.SG_DATA_ROLE)
+            # picks up the thumbnail of the user
+            self._populate_item(item, sg_data)
+
+    def prefetch(self, sg_data_list):
+        """
+        Retrieves the histories of several publishes in the background, with
+        as few queries as possible, so that they are displayed without running
+        any query once the publishes get selected.
+
+        Histories which are already known or being retrieved are skipped.
 
+        :param sg_data_list: List of shotgun dictionaries for the latest versions
+                             of publishes. Dictionaries for other entities, e.g.
+                             folders, are ignored.
+        """
+        streams = {}
+        for sg_data in sg_data_list:
+            if not sg_data or sg_data.get("type") != self._publish_entity_type:
+                continue
+
+            key = utils.get_publish_stream_key(sg_data, self._publish_type_field)
+            if key in streams or key in self._prefetching_keys:
+                continue
+            if self._history_cache.get(key, self._get_version_tag(sg_data)) is not None:
+                continue
+            streams[key] = sg_data
+
+        keys = list(streams)
+        chunk_size = constants.PUBLISH_HISTORY_PREFETCH_CHUNK_SIZE
+        for start in range(0, len(keys), chunk_size):
+            chunk_keys = keys[start : start + chunk_size]
+            uid = self._bg_task_manager.add_task(
+                self._task_find_histories,
+                task_kwargs={"sg_data_list": [streams[x] for x in chunk_keys]},
+            )
+            self._prefetch_tasks[uid] = chunk_keys
+            self._prefetching_keys.update(chunk_keys)
+
+    ############################################################################################
+    # private methods
+
+    def _get_history_filters(self, sg_data):
+        """
+        Returns the shotgun filters matching all the versions of a publish.
+
+        :param sg_data: Shotgun data dictionary for the publish.
+        :returns: List of shotgun filters.
+        """
         # when we filter out which other publishes are associated with this one,
         # to effectively get the "version history", we look for items
         # which have the same project, same entity assocation, same name, same type
         # and the same task.
-        filters = [
+        return [
             ["project", "is", sg_data["project"]],
             ["name", "is", sg_data["name"]],
             ["task", "is", sg_data["task"]],
             ["entity", "is", sg_data["entity"]],
-            [publish_type_field, "is", sg_data[publish_type_field]],
+            [self._publish_type_field, "is", sg_data[self._publish_type_field]],
         ]
 
+    def _get_version_tag(self, sg_data):
+        """
+        Returns the tag of a version of a publish in the history cache,
+        which changes whenever the publish is updated.
+
+        :param sg_data: Shotgun data dictionary for the publish.
+        :returns: Hashable tag.
+        """
+        return (sg_data.get("id"), utils.get_timestamp(sg_data.get("updated_at")))
+
+    def _query_history(self, fields, sg_data):
+        """
+        Retrieves all the versions of a publish from Shotgun.
+
+        :param fields: Fields to retrieve.
+        :param sg_data: Shotgun data dictionary for the publish.
+        """
+        filters = self._get_history_filters(sg_data)
+
         # add external filters from config
         app = sgtk.platform.current_bundle()
         pub_filters = app.get_setting("publish_filters", [])
         filters.extend(pub_filters)
 
+        self._loaded_from_memory = False
         ShotgunModel._load_data(
             self,
-            entity_type=publish_entity_type,
+            entity_type=self._publish_entity_type,
             filters=filters,
             hierarchy=["version_number"],
             fields=fields,
@@ -93,11 +272,285 @@ class SgPublishHistoryModel(ShotgunModel):
 
         self._refresh_data()
 
-    def async_refresh(self):
+    def _get_indexed_versions(self, fields, sg_data):
         """
-        Refresh the current data set
+        Returns the versions of a publish stored in the publish index, if they
+        hold all the fields of the history and the publish as it is displayed.
+
+        :param fields: Fields of the history query.
+        :param sg_data: Shotgun data dictionary for the publish.
+        :returns: List of shotgun dictionaries, oldest first, or None.
         """
-        self._refresh_data()
+        if not self._publish_index:
+            return None
+
+        app = sgtk.platform.current_bundle()
+        publish_type = sg_data.get(self._publish_type_field)
+        task = sg_data.get("task")
+        try:
+            versions = self._publish_index.get_versions(
+                sg_data.get("entity"),
+                sg_data.get("name"),
+                publish_type["id"] if publish_type else None,
+                task["id"] if task else None,
+            )
+        except sqlite3.Error as e:
+            # the index is only an optimization
+            app.log_warning("Could not read the publish index: %s" % e)
+            return None
+
+        versions = utils.filter_publishes(
+            app,
+            [
+                version
+                for version in versions
+                if version.get("project") == sg_data.get("project")
+            ],
+        )
+        if (
+            not versions
+            or any(x not in version for version in versions for x in fields)
+            or self._get_version_tag(versions[-1]) != self._get_version_tag(sg_data)
+        ):
+            return None
+        return versions
+
+    def _cache_history(self, key, sg_data_list):
+        """
+        Stores the versions of a publish in the history cache, tagged
+        with the latest of them.
+
+        :param key: Key of the publish stream.
+        :param sg_data_list: List of shotgun dictionaries for all the versions
+                             of the publish, as returned by the find() call.
+        """
+        versions = []
+        for sg_data in sorted(sg_data_list, key=lambda x: x.get("version_number") or 0):
+            # date time values are converted to unix timestamps, as they are
+            # once stored in the model.
+            version = dict(sg_data)
+            for field in ("created_at", "updated_at"):
+                version[field] = utils.get_timestamp(version.get(field))
+            versions.append(version)
+
+        self._history_cache.set(key, versions, self._get_version_tag(versions[-1]))
+
+    def _task_find_histories(self, sg_data_list):
+        """
+        Background task retrieving all the versions of the given publishes
+        in a single query.
+
+        :param sg_data_list: List of shotgun dictionaries for the publishes.
+        :returns: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        sg_filters = [
+            {
+                "filter_operator": "any",
+                "filters": [
+                    {
+                        "filter_operator": "all",
+                        "filters": self._get_history_filters(sg_data),
+                    }
+                    for sg_data in sg_data_list
+                ],
+            }
+        ]
+        sg_filters.extend(app.get_setting("publish_filters", []))
+
+        versions = app.shotgun.find(
+            self._publish_entity_type,
+            sg_filters,
+            [self._publish_type_field] + constants.PUBLISHED_FILES_FIELDS,
+            order=[{"field_name": "version_number", "direction": "asc"}],
+        )
+
+        self._task_update_publish_index(versions)
+        return versions
+
+    def _task_update_publish_index(self, sg_data_list):
+        """
+        Background task storing versions of publishes in the publish index,
+        which may have to wait for other processes writing to it.
+
+        :param sg_data_list: List of shotgun dictionaries.
+        """
+        if not self._publish_index:
+            return
+
+        try:
+            self._publish_index.update(sg_data_list, self._publish_type_field)
+        except sqlite3.Error as e:
+            # the index is only an optimization
+            app = sgtk.platform.current_bundle()
+            app.log_warning("Could not update the publish index: %s" % e)
+
+    def _on_task_completed(self, uid, group, result):
+        """
+        Slot triggered when a background task completes.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param result: Result returned by the task.
+        """
+        keys = self._prefetch_tasks.pop(uid, None)
+        if keys is None:
+            return
+        self._prefetching_keys.difference_update(keys)
+
+        app = sgtk.platform.current_bundle()
+        histories = defaultdict(list)
+        for sg_data in utils.filter_publishes(app, result):
+            key = utils.get_publish_stream_key(sg_data, self._publish_type_field)
+            histories[key].append(sg_data)
+
+        for key in keys:
+            if histories.get(key):
+                self._cache_history(key, histories[key])
+
+        if uid == self._index_check_task:
+            self._index_check_task = None
+            self._on_indexed_versions_checked(histories.get(self._stream_key))
+
+    def _on_task_failed(self, uid, group, msg, stack_trace):
+        """
+        Slot triggered when a background task fails.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param msg: Error message.
+        :param stack_trace: Stack trace of the error.
+        """
+        keys = self._prefetch_tasks.pop(uid, None)
+        if keys is None:
+            return
+        # the histories are simply retrieved when the publishes get selected
+        self._prefetching_keys.difference_update(keys)
+        if uid == self._index_check_task:
+            # keep displaying the versions read from the index
+            self._index_check_task = None
+
+        app = sgtk.platform.current_bundle()
+        app.log_warning("Could not retrieve publish histories: %s" % msg)
+        app.log_debug(stack_trace)
+
+    def _on_indexed_versions_checked(self, versions):
+        """
+        Called once the versions displayed from the publish index have been
+        retrieved from Shotgun. Reloads the model if they differ.
+
+        :param versions: List of shotgun dictionaries for all the versions of
+                         the displayed publish, or None if there are none.
+        """
+        if not self._loaded_from_memory or self._sg_data is None:
+            return
+
+        displayed = [
+            self._get_version_tag(self.item(row).get_sg_data())
+            for row in range(self.rowCount())
+        ]
+        retrieved = sorted(
+            (
+                (x.get("version_number") or 0, self._get_version_tag(x))
+                for x in versions or []
+            ),
+            key=lambda x: x[0],
+        )
+        if displayed == [x[1] for x in retrieved]:
+            return
+
+        # histories were just cached from these versions, as long as the
+        # displayed publish is still the latest one.
+        fields = [self._publish_type_field] + constants.PUBLISHED_FILES_FIELDS
+        versions = self._history_cache.get(
+            self._stream_key, self._get_version_tag(self._sg_data)
+        )
+        if versions is not None:
+            self._load_versions(fields, self._sg_data, versions)
+        else:
+            self._query_history(fields, self._sg_data)
+
+    def _update_thumbnail(self, item):
+        """
+        Composites the user thumbnail and the publish thumbnail of an item
+        into a single image, used as its icon.
+
+        :param item: Model item.
+        """
+        thumb = utils.create_overlayed_user_publish_thumbnail(
+            item.data(SgPublishHistoryModel.PUBLISH_THUMB_ROLE),
+            item.data(SgPublishHistoryModel.USER_THUMB_ROLE),
+        )
+        item.setIcon(QtGui.QIcon(thumb))
+
+    def _on_avatar_loaded(self, user_id):
+        """
+        Slot triggered when the thumbnail of a user is available. Updates
+        the items created by this user.
+
+        :param user_id: Id of the HumanUser.
+        """
+        avatar = self._avatar_cache.get_avatar(user_id)
+        for row in range(self.rowCount()):
+            item = self.item(row)
+            sg_data = item.get_sg_data()
+            created_by = sg_data.get("created_by") if sg_data else None
+            if (
+                created_by
+                and created_by.get("type") == "HumanUser"
+                and created_by.get("id") == user_id
+            ):
+                item.setData(avatar, SgPublishHistoryModel.USER_THUMB_ROLE)
+                self._update_thumbnail(item)
+
+    def _load_versions(self, fields, sg_data, versions):
+        """
+        Builds the model from versions of a publish already retrieved,
+        without running any query.
+
+        :param fields: Fields of the query.
+        :param sg_data: Shotgun data dictionary for the publish.
+        :param versions: List of shotgun dictionaries for all the versions of the publish.
+        """
+        # clear the model without running any query
+        ShotgunModel._load_data(
+            self,
+            entity_type=self._publish_entity_type,
+            filters=None,
+            hierarchy=["version_number"],
+            fields=fields,
+        )
+
+        # the user thumbnails aren't part of the versions, reuse the one of
+        # the publish for the versions created by the same user.
+        user_image = sg_data.get("created_by.HumanUser.image")
+        for version in versions:
+            if (
+                user_image
+                and "created_by.HumanUser.image" not in version
+                and version.get("created_by")
+                and version["created_by"] == sg_data.get("created_by")
+            ):
+                version["created_by.HumanUser.image"] = user_image
+
+            item = shotgun_model.ShotgunStandardItem(str(version.get("version_number")))
+            item.setData(version, SgPublishHistoryModel.SG_DATA_ROLE)
+            item.setData(
+                {"name": "version_number", "value": version.get("version_number")},
+                SgPublishHistoryModel.SG_ASSOCIATED_FIELD_ROLE,
+            )
+            self._populate_default_thumbnail(item)
+            self._populate_item(item, version)
+
+            if version.get("image"):
+                self._request_thumbnail_download(
+                    item, "image", version["image"], version["type"], version["id"]
+                )
+
+            self.appendRow(item)
+
+        self._loaded_from_memory = True
+        self.cache_loaded.emit()
 
     ############################################################################################
     # subclassed methods
@@ -125,17 +578,21 @@ class SgPublishHistoryModel(ShotgunModel):
         if sg_data.get("version_number"):
             item.setText("%03d" % sg_data.get("version_number"))
 
-        # see if we can get a thumbnail for the user
-        if sg_data.get("created_by.HumanUser.image"):
-            # get the thumbnail - store the unique id we get back from
-            # the data retrieve in a dict for fast lookup later
-            self._request_thumbnail_download(
-                item,
-                "created_by.HumanUser.image",
-                sg_data["created_by.HumanUser.image"],
-                sg_data["created_by"]["type"],
-                sg_data["created_by"]["id"],
+        # see if we can get a thumbnail for the user. They are cached for the
+        # whole app, items are updated when they become available, see
+        # _on_avatar_loaded().
+        created_by = sg_data.get("created_by")
+        if (
+            self._download_thumbs
+            and sg_data.get("created_by.HumanUser.image")
+            and created_by.get("type") == "HumanUser"
+        ):
+            avatar = self._avatar_cache.request_avatar(
+                created_by["id"], sg_data["created_by.HumanUser.image"]
             )
+            if avatar is not None:
+                item.setData(avatar, SgPublishHistoryModel.USER_THUMB_ROLE)
+                self._update_thumbnail(item)
 
     def _before_data_processing(self, sg_data_list):
         """
@@ -149,7 +606,21 @@ class SgPublishHistoryModel(ShotgunModel):
         """
         app = sgtk.platform.current_bundle()
 
-        return utils.filter_publishes(app, sg_data_list)
+        if self._publish_index and sg_data_list:
+            # writing to the index may wait for other processes, keep it
+            # off the main thread.
+            self._bg_task_manager.add_task(
+                self._task_update_publish_index,
+                task_kwargs={"sg_data_list": [dict(x) for x in sg_data_list]},
+            )
+
+        sg_data_list = utils.filter_publishes(app, sg_data_list)
+
+        # keep the history for the publish to be selected again
+        if sg_data_list and self._stream_key is not None:
+            self._cache_history(self._stream_key, sg_data_list)
+
+        return sg_data_list
 
     def _populate_default_thumbnail(self, item):
         """
@@ -161,10 +632,7 @@ class SgPublishHistoryModel(ShotgunModel):
         """
         # set up publishes with a "thumbnail loading" icon
         item.setData(self._loading_icon, SgPublishHistoryModel.PUBLISH_THUMB_ROLE)
-        thumb = utils.create_overlayed_user_publish_thumbnail(
-            item.data(SgPublishHistoryModel.PUBLISH_THUMB_ROLE), None
-        )
-        item.setIcon(QtGui.QIcon(thumb))
+        self._update_thumbnail(item)
 
     def _populate_thumbnail_image(self, item, field, image, path):
         """
@@ -195,9 +663,4 @@ class SgPublishHistoryModel(ShotgunModel):
             thumb = QtGui.QPixmap.fromImage(image)
             item.setData(thumb, SgPublishHistoryModel.USER_THUMB_ROLE)
 
-        # composite the user thumbnail and the publish thumb into a single image
-        thumb = utils.create_overlayed_user_publish_thumbnail(
-            item.data(SgPublishHistoryModel.PUBLISH_THUMB_ROLE),
-            item.data(SgPublishHistoryModel.USER_THUMB_ROLE),
-        )
-        item.setIcon(QtGui.QIcon(thumb))
+        self._update_thumbnail(item)
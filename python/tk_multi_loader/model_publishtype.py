@@ -171,10 +171,15 @@ class SgPublishTypeModel(ShotgunModel):
         Specifies which types are currently active. Also adjust the sort role,
         so that the view puts enabled items at the top of the list!
 
+        Only the items whose counts changed are updated, in one batch, and the
+        model is only sorted again if items were enabled or disabled.
+
         :param type_aggregates: dict keyed by type id with value being the number of
                                 of occurances of that type in the currently displayed result
         """
-        # iterate over all types in the list
+        # work out the changes first, so that nothing is signaled if the
+        # types are unchanged, which is the case on every other call.
+        changes = []
         for idx in range(self.rowCount()):
 
             item = self.item(idx)
@@ -197,24 +202,47 @@ class SgPublishTypeModel(ShotgunModel):
                 if type_id in type_aggregates:
                     total_matches += type_aggregates[type_id]
 
-            if total_matches > 0:
+            enabled = total_matches > 0
+            if enabled:
                 # there are matches for this publish type! Add it to the active section
                 # of the filter list.
-                item.setData("a_%s" % display_name, SgPublishTypeModel.SORT_KEY_ROLE)
-                item.setEnabled(True)
-
-                # display name with aggregate summary
-                item.setText("%s (%d)" % (display_name, total_matches))
-
+                sort_key = "a_%s" % display_name
             else:
                 # this type is not found in the list of current matches
-                item.setEnabled(False)
-                item.setData("b_%s" % display_name, SgPublishTypeModel.SORT_KEY_ROLE)
-                # disply name with no aggregate
-                item.setText("%s (0)" % display_name)
-
-        # and ask the model to resort itself
-        self.sort(0)
+                sort_key = "b_%s" % display_name
+            # display name with aggregate summary
+            text = "%s (%d)" % (display_name, total_matches)
+
+            if (
+                item.data(SgPublishTypeModel.SORT_KEY_ROLE) != sort_key
+                or item.isEnabled() != enabled
+                or item.text() != text
+            ):
+                changes.append((item, enabled, sort_key, text))
+
+        if not changes:
+            return
+
+        # update the items without signaling each change, views and proxy
+        # models are told about them all at once.
+        self.layoutAboutToBeChanged.emit()
+        signals_blocked = self.blockSignals(True)
+        try:
+            needs_sort = False
+            for item, enabled, sort_key, text in changes:
+                if item.data(SgPublishTypeModel.SORT_KEY_ROLE) != sort_key:
+                    item.setData(sort_key, SgPublishTypeModel.SORT_KEY_ROLE)
+                    needs_sort = True
+                item.setEnabled(enabled)
+                item.setText(text)
+
+            if needs_sort:
+                # items moved between the enabled and disabled sections,
+                # ask the model to resort itself
+                self.sort(0)
+        finally:
+            self.blockSignals(signals_blocked)
+        self.layoutChanged.emit()
 
     def hard_refresh(self):
         """
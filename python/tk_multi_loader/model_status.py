@@ -21,6 +21,10 @@ ShotgunModel = shotgun_model.ShotgunModel
 class SgStatusModel(ShotgunModel):
     """
     This model represents status codes.
+
+    The colors and long names of the statuses are indexed by code each time
+    the model is loaded or refreshed, so that looking them up doesn't scan
+    the model.
     """
 
     def __init__(self, parent, bg_task_manager):
@@ -31,6 +35,11 @@ class SgStatusModel(ShotgunModel):
         ShotgunModel.__init__(
             self, parent, download_thumbs=False, bg_task_manager=bg_task_manager
         )
+        # status code -> (color, long name)
+        self._statuses = {}
+        self.cache_loaded.connect(self._build_status_index)
+        self.data_refreshed.connect(self._build_status_index)
+
         fields = ["bg_color", "icon", "code", "name"]
         self._load_data("Status", [], ["code"], fields)
         self._refresh_data()
@@ -42,22 +51,44 @@ class SgStatusModel(ShotgunModel):
         """
         Returns the color, as a string, for example '202,244,231'
         """
-        for idx in range(self.rowCount()):
-            item = self.item(idx)
-
-            if item.text() == code:
-                return item.get_sg_data().get("bg_color")
-
-        return None
+        return self._statuses.get(code, (None, None))[0]
 
     def get_long_name(self, code):
         """
         Returns the long name for a status, 'Undefined' if not found.
         """
+        return self._statuses.get(code, (None, None))[1] or "Undefined"
+
+    def get_statuses(self, codes):
+        """
+        Returns the colors and long names of several statuses.
+
+        :param codes: List of status codes.
+        :returns: Dictionary keyed by status code, with (color, long name)
+                  tuples as values, as returned by get_color_str() and
+                  get_long_name().
+        """
+        return dict(
+            (code, (self.get_color_str(code), self.get_long_name(code)))
+            for code in codes
+        )
+
+    ############################################################################################
+    # private methods
+
+    def _build_status_index(self, *args):
+        """
+        Indexes the colors and long names of the statuses by code. Called
+        when the model has been loaded from its cache or refreshed.
+        """
+        statuses = {}
         for idx in range(self.rowCount()):
             item = self.item(idx)
-            if item.text() == code and item.get_sg_data().get("name"):
-                # avoid non-None values
-                return item.get_sg_data().get("name")
-
-        return "Undefined"
+            code = item.text()
+            sg_data = item.get_sg_data()
+            if code not in statuses:
+                statuses[code] = (sg_data.get("bg_color"), sg_data.get("name"))
+            elif not statuses[code][1]:
+                # the first item with a name provides the long name
+                statuses[code] = (statuses[code][0], sg_data.get("name"))
+        self._statuses = statuses
@@ -139,6 +139,10 @@ class OpenPublishForm(QtGui.QWidget):
         """
         Called when the 'open' button is clicked.
         """
+        # the publishes are returned with their detail fields.
+        self.__selected_publishes = self.__ui.loader_form.get_selected_publishes(
+            with_details=True
+        )
         self.__exit_code = QtGui.QDialog.Accepted
         self.close()
 
@@ -24,90 +24,330 @@ class SgEntityProxyModel(QtGui.QSortFilterProxyModel):
     left hand side loader tree views and the search input box
     in the UI. This proxy model sorts items in alphabetical order
     and culls entries based on the current search phrase.
+
+    Searches are run against the search index of the SgEntityModel, so that
+    only the branches leading to matching nodes need to be loaded. If the index
+    isn't available, the whole tree is loaded and searched instead.
+
+    When the index supports it, searches are fuzzy and the best matching
+    nodes are sorted first.
     """
 
+    # emitted when the results of a search become available after the
+    # search phrase was set, because the search index wasn't built yet.
+    search_results_ready = QtCore.Signal()
+
     def __init__(self, parent):
         QtGui.QSortFilterProxyModel.__init__(self, parent)
 
-        # to avoid n^2 characteristics, cache computations
-        # as we go through and recurse down.
-        self._cache = {}
-        self._cache_hits = 0
+        # to avoid n^2 characteristics, the case folded texts of each node
+        # and of all its descendants are joined and kept, keyed by node, so
+        # that matching a subtree is a single substring test. They are kept
+        # across searches and only the branches which change are discarded.
+        self._subtree_texts = {}
+        self._num_subtree_texts_built = 0
+        self._num_subtree_texts_reused = 0
+
+        # nodes which don't match the current search phrase. When the phrase
+        # is refined, they can't match the new one either.
+        self._search_phrase = ""
+        self._ruled_out = set()
+        self._num_ruled_out = 0
+
+        # paths of the nodes to display for the current search phrase, as
+        # returned by the search index, or None when not searching with it.
+        self._visible_paths = None
+        # search phrase run against the index, kept to run it again when
+        # the index is rebuilt.
+        self._indexed_pattern = None
+        # node path -> best fuzzy search score of the node and its descendants,
+        # empty unless the nodes are ranked.
+        self._scores = {}
 
         # set proxy to auto sort alphabetically
         self.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
         self.setDynamicSortFilter(True)
         self.sort(0, QtCore.Qt.AscendingOrder)
 
-    def _matching_r(self, search_exp, item):
+    def setSourceModel(self, model):
         """
-        Recursive matching.
+        Overridden from base class.
         """
-        # use the python memory address as a key - both
-        # for performance and to avoid keeping references to items
-        item_hash = str(id(item))
+        QtGui.QSortFilterProxyModel.setSourceModel(self, model)
 
-        # check cache - did we already compute the cull state of this node?
-        if item_hash in self._cache:
-            self._cache_hits += 1
-            return self._cache[item_hash]
+        # keep the subtree texts in sync with the tree
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        model.dataChanged.connect(self._on_data_changed)
+        model.modelReset.connect(self._on_model_reset)
+        model.search_index_built.connect(self._on_search_index_built)
 
-        # evaluate this node
-        if search_exp.indexIn(item.text()) != -1:
-            # item is matching - exit early - no need
-            # to search children - because it is a match
-            # we know we want to show this node
-            self._cache[item_hash] = True
-            return True
+    def _get_item(self, index):
+        """
+        Returns the source model item for an index, the invisible root
+        item for an invalid index.
+        """
+        if not index.isValid():
+            return self.sourceModel().invisibleRootItem()
+        return self.sourceModel().itemFromIndex(index)
+
+    def _discard_branch(self, item):
+        """
+        Discards what is known about a node and its ancestors, whose subtree
+        texts include the text of the node.
+
+        Nodes are keyed by their python memory address, both for performance
+        and to avoid keeping references to items.
+        """
+        while item is not None:
+            self._subtree_texts.pop(id(item), None)
+            self._ruled_out.discard(id(item))
+            item = item.parent()
+
+    def _discard_subtree(self, item):
+        """
+        Discards what is known about a node and all its descendants.
+        """
+        self._subtree_texts.pop(id(item), None)
+        self._ruled_out.discard(id(item))
+        for idx in range(item.rowCount()):
+            self._discard_subtree(item.child(idx))
+
+    def _on_rows_inserted(self, parent_idx, first, last):
+        """
+        Slot triggered when rows are inserted in the source model.
+        """
+        self._discard_branch(self._get_item(parent_idx))
+
+    def _on_rows_about_to_be_removed(self, parent_idx, first, last):
+        """
+        Slot triggered when rows are about to be removed from the source model.
+        Their addresses may be reused by new items.
+        """
+        parent_item = self._get_item(parent_idx)
+        for row in range(first, last + 1):
+            self._discard_subtree(parent_item.child(row))
+        self._discard_branch(parent_item)
+
+    def _on_data_changed(self, top_left_idx, bottom_right_idx, *args):
+        """
+        Slot triggered when rows of the source model change.
+        """
+        parent_item = self._get_item(top_left_idx.parent())
+        for row in range(top_left_idx.row(), bottom_right_idx.row() + 1):
+            self._discard_branch(parent_item.child(row))
+
+    def _on_model_reset(self):
+        """
+        Slot triggered when the source model is reset.
+        """
+        self._subtree_texts = {}
+        self._ruled_out = set()
+
+    def _on_search_index_built(self):
+        """
+        Slot triggered when the search index of the source model has been
+        built, runs the current search against it.
+        """
+        if self._indexed_pattern is None:
+            return
+
+        self.setFilterFixedString(self._indexed_pattern)
+        self.invalidateFilter()
+        self.search_results_ready.emit()
+
+    def _load_paths(self, item, path, parent_paths, loaded_paths):
+        """
+        Recursively loads the children of the nodes leading to the nodes to
+        display, leaving the rest of the tree unloaded.
+
+        :param item: Item to load the children of.
+        :param path: Path of the item.
+        :param parent_paths: Set of the paths of the nodes to load the children of.
+        :param loaded_paths: Set the paths of the loaded nodes are added to.
+        """
+        model = self.sourceModel()
+        if model.canFetchMore(item.index()):
+            model.fetchMore(item.index())
 
-        # the node wasn't a direct match - however we still
-        # want to show it if any of its *children* are matching
-        # so recurse down...
         for idx in range(item.rowCount()):
             child_item = item.child(idx)
-            if self._matching_r(search_exp, child_item):
-                # exit early as soon as we find a match for performance
-                self._cache[item_hash] = True
-                return True
-
-        # no sub nodes matches. Keep this result in the cache so that next
-        # time we need to compute it, we don't need to :)
-        self._cache[item_hash] = False
+            child_path = path + (child_item.text(),)
+            loaded_paths.add(child_path)
+            if child_path in parent_paths:
+                self._load_paths(child_item, child_path, parent_paths, loaded_paths)
+
+    def _get_subtree_text(self, item):
+        """
+        Returns the case folded texts of a node and of all its descendants,
+        one per line. Search phrases are single line, so they can only match
+        the text of one of the nodes.
+        """
+        item_hash = id(item)
+        subtree_text = self._subtree_texts.get(item_hash)
+        if subtree_text is not None:
+            self._num_subtree_texts_reused += 1
+            return subtree_text
+
+        texts = [item.text().lower()]
+        for idx in range(item.rowCount()):
+            texts.append(self._get_subtree_text(item.child(idx)))
+        subtree_text = "\n".join(texts)
+
+        self._subtree_texts[item_hash] = subtree_text
+        self._num_subtree_texts_built += 1
+        return subtree_text
+
+    def _matching(self, item):
+        """
+        Checks if a node or any of its descendants matches the search phrase.
+        """
+        item_hash = id(item)
+        if item_hash in self._ruled_out:
+            self._num_ruled_out += 1
+            return False
+
+        if self._search_phrase in self._get_subtree_text(item):
+            return True
+
+        self._ruled_out.add(item_hash)
         return False
 
+    def _rank_paths(self, results):
+        """
+        Records the scores of fuzzy search results for the nodes to be sorted
+        by relevance. Each ancestor of a matching node gets the best score of
+        its descendants.
+
+        :param results: List of (node path, score) tuples.
+        :returns: Set of the paths of the nodes to display.
+        """
+        for node_path, score in results:
+            for depth in range(1, len(node_path) + 1):
+                path = node_path[:depth]
+                if score > self._scores.get(path, -1):
+                    self._scores[path] = score
+        return set(self._scores)
+
     def setFilterFixedString(self, pattern):
         """
         Overridden from base class.
         """
-        # clear cache - now that the search criteria is changing,
-        # the cache results are no longer valid
         app = sgtk.platform.current_bundle()
-        cache_len = len(self._cache)
-        if cache_len > 0:
-            ratio = (float)(self._cache_hits) / (float)(cache_len) * 100.0
+        if self._num_subtree_texts_built or self._num_subtree_texts_reused:
             app.log_debug(
-                "Search efficiency: %s items %4f%% cache hit ratio."
-                % (cache_len, ratio)
+                "Search efficiency: %s nodes, %s subtree texts built, %s reused, "
+                "%s nodes ruled out by the previous search."
+                % (
+                    len(self._subtree_texts),
+                    self._num_subtree_texts_built,
+                    self._num_subtree_texts_reused,
+                    self._num_ruled_out,
+                )
             )
 
-        self._cache_hits = 0
-        self._cache = {}
+        self._num_subtree_texts_built = 0
+        self._num_subtree_texts_reused = 0
+        self._num_ruled_out = 0
 
-        if len(pattern) >= constants.TREE_SEARCH_TRIGGER_LENGTH:
-            # we have a search filter that is longer than one character.
-            # start filtering. Before we can filter, ensure that the entire
-            # data set is loaded in the tree.
+        if len(pattern) < constants.TREE_SEARCH_TRIGGER_LENGTH:
+            self._search_phrase = ""
+            self._ruled_out = set()
+            self._visible_paths = None
+            self._indexed_pattern = None
+            if self._scores:
+                # back to alphabetical order
+                self._scores = {}
+                self.invalidate()
+            return QtGui.QSortFilterProxyModel.setFilterFixedString(self, "")
 
-            # ensure model is fully loaded before we attempt any searching
-            app.log_debug("Loading up all nodes in tree so we can search...")
-            self.sourceModel().ensure_data_is_loaded()
-            app.log_debug("...done")
+        model = self.sourceModel()
+        search_index = model.get_search_index()
+        if search_index is not None or model.is_building_search_index():
+            self._search_phrase = ""
+            self._ruled_out = set()
+            self._indexed_pattern = pattern
+            self._scores = {}
 
-            # call base class
-            return QtGui.QSortFilterProxyModel.setFilterFixedString(self, pattern)
+            if search_index is None:
+                # display nothing until the index is built
+                self._visible_paths = set()
+            else:
+                if search_index.fuzzy:
+                    self._visible_paths = self._rank_paths(
+                        search_index.fuzzy_search(
+                            pattern, constants.TREE_FUZZY_SEARCH_MAX_RESULTS
+                        )
+                    )
+                else:
+                    self._visible_paths = search_index.search(pattern)
+                app.log_debug(
+                    "Search: %s nodes to display out of %s."
+                    % (len(self._visible_paths), len(search_index))
+                )
+                # only load the branches leading to the nodes to display
+                loaded_paths = set()
+                self._load_paths(
+                    model.invisibleRootItem(),
+                    (),
+                    set(path[:-1] for path in self._visible_paths),
+                    loaded_paths,
+                )
+                if not self._visible_paths <= loaded_paths:
+                    # the index names some nodes differently than the tree,
+                    # or is out of date: search the whole tree instead.
+                    app.log_debug(
+                        "Search: %s nodes to display are not in the tree."
+                        % len(self._visible_paths - loaded_paths)
+                    )
+                    self._visible_paths = None
 
-        else:
-            return QtGui.QSortFilterProxyModel.setFilterFixedString(self, "")
+            if self._visible_paths is not None:
+                QtGui.QSortFilterProxyModel.setFilterFixedString(self, pattern)
+                if self._scores:
+                    # the nodes already displayed need to be sorted again
+                    self.invalidate()
+                return
+
+        self._visible_paths = None
+        self._indexed_pattern = None
+        self._scores = {}
+
+        # we have a search filter that is longer than one character.
+        # start filtering. Before we can filter, ensure that the entire
+        # data set is loaded in the tree.
+
+        # ensure model is fully loaded before we attempt any searching
+        app.log_debug("Loading up all nodes in tree so we can search...")
+        model.ensure_data_is_loaded()
+        app.log_debug("...done")
+
+        if not (self._search_phrase and self._search_phrase in pattern.lower()):
+            # the search phrase isn't refined, nodes which didn't match
+            # the previous phrase may match this one.
+            self._ruled_out = set()
+        self._search_phrase = pattern.lower()
+
+        # call base class
+        return QtGui.QSortFilterProxyModel.setFilterFixedString(self, pattern)
+
+    def lessThan(self, left_idx, right_idx):
+        """
+        Overridden from base class. Sorts the best fuzzy search matches first,
+        alphabetically otherwise.
+        """
+        if self._scores:
+            model = self.sourceModel()
+            left_score = self._scores.get(
+                model.get_item_path(model.itemFromIndex(left_idx)), -1
+            )
+            right_score = self._scores.get(
+                model.get_item_path(model.itemFromIndex(right_idx)), -1
+            )
+            if left_score != right_score:
+                return left_score > right_score
+
+        return QtGui.QSortFilterProxyModel.lessThan(self, left_idx, right_idx)
 
     def filterAcceptsRow(self, source_row, source_parent_idx):
         """
@@ -115,7 +355,6 @@ class SgEntityProxyModel(QtGui.QSortFilterProxyModel):
         """
         # get the search filter, as specified via setFilterFixedString()
         search_exp = self.filterRegExp()
-        search_exp.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
 
         # if there is no search criteria, exit early!
         if search_exp.isEmpty():
@@ -133,5 +372,9 @@ class SgEntityProxyModel(QtGui.QSortFilterProxyModel):
             item_model_idx = source_parent_idx.child(source_row, 0)
             item = model.itemFromIndex(item_model_idx)
 
-        # evaluate recursive match
-        return self._matching_r(search_exp, item)
+        if self._visible_paths is not None:
+            # the nodes to display are known from the search index
+            return model.get_item_path(item) in self._visible_paths
+
+        # evaluate subtree match
+        return self._matching(item)
@@ -38,6 +38,19 @@ class SgLatestPublishProxyModel(FilterItemProxyModel):
         :param search_filter: search filter string
         """
         self._search_filter = search_filter
+
+        if search_filter:
+            # the model only compares the search filter with the names which
+            # matched the previous one when the filter is being refined.
+            model = self.sourceModel()
+            num_matches = len(model.get_search_matches(search_filter))
+            (num_names, num_compared) = model.get_search_statistics()
+            app = sgtk.platform.current_bundle()
+            app.log_debug(
+                "Search efficiency: %s items, %s compared, %s matching."
+                % (num_names, num_compared, num_matches)
+            )
+
         self.layoutAboutToBeChanged.emit()
         try:
             self.invalidateFilter()
@@ -56,7 +69,8 @@ class SgLatestPublishProxyModel(FilterItemProxyModel):
         ):
             return  # Nothing changed
 
-        self._valid_type_ids = type_ids
+        # held in a set so that each row is tested in constant time
+        self._valid_type_ids = None if type_ids is None else frozenset(type_ids)
         self._show_folders = show_folders
         self.layoutAboutToBeChanged.emit()
         try:
@@ -97,7 +111,9 @@ class SgLatestPublishProxyModel(FilterItemProxyModel):
                 current_item, SgLatestPublishModel.SEARCHABLE_NAME
             )
 
-            if self._search_filter.lower() not in field_data.lower():
+            # the model indexes the searchable names, look the item up in
+            # the names matching the search filter.
+            if field_data not in model.get_search_matches(self._search_filter):
                 # item text is not matching search filter
                 return False
 
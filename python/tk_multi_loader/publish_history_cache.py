@@ -0,0 +1,30 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from .lru_cache import LRUCache
+
+
+class PublishHistoryCache(LRUCache):
+    """
+    Bounded in-memory cache of publish histories, keyed by publish stream.
+
+    Each history is stored with a tag identifying the version of the latest
+    publish of the stream it was retrieved with, typically its id and
+    updated_at value, so that it is invalidated as soon as a new version is
+    published or the latest version is updated.
+
+    The size of the cache is the number of versions it holds.
+    """
+
+    def __init__(self, max_versions):
+        """
+        :param max_versions: Maximum number of versions held by the cache.
+        """
+        super(PublishHistoryCache, self).__init__(max_versions, len)
@@ -0,0 +1,268 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import json
+import os
+import sqlite3
+import threading
+
+from . import constants, utils
+
+# shared index instances, keyed by path
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_publish_index(bundle):
+    """
+    Returns the publish index shared by all the sessions of the given bundle,
+    if enabled with the use_publish_index setting.
+
+    :param bundle: The loader app.
+    :returns: :class:`PublishIndex` or None.
+    """
+    if not bundle.get_setting("use_publish_index", False):
+        return None
+
+    path = os.path.join(bundle.cache_location, "publish_index.db")
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = PublishIndex(path)
+        return _indexes[path]
+
+
+class PublishIndex(object):
+    """
+    Local SQLite index of publishes, keyed by publish id and versioned with
+    the publish updated_at field.
+
+    The index is stored in a single file which can be shared by several
+    processes, for example DCCs running side by side. The database runs in
+    write-ahead logging mode so that readers never block each other nor
+    the writer. Each thread gets its own connection.
+    """
+
+    # seconds to wait for another process to release a lock
+    LOCK_TIMEOUT = 10
+
+    def __init__(self, path):
+        """
+        :param path: Path to the database file.
+        """
+        self._path = path
+        self._local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        connection = self._get_connection()
+        with connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS publishes (
+                    id INTEGER PRIMARY KEY,
+                    entity_type TEXT,
+                    entity_id INTEGER,
+                    name TEXT,
+                    type_id INTEGER,
+                    task_id INTEGER,
+                    version_number INTEGER,
+                    updated_at REAL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE INDEX IF NOT EXISTS publishes_stream ON publishes (
+                    entity_type, entity_id, name, type_id, task_id, version_number
+                )
+                """
+            )
+
+    def get_publishes(self, publish_ids, fields=None):
+        """
+        Returns the publishes stored for the given ids.
+
+        :param publish_ids: List of publish ids.
+        :param fields: Optional list of fields. Publishes stored without all
+                       these fields are not returned.
+        :returns: Dictionary of shotgun dictionaries, keyed by publish id.
+        """
+        publishes = {}
+        connection = self._get_connection()
+        chunk_size = constants.PUBLISH_ID_QUERY_CHUNK_SIZE
+        for start in range(0, len(publish_ids), chunk_size):
+            chunk = list(publish_ids[start : start + chunk_size])
+            rows = connection.execute(
+                "SELECT id, data FROM publishes WHERE id IN (%s)"
+                % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            for publish_id, data in rows:
+                sg_data = json.loads(data)
+                if fields and any(x not in sg_data for x in fields):
+                    continue
+                publishes[publish_id] = sg_data
+        return publishes
+
+    def get_versions(self, entity, name, type_id, task_id):
+        """
+        Returns all the versions stored for a publish, oldest first.
+
+        :param entity: Entity dictionary the publish is linked to, or None.
+        :param name: Name of the publish.
+        :param type_id: Id of the publish type, or None.
+        :param task_id: Id of the task the publish is linked to, or None.
+        :returns: List of shotgun dictionaries.
+        """
+        connection = self._get_connection()
+        rows = connection.execute(
+            """
+            SELECT data FROM publishes
+            WHERE entity_type IS ? AND entity_id IS ? AND name IS ?
+            AND type_id IS ? AND task_id IS ?
+            ORDER BY version_number
+            """,
+            (
+                entity["type"] if entity else None,
+                entity["id"] if entity else None,
+                name,
+                type_id,
+                task_id,
+            ),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def update(self, sg_data_list, publish_type_field):
+        """
+        Adds or updates publishes in the index.
+
+        A publish already stored is only replaced by a more recent version
+        of it, based on its updated_at value. If both are the same version,
+        their fields are merged.
+
+        :param sg_data_list: List of shotgun dictionaries. They need to hold
+                             the updated_at field to be stored.
+        :param publish_type_field: Name of the field holding the publish type.
+        """
+        sg_data_list = [
+            utils.convert_timestamps(sg_data)
+            for sg_data in sg_data_list
+            if sg_data.get("updated_at") is not None
+        ]
+        if not sg_data_list:
+            return
+
+        connection = self._get_connection()
+        with connection:
+            # take the write lock up front so that the publishes can't be
+            # updated by another process in the meantime
+            connection.execute("BEGIN IMMEDIATE")
+            stored = self.get_publishes([sg_data["id"] for sg_data in sg_data_list])
+
+            rows = []
+            for sg_data in sg_data_list:
+                stored_data = stored.get(sg_data["id"])
+                if stored_data is not None:
+                    if stored_data.get("updated_at") > sg_data["updated_at"]:
+                        continue
+                    if stored_data.get("updated_at") == sg_data["updated_at"]:
+                        stored_data.update(sg_data)
+                        sg_data = stored_data
+
+                entity = sg_data.get("entity")
+                publish_type = sg_data.get(publish_type_field)
+                task = sg_data.get("task")
+                rows.append(
+                    (
+                        sg_data["id"],
+                        entity["type"] if entity else None,
+                        entity["id"] if entity else None,
+                        sg_data.get("name"),
+                        publish_type["id"] if publish_type else None,
+                        task["id"] if task else None,
+                        sg_data.get("version_number"),
+                        sg_data["updated_at"],
+                        json.dumps(sg_data),
+                    )
+                )
+
+            connection.executemany(
+                "INSERT OR REPLACE INTO publishes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def remove(self, publish_ids):
+        """
+        Removes publishes from the index.
+
+        :param publish_ids: List of publish ids.
+        """
+        connection = self._get_connection()
+        with connection:
+            connection.executemany(
+                "DELETE FROM publishes WHERE id = ?", [(x,) for x in publish_ids]
+            )
+
+    def sync(self, sg, publish_entity_type, publish_ids, fields, publish_type_field):
+        """
+        Returns the given publishes, reading them from the index when the
+        stored version is up to date. Only the publishes which are missing
+        or outdated are retrieved in full from Shotgun, after which they are
+        stored in the index. Publishes which don't exist anymore are removed.
+
+        :param sg: Shotgun API handle to use for the queries.
+        :param publish_entity_type: Either PublishedFile or TankPublishedFile.
+        :param publish_ids: List of publish ids.
+        :param fields: List of fields to retrieve for each publish.
+        :param publish_type_field: Name of the field holding the publish type.
+        :returns: List of shotgun dictionaries, in the same order as the ids.
+        """
+        # find out which version of each publish is current
+        current = {}
+        chunk_size = constants.PUBLISH_ID_QUERY_CHUNK_SIZE
+        for start in range(0, len(publish_ids), chunk_size):
+            sg_filters = [["id", "in", publish_ids[start : start + chunk_size]]]
+            for sg_data in sg.find(publish_entity_type, sg_filters, ["updated_at"]):
+                current[sg_data["id"]] = utils.get_timestamp(sg_data["updated_at"])
+
+        self.remove([x for x in publish_ids if x not in current])
+
+        publishes = self.get_publishes(list(current), fields)
+        outdated_ids = [
+            x
+            for x in current
+            if x not in publishes or publishes[x].get("updated_at") != current[x]
+        ]
+
+        chunk_fields = list(fields) + ["updated_at"]
+        for start in range(0, len(outdated_ids), chunk_size):
+            sg_filters = [["id", "in", outdated_ids[start : start + chunk_size]]]
+            sg_data_list = sg.find(publish_entity_type, sg_filters, chunk_fields)
+            self.update(sg_data_list, publish_type_field)
+            for sg_data in sg_data_list:
+                publishes[sg_data["id"]] = utils.convert_timestamps(sg_data)
+
+        return [publishes[x] for x in publish_ids if x in publishes]
+
+    def _get_connection(self):
+        """
+        Returns the database connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=self.LOCK_TIMEOUT, isolation_level=None
+            )
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,208 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import constants
+from .lru_cache import LRUCache
+
+
+class PublishPrefetcher(QtCore.QObject):
+    """
+    Retrieves the publishes of the tree view items next to the selected one
+    ahead of time, so that they are held in memory by the publish model when
+    the user navigates to them.
+
+    The neighbours of the selection are its children and its siblings, the
+    closest ones first. Prefetch queries run with a lower priority than any
+    other background task and are cancelled as soon as the selection changes
+    or the publish model starts loading data.
+    """
+
+    # lower than the default priority used by all the other background tasks
+    TASK_PRIORITY = -1
+
+    def __init__(self, publish_model, bg_task_manager, fan_out, budget, parent=None):
+        """
+        :param publish_model: :class:`SgLatestPublishModel` to prefetch publishes for.
+        :param bg_task_manager: Background task manager to run the queries on.
+        :param fan_out: Maximum number of children, and of siblings, to consider.
+        :param budget: Maximum number of queries to run for each selection.
+        :param parent: Parent QObject.
+        """
+        super(PublishPrefetcher, self).__init__(parent)
+
+        self._publish_model = publish_model
+        self._bg_task_manager = bg_task_manager
+        self._fan_out = fan_out
+        self._budget = budget
+
+        self._task_group = None
+        self._selection_count = 0
+        # task id -> shotgun filters of the query
+        self._pending_tasks = {}
+        # most recent queries which have been prefetched
+        self._prefetched_queries = LRUCache(
+            constants.PUBLISH_PREFETCH_MAX_QUERIES, lambda x: 1
+        )
+
+        # counters used to assess how useful prefetching is
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_queries = 0
+
+        self._bg_task_manager.task_completed.connect(self._on_task_completed)
+        self._bg_task_manager.task_failed.connect(self._on_task_failed)
+
+        # prefetch queries must not hold up the queries of the model
+        self._publish_model.data_refreshing.connect(self.stop)
+
+    @property
+    def hit_rate(self):
+        """
+        Ratio of the selections whose publishes had been prefetched.
+        """
+        num_selections = self._num_hits + self._num_misses
+        if num_selections == 0:
+            return 0.0
+        return float(self._num_hits) / num_selections
+
+    def prefetch(self, item, additional_sg_filters):
+        """
+        Called when a tree view item gets selected. Cancels any prefetch in
+        progress and starts prefetching the publishes of its neighbours.
+
+        :param item: Selected item in the tree view.
+        :param additional_sg_filters: List of shotgun filters to add to the
+                                      queries, see SgLatestPublishModel.load_data().
+        """
+        self.stop()
+
+        app = sgtk.platform.current_bundle()
+
+        sg_filters = self._publish_model.get_publish_filters(
+            item, additional_sg_filters
+        )
+        if sg_filters:
+            if str(sg_filters) in self._prefetched_queries:
+                self._num_hits += 1
+            else:
+                self._num_misses += 1
+            app.log_debug(
+                "Publish prefetch: %d hits, %d misses (%.1f%% hit rate), "
+                "%d queries run."
+                % (
+                    self._num_hits,
+                    self._num_misses,
+                    self.hit_rate * 100,
+                    self._num_queries,
+                )
+            )
+
+        self._selection_count += 1
+        self._task_group = "publish_prefetch_%d" % self._selection_count
+
+        num_tasks = 0
+        for neighbour in self._get_neighbours(item):
+            if num_tasks >= self._budget:
+                break
+
+            sg_filters = self._publish_model.get_publish_filters(
+                neighbour, additional_sg_filters
+            )
+            if not sg_filters or self._publish_model.is_result_cached(sg_filters):
+                continue
+
+            uid = self._bg_task_manager.add_task(
+                self._task_find_publishes,
+                priority=self.TASK_PRIORITY,
+                group=self._task_group,
+                task_kwargs={"sg_filters": sg_filters},
+            )
+            self._pending_tasks[uid] = sg_filters
+            num_tasks += 1
+
+    def stop(self):
+        """
+        Cancels any prefetch in progress.
+        """
+        if self._task_group is not None:
+            self._bg_task_manager.stop_task_group(self._task_group)
+            self._task_group = None
+        self._pending_tasks = {}
+
+    def _get_neighbours(self, item):
+        """
+        Returns the children and the siblings of a tree view item, closest first.
+
+        :param item: Item in the tree view.
+        :returns: List of items.
+        """
+        children = [item.child(x) for x in range(min(item.rowCount(), self._fan_out))]
+
+        # note! Because of nasty bug https://bugreports.qt-project.org/browse/PYSIDE-158,
+        # we cannot pull the model directly from the item but have to pull it from
+        # the model index instead.
+        parent = item.parent() or item.index().model().invisibleRootItem()
+        row = item.row()
+        siblings = []
+        distance = 1
+        while len(siblings) < self._fan_out and (
+            row - distance >= 0 or row + distance < parent.rowCount()
+        ):
+            for sibling_row in (row + distance, row - distance):
+                if 0 <= sibling_row < parent.rowCount():
+                    siblings.append(parent.child(sibling_row))
+            distance += 1
+
+        return [x for x in children + siblings[: self._fan_out] if x is not None]
+
+    def _task_find_publishes(self, sg_filters):
+        """
+        Background task retrieving publishes.
+
+        :param sg_filters: Shotgun filters of the query.
+        :returns: list of shotgun dictionaries.
+        """
+        app = sgtk.platform.current_bundle()
+        return self._publish_model.find_publishes(app.shotgun, sg_filters)
+
+    def _on_task_completed(self, uid, group, result):
+        """
+        Slot triggered when a background task completes.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param result: Result returned by the task.
+        """
+        sg_filters = self._pending_tasks.pop(uid, None)
+        if sg_filters is None:
+            return
+
+        self._num_queries += 1
+        self._prefetched_queries.set(str(sg_filters), True)
+        self._publish_model.cache_publishes(sg_filters, result)
+
+    def _on_task_failed(self, uid, group, msg, stack_trace):
+        """
+        Slot triggered when a background task fails.
+
+        :param uid: Unique id of the task.
+        :param group: Group the task belongs to.
+        :param msg: Error message.
+        :param stack_trace: Stack trace of the error.
+        """
+        if self._pending_tasks.pop(uid, None) is None:
+            return
+
+        # prefetching is only an optimization, don't bother the user
+        app = sgtk.platform.current_bundle()
+        app.log_debug("Could not prefetch publishes: %s" % msg)
@@ -0,0 +1,45 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sys
+
+from .lru_cache import LRUCache
+
+
+class PublishResultCache(LRUCache):
+    """
+    Bounded in-memory cache of publish result sets, keyed by query.
+
+    The size of the cache is the estimated memory used by the result sets,
+    in bytes. Result sets older than the maximum age are considered stale
+    and are never returned.
+    """
+
+    def __init__(self, max_size, max_age):
+        """
+        :param max_size: Maximum estimated size of the cache, in bytes.
+        :param max_age: Number of seconds after which a result set is stale.
+        """
+        super(PublishResultCache, self).__init__(max_size, self._estimate_size, max_age)
+
+    @staticmethod
+    def _estimate_size(sg_data_list):
+        """
+        Estimates the memory used by a result set.
+
+        Only the dictionaries and their direct values are accounted for,
+        which is enough to compare result sets with each other.
+        """
+        size = sys.getsizeof(sg_data_list)
+        for sg_data in sg_data_list:
+            size += sys.getsizeof(sg_data)
+            for value in sg_data.values():
+                size += sys.getsizeof(value)
+        return size
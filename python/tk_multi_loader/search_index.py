@@ -0,0 +1,329 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import heapq
+from collections import Counter, defaultdict
+
+
+class SearchIndex(object):
+    """
+    Case insensitive substring search over a set of strings.
+
+    Strings are case folded once, when they are added. Each string is also
+    registered in an inverted index under all the n-grams (sequences of N
+    characters) it contains, so that a query only needs to be compared with
+    the strings which contain all of its n-grams. Queries shorter than N are
+    compared with all the strings.
+
+    When a query extends the previous one, for example when the user types
+    one more character, it is only compared with the strings which matched
+    the previous query.
+    """
+
+    # length of the n-grams
+    N = 3
+
+    def __init__(self):
+        # string -> case folded string
+        self._keys = {}
+        # n-gram -> set of strings containing it
+        self._grams = defaultdict(set)
+        # results of the last query, until strings are added or removed
+        self._last_query = None
+        self._last_key = None
+        self._last_matches = None
+        # number of strings compared with the last query
+        self._num_compared = 0
+
+    def __len__(self):
+        """
+        Number of strings in the index.
+        """
+        return len(self._keys)
+
+    @property
+    def num_compared(self):
+        """
+        Number of strings the last query had to be compared with.
+        """
+        return self._num_compared
+
+    def __contains__(self, text):
+        """
+        Checks if a string is in the index.
+        """
+        return text in self._keys
+
+    def add(self, text):
+        """
+        Adds a string to the index.
+
+        :param text: String to add.
+        """
+        if text in self._keys:
+            return
+
+        key = text.casefold()
+        self._keys[text] = key
+        for gram in self._get_grams(key):
+            self._grams[gram].add(text)
+        self._last_query = None
+
+    def remove(self, text):
+        """
+        Removes a string from the index.
+
+        :param text: String to remove.
+        """
+        key = self._keys.pop(text, None)
+        if key is None:
+            return
+
+        for gram in self._get_grams(key):
+            texts = self._grams[gram]
+            texts.discard(text)
+            if not texts:
+                del self._grams[gram]
+        self._last_query = None
+
+    def clear(self):
+        """
+        Removes all the strings from the index.
+        """
+        self._keys = {}
+        self._grams = defaultdict(set)
+        self._last_query = None
+
+    def search(self, query):
+        """
+        Returns the strings containing the query, ignoring case.
+
+        The result of the last query is memoized, so that it can cheaply be
+        requested again and again, for example for each row of a view.
+
+        :param query: String to look for.
+        :returns: Set of strings. It must not be modified.
+        """
+        if query == self._last_query:
+            return self._last_matches
+
+        key = query.casefold()
+        if self._last_query is not None and self._last_key in key:
+            # the query is a refinement of the previous one, only the strings
+            # which matched the previous query can match this one.
+            candidates = self._last_matches
+        elif len(key) < self.N:
+            candidates = self._keys
+        else:
+            # intersect the smallest sets first
+            gram_sets = sorted(
+                (self._grams.get(gram, set()) for gram in self._get_grams(key)),
+                key=len,
+            )
+            candidates = set.intersection(*gram_sets)
+
+        # strings containing all the n-grams of the query don't necessarily
+        # contain the query itself.
+        self._last_matches = set(x for x in candidates if key in self._keys[x])
+        self._last_query = query
+        self._last_key = key
+        self._num_compared = len(candidates)
+        return self._last_matches
+
+    def _get_grams(self, key):
+        """
+        Returns the distinct n-grams of a case folded string.
+        """
+        return set(key[x : x + self.N] for x in range(len(key) - self.N + 1))
+
+
+class TreeSearchIndex(object):
+    """
+    Case insensitive substring search over the nodes of a tree.
+
+    The tree is described by the paths of its leaves, each path being a tuple
+    of the texts of the nodes from the top of the tree down to the leaf. A
+    search returns the paths of the matching nodes and of all their ancestors,
+    which are the nodes to display for the matching nodes to be visible.
+
+    The index can also run ranked fuzzy searches, matching the characters of
+    the query against the texts of the nodes joined with the texts of their
+    ancestors, so that "sh010cmp" finds the comp task of shot sh010. Each node
+    is registered under the trigrams of its joined path, and nodes are ranked
+    by the ratio of the trigrams of the query they contain.
+
+    The index doesn't depend on Qt and can be built in a background thread.
+    """
+
+    # length of the n-grams used for fuzzy searches
+    N = 3
+    # minimum ratio of the n-grams of a query a node must contain to match
+    FUZZY_MIN_RATIO = 0.5
+    # n-grams contained in a larger ratio of the nodes tell little about them
+    # and are ignored, unless the query has no others.
+    FUZZY_COMMON_RATIO = 0.2
+
+    def __init__(self, leaf_paths, fuzzy=False):
+        """
+        :param leaf_paths: List of tuples of strings.
+        :param fuzzy: True to index the nodes for fuzzy searches as well.
+        """
+        self._text_index = SearchIndex()
+        # node text -> paths of the nodes with this text
+        self._paths_by_text = defaultdict(list)
+
+        # paths and normalized joined paths of the nodes, by node id
+        self._fuzzy = fuzzy
+        self._node_paths = []
+        self._documents = []
+        # n-gram -> ids of the nodes containing it, in increasing order
+        self._postings = defaultdict(list)
+        # number of nodes the last fuzzy search had to count n-grams for
+        self._num_compared = 0
+
+        node_paths = set()
+        for leaf_path in leaf_paths:
+            for depth in range(1, len(leaf_path) + 1):
+                node_path = leaf_path[:depth]
+                if node_path in node_paths:
+                    continue
+                node_paths.add(node_path)
+                self._paths_by_text[node_path[-1]].append(node_path)
+                self._text_index.add(node_path[-1])
+                if fuzzy:
+                    self._add_fuzzy_node(node_path)
+        self._num_nodes = len(node_paths)
+
+    def __len__(self):
+        """
+        Number of nodes in the index.
+        """
+        return self._num_nodes
+
+    @property
+    def fuzzy(self):
+        """
+        True if the index can run fuzzy searches.
+        """
+        return self._fuzzy
+
+    @property
+    def num_compared(self):
+        """
+        Number of nodes the last fuzzy search had to compare with the query.
+        """
+        return self._num_compared
+
+    def search(self, query):
+        """
+        Returns the nodes to display for a query.
+
+        :param query: String to look for.
+        :returns: Set of node paths, for the nodes whose text contains the
+                  query and for all their ancestors.
+        """
+        visible_paths = set()
+        for text in self._text_index.search(query):
+            for node_path in self._paths_by_text[text]:
+                for depth in range(1, len(node_path) + 1):
+                    visible_paths.add(node_path[:depth])
+        return visible_paths
+
+    def fuzzy_search(self, query, max_results):
+        """
+        Returns the nodes best matching a query, best first.
+
+        Nodes are scored with the ratio of the n-grams of the query found in
+        their joined path. Nodes whose joined path contains all the characters
+        of the query in order score one more, and one more again if it
+        contains the query itself. Among nodes with the same score, the ones
+        with the shortest paths come first.
+
+        Queries too short to hold an n-gram are run as substring searches
+        against the texts of the nodes.
+
+        :param query: String to look for.
+        :param max_results: Maximum number of nodes to return.
+        :returns: List of (node path, score) tuples.
+        """
+        key = self._normalize(query)
+        grams = self._get_grams(key)
+        if not self._fuzzy or not grams:
+            node_paths = []
+            for text in self._text_index.search(query):
+                node_paths.extend(self._paths_by_text[text])
+            node_paths = heapq.nsmallest(
+                max_results, node_paths, key=lambda x: (len(x), x)
+            )
+            self._num_compared = self._text_index.num_compared
+            return [(x, 1.0) for x in node_paths]
+
+        # nodes are looked up with the n-grams of the query which only a few
+        # nodes contain, the others would only add noise and work.
+        postings = sorted((self._postings.get(x, []) for x in grams), key=len)
+        max_postings = self.FUZZY_COMMON_RATIO * len(self._node_paths)
+        postings = [x for x in postings if len(x) <= max_postings] or postings[:1]
+
+        # count the n-grams found in each node, in C
+        hits = Counter()
+        for node_ids in postings:
+            hits.update(node_ids)
+        self._num_compared = len(hits)
+
+        # only score the nodes with the most hits, a few more than needed
+        # as scores may reorder them.
+        candidates = heapq.nlargest(max_results * 4, hits, key=hits.get)
+
+        min_hits = self.FUZZY_MIN_RATIO * len(grams)
+        results = []
+        for node_id in candidates:
+            document = self._documents[node_id]
+            num_hits = sum(1 for x in grams if x in document)
+            if num_hits < min_hits:
+                continue
+            score = float(num_hits) / len(grams)
+            if key in document:
+                score += 2
+            else:
+                characters = iter(document)
+                if all(x in characters for x in key):
+                    score += 1
+            results.append((-score, len(document), node_id))
+        results.sort()
+
+        return [
+            (self._node_paths[node_id], -score)
+            for (score, _, node_id) in results[:max_results]
+        ]
+
+    def _add_fuzzy_node(self, node_path):
+        """
+        Registers a node under the n-grams of its joined path.
+        """
+        node_id = len(self._node_paths)
+        document = self._normalize("".join(node_path))
+        self._node_paths.append(node_path)
+        self._documents.append(document)
+        for gram in self._get_grams(document):
+            self._postings[gram].append(node_id)
+
+    @staticmethod
+    def _normalize(text):
+        """
+        Case folds a string and strips spaces, underscores and punctuation,
+        which artists tend to leave out when typing quickly.
+        """
+        return "".join(x for x in text.casefold() if x.isalnum())
+
+    def _get_grams(self, key):
+        """
+        Returns the distinct n-grams of a normalized string.
+        """
+        return set(key[x : x + self.N] for x in range(len(key) - self.N + 1))
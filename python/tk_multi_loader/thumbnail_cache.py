@@ -0,0 +1,114 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import hashlib
+import os
+import uuid
+
+from sgtk.platform.qt import QtGui
+
+
+def get_thumbnail_cache(bundle):
+    """
+    Returns the cache of composited thumbnails of the given bundle, if
+    enabled with the cache_thumbnail_composites setting.
+
+    :param bundle: The loader app.
+    :returns: :class:`ThumbnailCache` or None.
+    """
+    if not bundle.get_setting("cache_thumbnail_composites", False):
+        return None
+
+    return ThumbnailCache(os.path.join(bundle.cache_location, "thumbnail_composites"))
+
+
+class ThumbnailCache(object):
+    """
+    Disk cache of thumbnails composited for display, e.g. on top of the
+    folder icon.
+
+    Composited thumbnails are content addressed: they are keyed by the hash
+    of the source thumbnail, the kind of compositing and the size of the
+    result, so that they never need to be invalidated. They are stored as
+    PNG files, one per key, which can be read from any thread.
+    """
+
+    def __init__(self, folder):
+        """
+        :param folder: Folder to store the composited thumbnails in.
+        """
+        self._folder = folder
+
+    def get_key(self, source_path, variant, width, height):
+        """
+        Returns the key of a composited thumbnail.
+
+        :param source_path: Path to the source thumbnail.
+        :param variant: Name of the kind of compositing, e.g. "folder".
+        :param width: Width of the composited thumbnail.
+        :param height: Height of the composited thumbnail.
+        :returns: Key string or None if the source thumbnail can't be read.
+        """
+        try:
+            with open(source_path, "rb") as fh:
+                source_hash = hashlib.sha1(fh.read()).hexdigest()
+        except (IOError, OSError):
+            return None
+
+        return "%s_%s_%dx%d" % (source_hash, variant, width, height)
+
+    def load(self, key):
+        """
+        Returns the composited thumbnail stored for a key.
+
+        :param key: Key of the composited thumbnail, see get_key().
+        :returns: QImage or None if there is no thumbnail for this key.
+        """
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return None
+
+        image = QtGui.QImage(path)
+        if image.isNull():
+            return None
+        return image
+
+    def store(self, key, image):
+        """
+        Stores a composited thumbnail. The file is written under a temporary
+        name first so that readers never get a partial file.
+
+        :param key: Key of the composited thumbnail, see get_key().
+        :param image: QImage to store.
+        :returns: True if the thumbnail was stored.
+        """
+        path = self._get_path(key)
+        folder = os.path.dirname(path)
+        tmp_path = "%s.%s.tmp" % (path, uuid.uuid4().hex)
+        try:
+            if not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            if not image.save(tmp_path, "PNG"):
+                return False
+            os.replace(tmp_path, path)
+        except OSError:
+            # the cache is only an optimization
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        return True
+
+    def _get_path(self, key):
+        """
+        Returns the path of the file of a composited thumbnail. Files are
+        spread across sub folders to keep folders reasonably sized.
+        """
+        return os.path.join(self._folder, key[:2], "%s.png" % key)
@@ -8,9 +8,23 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import datetime
+import itertools
+import operator
+import time
+
 import sgtk
+from collections import defaultdict
 from sgtk.platform.qt import QtCore, QtGui
 
+from . import constants
+
+try:
+    import numpy
+except ImportError:
+    # large lists of publishes are reduced in pure python instead
+    numpy = None
+
 
 class ResizeEventFilter(QtCore.QObject):
     """
@@ -287,6 +301,305 @@ def filter_publishes(app, sg_data_list):
     return sg_data_list
 
 
+def get_publish_stream_key(sg_data, publish_type_field):
+    """
+    Returns the key of the publish stream a publish belongs to, i.e. the
+    fields shared by all its versions: project, entity, name, task and type.
+
+    :param sg_data: Shotgun data dictionary for a publish.
+    :param publish_type_field: Name of the field holding the publish type.
+    :returns: Hashable key.
+    """
+    key = [sg_data.get("name")]
+    for field in ("project", "entity", "task", publish_type_field):
+        link = sg_data.get(field)
+        key.append((link["type"], link["id"]) if link else None)
+    return tuple(key)
+
+
+def get_latest_publishes(sg_data_list, publish_type_field):
+    """
+    Reduces a list of publishes to the latest version of each publish.
+
+    See :meth:`reduce_publishes` for details.
+
+    :param sg_data_list: list of shotgun dictionaries, as returned by the
+                         find() call.
+    :param publish_type_field: Name of the field holding the publish type.
+    :returns: list of shotgun dictionaries, one per publish.
+    """
+    (latest_publishes, _) = reduce_publishes(sg_data_list, publish_type_field)
+    return latest_publishes
+
+
+def reduce_publishes(sg_data_list, publish_type_field):
+    """
+    Reduces a list of publishes to the latest version of each publish and
+    counts how many of these latest publishes there are for each type.
+
+    Publishes are grouped by name, type and task and are expected to be
+    sorted in ascending creation order, so that the last publish seen for
+    a group is the latest one.
+
+    For example, if there are these publishes:
+    name FOO, version 1, task ANIM, type XXX
+    name FOO, version 2, task ANIM, type XXX
+    name FOO, version 3, task ANIM, type XXX
+    name FOO, version 1, task ANIM, type YYY
+    name FOO, version 2, task ANIM, type YYY
+    name FOO, version 5, task LAY,  type YYY
+    name FOO, version 6, task LAY,  type YYY
+    name FOO, version 7, task LAY,  type YYY
+
+    three items are returned:
+    - Foo v3 (type XXX)
+    - Foo v2 (type YYY, task ANIM)
+    - Foo v7 (type YYY, task LAY)
+
+    Each returned publish also gets a ``task_uniqueness`` flag, which is
+    False if the list contains other publishes with the same name and the
+    same type, for example publishes with the same name but a different task.
+
+    Large lists are reduced with NumPy when it is available.
+
+    :param sg_data_list: list of shotgun dictionaries, as returned by the
+                         find() call.
+    :param publish_type_field: Name of the field holding the publish type.
+    :returns: Tuple of the list of latest publishes, in the order their
+              name, type and task first appear in the input list, and of a
+              dictionary of the number of latest publishes keyed by type id.
+    """
+    if (
+        numpy is not None
+        and len(sg_data_list) >= constants.VECTORIZED_REDUCTION_MIN_ROWS
+    ):
+        return _reduce_publishes_vectorized(sg_data_list, publish_type_field)
+
+    # FIRST PASS!
+    # get a dict with only the latest versions, grouped by type and task
+    unique_data = {}
+    name_type_aggregates = defaultdict(int)
+
+    for sg_item in sg_data_list:
+
+        # get the associated type
+        type_id = None
+        type_link = sg_item[publish_type_field]
+        if type_link:
+            type_id = type_link["id"]
+
+        # also get the associated task
+        task_id = None
+        task_link = sg_item["task"]
+        if task_link:
+            task_id = task_link["id"]
+
+        # key publishes in dict by type and name
+        unique_data[(sg_item["name"], type_id, task_id)] = sg_item
+
+        # count how many items of this type we have
+        name_type_aggregates[(sg_item["name"], type_id)] += 1
+
+    # SECOND PASS
+    # We now have the latest versions only, flag the ones that are
+    # not unique for their name and type and count them by type.
+    latest_publishes = []
+    type_id_aggregates = defaultdict(int)
+    for (name, type_id, _), sg_item in unique_data.items():
+        sg_item["task_uniqueness"] = name_type_aggregates[(name, type_id)] <= 1
+        type_id_aggregates[type_id] += 1
+        latest_publishes.append(sg_item)
+
+    return latest_publishes, type_id_aggregates
+
+
+def _reduce_publishes_vectorized(sg_data_list, publish_type_field):
+    """
+    NumPy implementation of :meth:`reduce_publishes`.
+
+    The name, type and task of the publishes are extracted into integer
+    columns which are combined into a single key per publish. The latest
+    publish of each key and the name and type counts are then computed
+    with array operations instead of dictionary lookups.
+    """
+    num_rows = len(sg_data_list)
+
+    # extract the key columns. Names are replaced with integer codes and
+    # missing links with -1, which is not a valid id.
+    names = list(map(operator.itemgetter("name"), sg_data_list))
+    name_codes = dict(zip(dict.fromkeys(names), itertools.count()))
+    names = numpy.fromiter(map(name_codes.__getitem__, names), numpy.int64, num_rows)
+    type_ids = numpy.fromiter(
+        (
+            x["id"] if x else -1
+            for x in map(operator.itemgetter(publish_type_field), sg_data_list)
+        ),
+        numpy.int64,
+        num_rows,
+    )
+    task_ids = numpy.fromiter(
+        (x["id"] if x else -1 for x in map(operator.itemgetter("task"), sg_data_list)),
+        numpy.int64,
+        num_rows,
+    )
+
+    # factorize the ids so that the columns can be combined into a single key
+    (type_values, type_codes) = numpy.unique(type_ids, return_inverse=True)
+    (_, task_codes) = numpy.unique(task_ids, return_inverse=True)
+    name_type_keys = names * len(type_values) + type_codes
+    keys = name_type_keys * (task_codes.max() + 1) + task_codes
+
+    # the first row of each key gives the order of the results and the last
+    # row the latest publish. Both lists are in the same sorted key order.
+    (_, first_rows) = numpy.unique(keys, return_index=True)
+    (_, last_rows) = numpy.unique(keys[::-1], return_index=True)
+    latest_rows = (num_rows - 1 - last_rows)[numpy.argsort(first_rows)]
+
+    # number of publishes with the same name and type as each publish
+    (_, name_type_codes, name_type_counts) = numpy.unique(
+        name_type_keys, return_inverse=True, return_counts=True
+    )
+    task_uniqueness = name_type_counts[name_type_codes[latest_rows]] <= 1
+
+    type_counts = numpy.bincount(type_codes[latest_rows], minlength=len(type_values))
+    type_id_aggregates = defaultdict(int)
+    for type_id, count in zip(type_values.tolist(), type_counts.tolist()):
+        if count:
+            type_id_aggregates[None if type_id == -1 else type_id] = count
+
+    latest_publishes = []
+    for row, is_unique in zip(latest_rows.tolist(), task_uniqueness.tolist()):
+        sg_item = sg_data_list[row]
+        sg_item["task_uniqueness"] = is_unique
+        latest_publishes.append(sg_item)
+
+    return latest_publishes, type_id_aggregates
+
+
+def get_timestamp(value):
+    """
+    Returns a date time value as a unix timestamp. Date time values are
+    datetime objects when returned by Shotgun but are converted to unix
+    timestamps when stored in the model cache.
+
+    :param value: datetime, unix timestamp or None.
+    :returns: unix timestamp or None.
+    """
+    if isinstance(value, datetime.datetime):
+        return time.mktime(value.timetuple())
+    return value
+
+
+def convert_timestamps(sg_data):
+    """
+    Returns a copy of a shotgun dictionary with its date time values
+    converted to unix timestamps, the way they are stored in the model
+    cache. See :meth:`get_timestamp`.
+
+    :param sg_data: Shotgun data dictionary.
+    :returns: Shotgun data dictionary.
+    """
+    return dict((field, get_timestamp(value)) for (field, value) in sg_data.items())
+
+
+def get_linked_filters(filters, link_field, entity_type):
+    """
+    Converts filters on an entity type into filters on the publishes linked
+    to entities of that type, by prefixing each field with the publish link.
+
+    For example, [["sg_sequence", "is", seq]] on Shot becomes
+    [["entity.Shot.sg_sequence", "is", seq]].
+
+    :param filters: List of shotgun filters on the entity type.
+    :param link_field: Publish field linking to the entity, e.g. "entity".
+    :param entity_type: Entity type the filters apply to.
+    :returns: List of shotgun filters on publishes or None if the filters
+              cannot be expressed through the publish link.
+    """
+    linked_filters = []
+    for sg_filter in filters:
+        if isinstance(sg_filter, dict):
+            sub_filters = get_linked_filters(
+                sg_filter["filters"], link_field, entity_type
+            )
+            if sub_filters is None:
+                return None
+            linked_filters.append(
+                {
+                    "filter_operator": sg_filter["filter_operator"],
+                    "filters": sub_filters,
+                }
+            )
+        elif sg_filter[0].startswith("$FROM$"):
+            # reverse links can't be followed from the publish
+            return None
+        else:
+            linked_filters.append(
+                ["%s.%s.%s" % (link_field, entity_type, sg_filter[0])]
+                + list(sg_filter[1:])
+            )
+
+    return linked_filters
+
+
+def find_publishes_by_ids(sg, publish_entity_type, publish_ids, fields):
+    """
+    Retrieves publishes from Shotgun given their ids. Long lists of ids
+    are split across several queries to keep each of them reasonably sized.
+
+    :param sg: Shotgun API handle to use for the queries.
+    :param publish_entity_type: Either PublishedFile or TankPublishedFile.
+    :param publish_ids: List of publish ids to retrieve.
+    :param fields: List of fields to retrieve for each publish.
+    :returns: list of shotgun dictionaries, in the same order as the ids.
+              Publishes which could not be found are omitted.
+    """
+    chunk_size = constants.PUBLISH_ID_QUERY_CHUNK_SIZE
+    sg_data_by_id = {}
+    for start in range(0, len(publish_ids), chunk_size):
+        sg_filters = [["id", "in", publish_ids[start : start + chunk_size]]]
+        for sg_data in sg.find(publish_entity_type, sg_filters, fields):
+            sg_data_by_id[sg_data["id"]] = sg_data
+
+    return [sg_data_by_id[x] for x in publish_ids if x in sg_data_by_id]
+
+
+def find_latest_publishes(
+    sg, publish_entity_type, sg_filters, publish_type_field, fields
+):
+    """
+    Retrieves the latest version of each publish matching the given filters.
+
+    Rather than retrieving every version in full, a lightweight listing of
+    all the versions is retrieved first to work out the latest ones, whose
+    complete records are then retrieved by id.
+
+    :param sg: Shotgun API handle to use for the queries.
+    :param publish_entity_type: Either PublishedFile or TankPublishedFile.
+    :param sg_filters: Shotgun filters matching the publishes.
+    :param publish_type_field: Name of the field holding the publish type.
+    :param fields: List of fields to retrieve for each latest publish.
+    :returns: list of shotgun dictionaries, with their ``task_uniqueness``
+              flag set, see :meth:`reduce_publishes`.
+    """
+    key_data_list = sg.find(
+        publish_entity_type,
+        sg_filters,
+        [publish_type_field] + constants.LATEST_PUBLISH_KEY_FIELDS,
+        order=[{"field_name": "created_at", "direction": "asc"}],
+    )
+    latest_publishes = get_latest_publishes(key_data_list, publish_type_field)
+
+    records = find_publishes_by_ids(
+        sg, publish_entity_type, [x["id"] for x in latest_publishes], fields
+    )
+    # the uniqueness flag was computed against all the versions
+    task_uniqueness = dict((x["id"], x["task_uniqueness"]) for x in latest_publishes)
+    for record in records:
+        record["task_uniqueness"] = task_uniqueness[record["id"]]
+    return records
+
+
 def resolve_filters(filters):
     """
     When passed a list of filters, it will resolve strings found in the filters using the context.
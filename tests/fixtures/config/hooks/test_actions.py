@@ -95,6 +95,33 @@ class TestActions(HookBaseClass):
 
         return action_instances
 
+    def generate_actions_for_publishes(self, sg_publish_data_list, actions, ui_area):
+        """
+        Returns the action instances for several publishes of the same type.
+
+        Keeps track of the publishes and of the UI area of each call, so that
+        tests can check how the publishes were batched.
+
+        :param sg_publish_data_list: List of Shotgun data dictionaries with all the
+                                     standard publish fields.
+        :param actions: List of action strings which have been defined in the app configuration.
+        :param ui_area: String denoting the UI Area (see generate_actions).
+        :returns List holding a list of dictionaries for each publish.
+        """
+        if not hasattr(sgtk, "_hook_batches"):
+            sgtk._hook_batches = []
+
+        sgtk._hook_batches.append([x["id"] for x in sg_publish_data_list])
+
+        if not hasattr(sgtk, "_hook_ui_areas"):
+            sgtk._hook_ui_areas = []
+
+        sgtk._hook_ui_areas.append(ui_area)
+
+        return super(TestActions, self).generate_actions_for_publishes(
+            sg_publish_data_list, actions, ui_area
+        )
+
     def execute_multiple_actions(self, actions):
         """
         Executes the specified action on a list of items.
@@ -0,0 +1,233 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from collections import OrderedDict
+from unittest import mock
+
+from tank_test.tank_test_base import setUpModule  # noqa
+
+from test_api import AppTestBase
+
+
+class TestLoaderActionManager(AppTestBase):
+    """
+    Tests the cache of the QActions of single publishes.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestLoaderActionManager, self).setUp()
+
+        from sgtk.platform.qt import QtGui
+
+        if not hasattr(QtGui, "QApplication"):
+            self.skipTest("Qt is not available.")
+        self.qt_app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.constants = tk_multi_loader.constants
+        self.action_manager = (
+            tk_multi_loader.loader_action_manager.LoaderActionManager()
+        )
+
+        # the hook returns a single action for any publish
+        self.get_actions = mock.Mock(side_effect=self._get_actions)
+        self.action_manager._loader_manager = mock.Mock()
+        self.action_manager._loader_manager.get_actions_for_publishes = self.get_actions
+        self.ui_area = self.action_manager.UI_AREA_MAIN
+
+    def _get_actions(self, sg_data_list, ui_area):
+        """
+        Mocks LoaderManager.get_actions_for_publishes().
+        """
+        return OrderedDict(
+            [
+                (
+                    "import",
+                    [
+                        {
+                            "sg_publish_data": sg_data,
+                            "action": {
+                                "caption": "Import",
+                                "description": "Imports the publish.",
+                                "params": None,
+                            },
+                        }
+                        for sg_data in sg_data_list
+                    ],
+                )
+            ]
+        )
+
+    def _make_publish(self, publish_id, updated_at=1000.0, details=True):
+        """
+        Returns the data of a publish as held by the models.
+
+        :param publish_id: Id of the publish.
+        :param updated_at: Unix time stamp of the last update of the publish.
+        :param details: True to include the detail fields.
+        """
+        sg_data = {
+            "type": self.published_file_entity_type,
+            "id": publish_id,
+            "name": "publish%d" % publish_id,
+            "updated_at": updated_at,
+        }
+        if details:
+            for field in self.constants.PUBLISHED_FILES_DETAIL_FIELDS:
+                sg_data[field] = None
+        return sg_data
+
+    def test_cache_hit(self):
+        """
+        Ensures the actions of a publish are only built once.
+        """
+        sg_data = self._make_publish(1)
+        actions = self.action_manager.get_actions_for_publish(sg_data, self.ui_area)
+        self.assertEqual(len(actions), 1)
+
+        cached_actions = self.action_manager.get_actions_for_publish(
+            dict(sg_data), self.ui_area
+        )
+        self.assertEqual(cached_actions, actions)
+        self.assertIs(cached_actions[0], actions[0])
+        self.assertEqual(self.get_actions.call_count, 1)
+
+        # callers may extend the list they get
+        cached_actions.append(None)
+        self.assertEqual(
+            len(self.action_manager.get_actions_for_publish(sg_data, self.ui_area)), 1
+        )
+
+        # each UI area has its own actions
+        self.action_manager.get_actions_for_publish(
+            sg_data, self.action_manager.UI_AREA_HISTORY
+        )
+        self.assertEqual(self.get_actions.call_count, 2)
+
+    def test_context_change(self):
+        """
+        Ensures the actions are built again once the context has changed.
+        """
+        sg_data = self._make_publish(1)
+        actions = self.action_manager.get_actions_for_publish(sg_data, self.ui_area)
+
+        context = self.tk.context_from_entity(self.shot["type"], self.shot["id"])
+        with mock.patch.object(
+            type(self.app), "context", new_callable=mock.PropertyMock
+        ) as app_context:
+            app_context.return_value = context
+            new_actions = self.action_manager.get_actions_for_publish(
+                sg_data, self.ui_area
+            )
+            self.assertIsNot(new_actions[0], actions[0])
+            self.assertEqual(self.get_actions.call_count, 2)
+
+            # the new context is cached in turn
+            self.action_manager.get_actions_for_publish(sg_data, self.ui_area)
+            self.assertEqual(self.get_actions.call_count, 2)
+
+    def test_execute(self):
+        """
+        Ensures the actions are built again once an action has been executed.
+        """
+        sg_data = self._make_publish(1)
+        actions = self.action_manager.get_actions_for_publish(sg_data, self.ui_area)
+
+        executed = []
+        self.action_manager.post_execute_action.connect(executed.append)
+        actions[0].trigger()
+        self.assertEqual(executed, [actions[0]])
+        (hook_actions,) = (
+            self.action_manager._loader_manager.execute_multiple_actions.call_args[0]
+        )
+        self.assertEqual([x["sg_publish_data"] for x in hook_actions], [sg_data])
+
+        new_actions = self.action_manager.get_actions_for_publish(sg_data, self.ui_area)
+        self.assertIsNot(new_actions[0], actions[0])
+        self.assertEqual(self.get_actions.call_count, 2)
+
+    def test_execute_without_details(self):
+        """
+        Ensures the detail fields of a publish are retrieved when one of its
+        actions is executed, if they weren't before.
+        """
+        sg_data = self._make_publish(1, details=False)
+        details = self._make_publish(1)
+        details["task.Task.content"] = "task_content"
+        loader_manager = self.action_manager._loader_manager
+        loader_manager.get_publishes.return_value = [details]
+
+        actions = self.action_manager.get_actions_for_publish(sg_data, self.ui_area)
+        actions[0].trigger()
+
+        loader_manager.get_publishes.assert_called_once_with(
+            [1], self.constants.PUBLISHED_FILES_DETAIL_FIELDS
+        )
+        (hook_actions,) = loader_manager.execute_multiple_actions.call_args[0]
+        self.assertEqual(
+            hook_actions[0]["sg_publish_data"]["task.Task.content"], "task_content"
+        )
+        self.assertEqual(hook_actions[0]["sg_publish_data"]["name"], "publish1")
+        # the data the actions were built with is left untouched
+        self.assertNotIn("task.Task.content", sg_data)
+
+    def test_max_size(self):
+        """
+        Ensures only the actions of the most recently used publishes are kept.
+        """
+        max_size = self.constants.PUBLISH_ACTIONS_CACHE_MAX_SIZE
+        for publish_id in range(max_size + 1):
+            self.action_manager.get_actions_for_publish(
+                self._make_publish(publish_id), self.ui_area
+            )
+            if publish_id == 0:
+                continue
+            # keep the second publish the most recently used
+            self.action_manager.get_actions_for_publish(
+                self._make_publish(1), self.ui_area
+            )
+        self.assertEqual(len(self.action_manager._publish_actions), max_size)
+        self.assertEqual(self.get_actions.call_count, max_size + 1)
+
+        # the first publish was evicted, the second one was kept
+        self.action_manager.get_actions_for_publish(self._make_publish(1), self.ui_area)
+        self.assertEqual(self.get_actions.call_count, max_size + 1)
+        self.action_manager.get_actions_for_publish(self._make_publish(0), self.ui_area)
+        self.assertEqual(self.get_actions.call_count, max_size + 2)
+
+    def test_cache_key(self):
+        """
+        Ensures the actions are built again once the details of a publish have
+        been retrieved or once it has been updated.
+        """
+        self.action_manager.get_actions_for_publish(
+            self._make_publish(1, details=False), self.ui_area
+        )
+        self.action_manager.get_actions_for_publish(
+            self._make_publish(1, details=True), self.ui_area
+        )
+        self.assertEqual(self.get_actions.call_count, 2)
+
+        self.action_manager.get_actions_for_publish(
+            self._make_publish(1, updated_at=2000.0), self.ui_area
+        )
+        self.assertEqual(self.get_actions.call_count, 3)
+
+        # both versions are still cached
+        self.action_manager.get_actions_for_publish(
+            self._make_publish(1, details=False), self.ui_area
+        )
+        self.action_manager.get_actions_for_publish(
+            self._make_publish(1, updated_at=2000.0), self.ui_area
+        )
+        self.assertEqual(self.get_actions.call_count, 3)
@@ -7,7 +7,9 @@
 # By accessing, using, copying or modifying this work you indicate your
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
+import copy
 import os
+from unittest import mock
 
 import sgtk
 from tank_test.tank_test_base import TankTestBase, setUpModule  # noqa
@@ -222,6 +224,68 @@ class TestApi(AppTestBase):
             assert action["action"]["description"] == "My Description2"
             assert action["action"]["params"] is None
 
+    def test_get_actions_for_publishes_batched(self):
+        """
+        Test that the actions of many PublishedFiles are generated with one hook
+        call per publish type
+        """
+        publish_file4 = dict(self.publish_file1, id=4, code="publish4")
+
+        sgtk._hook_batches = []
+        loader_actions = self.manager.get_actions_for_publishes(
+            [self.publish_file1, self.publish_file3, publish_file4],
+            self.manager.UI_AREA_MAIN,
+        )
+
+        assert sorted(sgtk._hook_batches) == [[1, 4], [3]]
+        assert list(loader_actions.keys()) == ["test_action2"]
+        assert [x["sg_publish_data"]["id"] for x in loader_actions["test_action2"]] == [
+            1,
+            3,
+            4,
+        ]
+
+    def test_get_actions_for_publishes_type_pure(self):
+        """
+        Test that the actions are resolved once per publish type and UI area
+        when the hook declares its actions only depend on them
+        """
+        ActionsHook = self.app.import_module("tk_multi_loader").base_hooks.ActionsHook
+        publish_file4 = dict(self.publish_file1, id=4, code="publish4")
+
+        with mock.patch.object(ActionsHook, "has_type_pure_actions", return_value=True):
+            manager = self.LoaderManager(self.app)
+            sgtk._hook_batches = []
+            for _ in range(3):
+                loader_actions = manager.get_actions_for_publishes(
+                    [self.publish_file1, self.publish_file3, publish_file4],
+                    manager.UI_AREA_MAIN,
+                )
+                assert [
+                    x["sg_publish_data"]["id"] for x in loader_actions["test_action2"]
+                ] == [1, 3, 4]
+
+            # one hook call per publish type
+            assert sorted(sgtk._hook_batches) == [[1], [3]]
+            assert manager.get_resolved_actions_statistics() == (4, 2)
+
+            # the actions are resolved again for other UI areas
+            loader_actions = manager.get_actions_for_publish(
+                self.publish_file1, manager.UI_AREA_DETAILS
+            )
+            assert len(loader_actions) == 2
+            assert manager.get_resolved_actions_statistics() == (4, 3)
+
+    def test_get_actions_for_publishes_ui_area(self):
+        """
+        Test that the requested UI area is used for all the PublishedFiles
+        """
+        sgtk._hook_ui_areas = []
+        self.manager.get_actions_for_publishes(
+            [self.publish_file1, self.publish_file3], self.manager.UI_AREA_HISTORY
+        )
+        assert sgtk._hook_ui_areas == ["history", "history"]
+
     def test_execute_action_not_implemented(self):
         """
         Test executing a non-implemented action
@@ -325,3 +389,33 @@ class TestApi(AppTestBase):
         """
         has_actions = self.manager.has_actions("EmptyPublishedFileType")
         assert has_actions is False
+
+    def test_action_mappings_not_modified(self):
+        """
+        Ensures getting actions many times neither modifies the action_mappings
+        setting nor changes the actions returned, with actions mapped to all types.
+        """
+        get_setting = self.app.get_setting
+        mappings = copy.deepcopy(get_setting("action_mappings"))
+        mappings["All"] = ["test_action2"]
+        expected_mappings = copy.deepcopy(mappings)
+
+        def get_setting_with_all(key, default=None):
+            if key == "action_mappings":
+                return mappings
+            return get_setting(key, default)
+
+        with mock.patch.object(self.app, "get_setting", get_setting_with_all):
+            manager = self.LoaderManager(self.app)
+            for _ in range(10000):
+                loader_actions = manager.get_actions_for_publish(
+                    self.publish_file2, manager.UI_AREA_MAIN
+                )
+                # the hook generates the actions in the order it knows them
+                assert [x["name"] for x in loader_actions] == [
+                    "test_action2",
+                    "test_action3",
+                ]
+                assert manager.has_actions("EmptyPublishedFileType") is True
+
+        assert mappings == expected_mappings
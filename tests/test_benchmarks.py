@@ -0,0 +1,269 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+import datetime
+import os
+import pickle
+import random
+import sys
+import time
+import unittest
+from unittest import mock
+
+from tank_test.tank_test_base import setUpModule  # noqa
+
+from test_api import AppTestBase
+
+
+def report(message):
+    """
+    Reports the timings of a benchmark. Timings depend on the machine running
+    the tests and are never asserted on.
+    """
+    sys.stderr.write("\n%s\n" % message)
+
+
+class TestLatestPublishesBenchmark(AppTestBase):
+    """
+    Compares retrieving every version of every publish and reducing them on the
+    client with retrieving the complete records of the latest publishes only.
+    """
+
+    # size of the mocked data set
+    NUM_STREAMS = 20
+    NUM_VERSIONS = 40
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestLatestPublishesBenchmark, self).setUp()
+
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.utils = tk_multi_loader.utils
+        self.constants = tk_multi_loader.constants
+
+        self.published_file_type = {
+            "type": "PublishedFileType",
+            "id": 123456,
+            "code": "TestPublishType1",
+        }
+        self.add_to_sg_mock_db([self.published_file_type])
+
+        # publishes are created version after version, stream after stream
+        created_at = datetime.datetime(2020, 1, 1)
+        publishes = []
+        for version_number in range(1, self.NUM_VERSIONS + 1):
+            for stream in range(self.NUM_STREAMS):
+                created_at += datetime.timedelta(minutes=1)
+                publishes.append(
+                    {
+                        "type": self.published_file_entity_type,
+                        "id": len(publishes) + 1,
+                        "project": self.project,
+                        "code": "publish%d.v%03d.ma" % (stream, version_number),
+                        "name": "publish%d" % stream,
+                        "version_number": version_number,
+                        "description": "Publish %d, version %d"
+                        % (stream, version_number),
+                        "task": self.task,
+                        "entity": self.shot,
+                        "created_at": created_at,
+                        self.published_file_type_field: self.published_file_type,
+                    }
+                )
+        self.add_to_sg_mock_db(publishes)
+
+        self.sg_filters = [["entity", "is", self.shot]]
+        self.fields = [
+            self.published_file_type_field,
+            "code",
+        ] + self.constants.PUBLISHED_FILES_GRID_FIELDS
+
+    def _run(self, fetch_method):
+        """
+        Runs the given fetch method, recording the queries it runs and
+        reporting the time it took.
+
+        :returns: Tuple of the latest publishes, the number of queries run and
+                  the size in bytes of all the records they returned.
+        """
+        results = []
+        find = self.tk.shotgun.find
+
+        def recording_find(*args, **kwargs):
+            result = find(*args, **kwargs)
+            results.append(result)
+            return result
+
+        with mock.patch.object(self.tk.shotgun, "find", side_effect=recording_find):
+            before = time.perf_counter()
+            latest = fetch_method()
+            elapsed = time.perf_counter() - before
+
+        size = len(pickle.dumps(results))
+        report(
+            "%d publishes - %s: %.4fs, %d queries, %d bytes"
+            % (
+                self.NUM_STREAMS * self.NUM_VERSIONS,
+                fetch_method.__name__,
+                elapsed,
+                len(results),
+                size,
+            )
+        )
+        return latest, len(results), size
+
+    def _fetch_all_versions(self):
+        """
+        Retrieves every version of every publish and reduces them on the client.
+        """
+        sg_data_list = self.tk.shotgun.find(
+            self.published_file_entity_type,
+            self.sg_filters,
+            self.fields,
+            order=[{"field_name": "created_at", "direction": "asc"}],
+        )
+        return self.utils.get_latest_publishes(
+            sg_data_list, self.published_file_type_field
+        )
+
+    def _fetch_latest_versions(self):
+        """
+        Retrieves the latest versions the way the latest publishes only mode does.
+        """
+        return self.utils.find_latest_publishes(
+            self.tk.shotgun,
+            self.published_file_entity_type,
+            self.sg_filters,
+            self.published_file_type_field,
+            self.fields,
+        )
+
+    def test_latest_publishes_only(self):
+        """
+        Ensures both modes find the same publishes and that fetching the
+        latest publishes only transfers less data.
+        """
+        all_latest, _, all_size = self._run(self._fetch_all_versions)
+        latest, num_queries, latest_size = self._run(self._fetch_latest_versions)
+
+        # a listing of all the versions, then the latest ones by id
+        self.assertEqual(num_queries, 2)
+        self.assertEqual(len(latest), self.NUM_STREAMS)
+        self.assertEqual(
+            [(x["id"], x["task_uniqueness"]) for x in all_latest],
+            [(x["id"], x["task_uniqueness"]) for x in latest],
+        )
+        for sg_data in latest:
+            self.assertEqual(sg_data["version_number"], self.NUM_VERSIONS)
+        self.assertLess(latest_size, all_size)
+
+
+class TestPublishReductionBenchmark(AppTestBase):
+    """
+    Times reducing large lists of publishes to their latest versions, with
+    the NumPy and the Python implementations.
+
+    The one million publishes case takes a while and only runs when the
+    TK_LOADER_LARGE_BENCHMARKS environment variable is set.
+    """
+
+    NUM_PUBLISHES = [10000, 100000]
+    LARGE_NUM_PUBLISHES = 1000000
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestPublishReductionBenchmark, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.utils = tk_multi_loader.utils
+
+    def _make_publishes(self, num_publishes):
+        """
+        Creates publishes with about ten versions per name, spread over a few
+        types and tasks, some of them without type or task.
+        """
+        rand = random.Random(num_publishes)
+        publishes = []
+        for publish_id in range(num_publishes):
+            type_id = rand.randrange(-1, 50)
+            task_id = rand.randrange(-1, 100)
+            publishes.append(
+                {
+                    "type": "PublishedFile",
+                    "id": publish_id,
+                    "name": "publish%d" % rand.randrange(num_publishes // 10),
+                    "published_file_type": (
+                        {"type": "PublishedFileType", "id": type_id}
+                        if type_id >= 0
+                        else None
+                    ),
+                    "task": {"type": "Task", "id": task_id} if task_id >= 0 else None,
+                }
+            )
+        return publishes
+
+    def _reduce(self, publishes, use_numpy):
+        """
+        Reduces the publishes, with or without NumPy, and reports the time
+        taken.
+
+        :returns: Tuple of the latest publishes, as (id, task_uniqueness)
+                  tuples, and of the number of publishes of each type.
+        """
+        if use_numpy:
+            reduce_method = self.utils._reduce_publishes_vectorized
+            numpy = self.utils.numpy
+        else:
+            reduce_method = self.utils.reduce_publishes
+            numpy = None
+
+        with mock.patch.object(self.utils, "numpy", numpy):
+            before = time.perf_counter()
+            latest, type_counts = reduce_method(publishes, "published_file_type")
+            elapsed = time.perf_counter() - before
+
+        report(
+            "%d publishes - %s: %.4fs, %d latest publishes"
+            % (len(publishes), reduce_method.__name__, elapsed, len(latest))
+        )
+        return [(x["id"], x["task_uniqueness"]) for x in latest], dict(type_counts)
+
+    def _run(self, num_publishes):
+        """
+        Times both implementations and ensures they give the same result.
+        Without NumPy, only the Python implementation is timed.
+        """
+        publishes = self._make_publishes(num_publishes)
+        result = self._reduce(publishes, False)
+        if self.utils.numpy is not None:
+            self.assertEqual(self._reduce(publishes, True), result)
+
+    def test_reduce_publishes(self):
+        """
+        Reduces 10k and 100k publishes.
+        """
+        for num_publishes in self.NUM_PUBLISHES:
+            self._run(num_publishes)
+        if self.utils.numpy is None:
+            self.skipTest("NumPy is not available, only reduce_publishes was timed.")
+
+    @unittest.skipUnless(
+        os.environ.get("TK_LOADER_LARGE_BENCHMARKS"),
+        "Set TK_LOADER_LARGE_BENCHMARKS to run.",
+    )
+    def test_reduce_publishes_large(self):
+        """
+        Reduces one million publishes.
+        """
+        self._run(self.LARGE_NUM_PUBLISHES)
+        if self.utils.numpy is None:
+            self.skipTest("NumPy is not available, only reduce_publishes was timed.")
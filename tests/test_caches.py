@@ -0,0 +1,281 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import datetime
+import os
+import time
+
+from tank_test.tank_test_base import setUpModule  # noqa
+
+from test_api import AppTestBase
+
+
+class TestLRUCache(AppTestBase):
+    """
+    Tests the in-memory cache the publish result sets and histories are
+    held in.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestLRUCache, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.LRUCache = tk_multi_loader.lru_cache.LRUCache
+
+    def _make_history(self, num_versions):
+        """
+        Creates a history with the given number of versions.
+        """
+        return [
+            {"type": "PublishedFile", "id": x, "version_number": x + 1}
+            for x in range(num_versions)
+        ]
+
+    def test_get_set(self):
+        """
+        Ensures entries are only returned for their key and the tag they
+        were stored with.
+        """
+        cache = self.LRUCache(100, len)
+        history = self._make_history(3)
+        cache.set("key1", history, (2, 10.0))
+
+        self.assertIn("key1", cache)
+        self.assertNotIn("key2", cache)
+        self.assertEqual(cache.get("key1", (2, 10.0)), history)
+        self.assertIsNone(cache.get("key2", (2, 10.0)))
+        self.assertEqual(cache.size, 3)
+
+        # the latest version was updated
+        self.assertIsNone(cache.get("key1", (2, 20.0)))
+        self.assertNotIn("key1", cache)
+        self.assertEqual(cache.size, 0)
+
+        # entries stored without tag are returned without tag
+        cache.set("key1", history)
+        self.assertEqual(cache.get("key1"), history)
+        cache.remove("key1")
+        self.assertIsNone(cache.get("key1"))
+        self.assertEqual(cache.size, 0)
+
+    def test_stale(self):
+        """
+        Ensures stale entries are not returned.
+        """
+        cache = self.LRUCache(100, len, max_age=-1)
+        cache.set("key1", self._make_history(3))
+
+        self.assertNotIn("key1", cache)
+        self.assertIsNone(cache.get("key1"))
+        self.assertEqual(cache.size, 0)
+
+    def test_eviction(self):
+        """
+        Ensures the least recently used entries are evicted first once the
+        cache is full.
+        """
+        cache = self.LRUCache(6, len)
+        cache.set("key1", self._make_history(3), 1)
+        cache.set("key2", self._make_history(3), 2)
+        # key1 is now the most recently used
+        cache.get("key1", 1)
+        cache.set("key3", self._make_history(3), 3)
+
+        self.assertIn("key1", cache)
+        self.assertNotIn("key2", cache)
+        self.assertIn("key3", cache)
+        self.assertEqual(cache.size, 6)
+
+        # entries larger than the cache are not stored
+        cache.set("key4", self._make_history(7), 4)
+        self.assertNotIn("key4", cache)
+
+
+class TestPublishStreamKey(AppTestBase):
+    """
+    Tests the keys the publish histories are cached with.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestPublishStreamKey, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.get_publish_stream_key = tk_multi_loader.utils.get_publish_stream_key
+
+    def test_stream_key(self):
+        """
+        Ensures all the versions of a publish share the same stream key.
+        """
+        sg_data = {
+            "name": "scene",
+            "project": {"type": "Project", "id": 1, "name": "project"},
+            "entity": {"type": "Shot", "id": 2, "name": "shot"},
+            "task": None,
+            "published_file_type": {"type": "PublishedFileType", "id": 3},
+        }
+        other_version = dict(sg_data, entity={"type": "Shot", "id": 2})
+        other_publish = dict(sg_data, entity={"type": "Asset", "id": 2})
+
+        key = self.get_publish_stream_key(sg_data, "published_file_type")
+        self.assertEqual(
+            self.get_publish_stream_key(other_version, "published_file_type"), key
+        )
+        self.assertNotEqual(
+            self.get_publish_stream_key(other_publish, "published_file_type"), key
+        )
+
+
+class TestPublishIndex(AppTestBase):
+    """
+    Tests the local SQLite index of publishes.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestPublishIndex, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.publish_index = tk_multi_loader.publish_index.PublishIndex(
+            os.path.join(self.tank_temp, "publish_index", "publish_index.db")
+        )
+        self.entity = {"type": "Shot", "id": 1}
+
+    def _make_publish(self, publish_id, version_number, updated_at, **fields):
+        """
+        Creates a publish of the same stream for the given version.
+        """
+        sg_data = {
+            "type": "PublishedFile",
+            "id": publish_id,
+            "name": "scene",
+            "entity": self.entity,
+            "published_file_type": {"type": "PublishedFileType", "id": 2},
+            "task": None,
+            "version_number": version_number,
+            "updated_at": updated_at,
+        }
+        sg_data.update(fields)
+        return sg_data
+
+    def test_update(self):
+        """
+        Ensures publishes are only replaced by more recent versions of them.
+        """
+        updated_at = datetime.datetime(2025, 1, 1)
+        self.publish_index.update(
+            [self._make_publish(1, 1, updated_at, path="new")],
+            "published_file_type",
+        )
+        self.publish_index.update(
+            [self._make_publish(1, 1, datetime.datetime(2024, 1, 1), path="old")],
+            "published_file_type",
+        )
+        # same version, the fields are merged
+        self.publish_index.update(
+            [self._make_publish(1, 1, updated_at, code="scene.ma")],
+            "published_file_type",
+        )
+
+        publishes = self.publish_index.get_publishes([1, 2])
+        self.assertEqual(list(publishes), [1])
+        self.assertEqual(publishes[1]["path"], "new")
+        self.assertEqual(publishes[1]["code"], "scene.ma")
+        self.assertEqual(
+            publishes[1]["updated_at"], time.mktime(updated_at.timetuple())
+        )
+
+        # publishes missing some of the requested fields are not returned
+        self.assertEqual(self.publish_index.get_publishes([1], ["description"]), {})
+
+        self.publish_index.remove([1])
+        self.assertEqual(self.publish_index.get_publishes([1]), {})
+
+    def test_get_versions(self):
+        """
+        Ensures all the versions of a publish are returned in order.
+        """
+        updated_at = datetime.datetime(2025, 1, 1)
+        self.publish_index.update(
+            [self._make_publish(x, 4 - x, updated_at) for x in range(1, 4)],
+            "published_file_type",
+        )
+
+        versions = self.publish_index.get_versions(self.entity, "scene", 2, None)
+        self.assertEqual([x["version_number"] for x in versions], [1, 2, 3])
+        self.assertEqual(
+            self.publish_index.get_versions(self.entity, "other", 2, None), []
+        )
+
+
+class TestThumbnailCache(AppTestBase):
+    """
+    Tests the disk cache of composited thumbnails.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestThumbnailCache, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.folder = os.path.join(self.tank_temp, "thumbnail_composites")
+        self.thumbnail_cache = tk_multi_loader.thumbnail_cache.ThumbnailCache(
+            self.folder
+        )
+
+    def _make_thumbnail(self, name, data):
+        """
+        Writes a source thumbnail file with the given content.
+        """
+        path = os.path.join(self.tank_temp, name)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def test_get_key(self):
+        """
+        Ensures keys depend on the content of the source thumbnail, on the
+        compositing and on the size only.
+        """
+        path = self._make_thumbnail("thumb1.jpg", b"thumbnail")
+        copy_path = self._make_thumbnail("thumb2.jpg", b"thumbnail")
+        other_path = self._make_thumbnail("thumb3.jpg", b"other thumbnail")
+
+        key = self.thumbnail_cache.get_key(path, "publish", 512, 400)
+        self.assertEqual(
+            self.thumbnail_cache.get_key(copy_path, "publish", 512, 400), key
+        )
+        self.assertNotEqual(
+            self.thumbnail_cache.get_key(other_path, "publish", 512, 400), key
+        )
+        self.assertNotEqual(self.thumbnail_cache.get_key(path, "folder", 512, 400), key)
+        self.assertNotEqual(
+            self.thumbnail_cache.get_key(path, "publish", 256, 200), key
+        )
+
+        # missing source thumbnails can't be keyed
+        self.assertIsNone(
+            self.thumbnail_cache.get_key(
+                os.path.join(self.tank_temp, "missing.jpg"), "publish", 512, 400
+            )
+        )
+
+    def test_load_missing(self):
+        """
+        Ensures nothing is returned for thumbnails which haven't been stored.
+        """
+        path = self._make_thumbnail("thumb1.jpg", b"thumbnail")
+        key = self.thumbnail_cache.get_key(path, "publish", 512, 400)
+        self.assertIsNone(self.thumbnail_cache.load(key))
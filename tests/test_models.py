@@ -0,0 +1,542 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import datetime
+import random
+import sqlite3
+from unittest import mock
+
+import sgtk
+from tank_test.tank_test_base import setUpModule  # noqa
+
+from test_api import AppTestBase
+
+
+class TestLatestPublishModel(AppTestBase):
+    """
+    Tests the model of the main view, fed with publishes the way the
+    background tasks feed it.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestLatestPublishModel, self).setUp()
+
+        from sgtk.platform.qt import QtCore, QtGui
+
+        if not hasattr(QtGui, "QApplication"):
+            self.skipTest("Qt is not available.")
+        self.QtCore = QtCore
+        self.QtGui = QtGui
+        self.qt_app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+        task_manager = sgtk.platform.import_framework(
+            "tk-framework-shotgunutils", "task_manager"
+        )
+        self.bg_task_manager = task_manager.BackgroundTaskManager(
+            parent=None, start_processing=True
+        )
+
+        self.tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.publish_type_model = mock.Mock()
+        self.model = self.tk_multi_loader.model_latestpublish.SgLatestPublishModel(
+            None, self.publish_type_model, self.bg_task_manager
+        )
+        # sets up the model without running any query
+        self.model._do_load_data(None, [])
+
+    def tearDown(self):
+        """
+        Fixtures teardown
+        """
+        self.model.destroy()
+        self.bg_task_manager.shut_down()
+        super(TestLatestPublishModel, self).tearDown()
+
+    def _add_publishes(self, versions, start=0):
+        """
+        Adds publishes to the mocked database, created in the given order,
+        a minute apart.
+
+        :param versions: List of (name, version number) tuples.
+        :param start: Number of publishes added before.
+        :returns: list of shotgun dictionaries as retrieved by the model, with
+                  date time values as returned by Shotgun.
+        """
+        publishes = []
+        for publish_id, (name, version_number) in enumerate(versions, start=start + 1):
+            created_at = datetime.datetime(2020, 1, 1) + datetime.timedelta(
+                minutes=publish_id
+            )
+            publishes.append(
+                {
+                    "type": self.published_file_entity_type,
+                    "id": publish_id,
+                    "project": self.project,
+                    "code": "%s.v%03d.ma" % (name, version_number),
+                    "name": name,
+                    "version_number": version_number,
+                    "description": "Version %d of %s" % (version_number, name),
+                    "task": None,
+                    "entity": self.shot,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    self.published_file_type_field: None,
+                }
+            )
+        self.add_to_sg_mock_db(publishes)
+
+        return self.tk.shotgun.find(
+            self.published_file_entity_type,
+            [["entity", "is", self.shot]],
+            self.model._publish_fields + ["code"],
+            order=[{"field_name": "created_at", "direction": "asc"}],
+        )
+
+    def _get_publishes(self):
+        """
+        Returns the publishes displayed by the model, keyed by name.
+        """
+        publishes = {}
+        for row in range(self.model.rowCount()):
+            sg_data = self.model.item(row).get_sg_data()
+            publishes[sg_data["name"]] = sg_data
+        return publishes
+
+    def test_chunks(self):
+        """
+        Ensures batches of publishes arriving in any order are merged into
+        the latest publishes.
+        """
+        sg_data_list = self._add_publishes(
+            [("a", 1), ("b", 1), ("a", 2), ("c", 1), ("a", 3), ("b", 2)]
+        )
+
+        # the most recent batch arrives first
+        self.model._on_chunk_loaded(sg_data_list[3:])
+        self.model._on_chunk_loaded(sg_data_list[:3])
+
+        publishes = self._get_publishes()
+        self.assertEqual(sorted(publishes), ["a", "b", "c"])
+        self.assertEqual(publishes["a"]["version_number"], 3)
+        self.assertEqual(publishes["b"]["version_number"], 2)
+        self.assertEqual(publishes["c"]["version_number"], 1)
+
+        # the flag takes all the batches into account
+        self.assertFalse(publishes["a"]["task_uniqueness"])
+        self.assertFalse(publishes["b"]["task_uniqueness"])
+        self.assertTrue(publishes["c"]["task_uniqueness"])
+
+    def test_render_chunk_items(self):
+        """
+        Ensures publishes retrieved in batches can be displayed.
+        """
+        sg_data_list = self._add_publishes([("a", 1), ("a", 2)])
+        self.model._on_chunk_loaded(sg_data_list)
+
+        self.assertEqual(self.model.rowCount(), 1)
+        sg_data = self.model.item(0).get_sg_data()
+        self.assertIsInstance(sg_data["created_at"], float)
+        self.assertIsInstance(sg_data["updated_at"], float)
+
+        date_str = datetime.datetime(2020, 1, 1, 0, 2).strftime("%Y-%m-%d %H:%M")
+        index = self.model.index(0, 0)
+        self.assertIn(date_str, self.model.data(index, self.QtCore.Qt.ToolTipRole))
+
+        view = self.QtGui.QListView()
+        view.setModel(self.model)
+        delegate = self.tk_multi_loader.delegate_publish_list.SgPublishListDelegate(
+            view, mock.Mock()
+        )
+        widget = delegate._create_widget(view)
+        delegate._on_before_paint(widget, index, self.QtGui.QStyleOptionViewItem())
+        self.assertIn(date_str, widget.ui.label_2.text())
+
+    def test_ensure_publish_details(self):
+        """
+        Ensures the detail fields of a publish can be retrieved straight away.
+        """
+        sg_data_list = self._add_publishes([("a", 1)])
+        self.model._on_chunk_loaded(sg_data_list)
+
+        item = self.model.item(0)
+        index = self.model.index(0, 0)
+        self.assertFalse(self.model.has_publish_details(item.get_sg_data()))
+        self.assertIn(
+            "No description given.",
+            self.model.data(index, self.QtCore.Qt.ToolTipRole),
+        )
+
+        self.model.ensure_publish_details([item])
+        self.assertTrue(self.model.has_publish_details(item.get_sg_data()))
+        # the tooltip is formatted again with the details
+        self.assertIn(
+            "Version 1 of a", self.model.data(index, self.QtCore.Qt.ToolTipRole)
+        )
+
+    def test_latest_publishes_only(self):
+        """
+        Ensures the latest publishes are loaded from the listing and the
+        records retrieved in the background, without running the model query.
+        """
+        self._add_publishes([("a", 1), ("a", 2), ("b", 1)])
+        sg_filters = [["entity", "is", self.shot]]
+        self.model._latest_publishes_only = True
+        with mock.patch.object(self.model, "_refresh_data") as refresh_data:
+            self.model._do_load_data(sg_filters, [])
+        refresh_data.assert_not_called()
+        self.assertEqual(self.model.rowCount(), 0)
+
+        # run the background tasks in turn
+        self.model._on_publish_listing_found(
+            self.model._task_find_publish_listing(
+                sg_filters, self.model._publish_query[2], None
+            )
+        )
+        self.assertEqual(self.model.rowCount(), 0)
+        self.model._on_task_completed(
+            self.model._latest_publish_records_task,
+            None,
+            self.model._task_find_latest_publish_records(
+                self.model._requested_publish_ids
+            ),
+        )
+
+        publishes = self._get_publishes()
+        self.assertEqual(sorted(publishes), ["a", "b"])
+        self.assertEqual(publishes["a"]["version_number"], 2)
+        self.assertIsInstance(publishes["a"]["created_at"], float)
+
+    def test_refresh_listing(self):
+        """
+        Ensures a refresh only lists the changes, and drops the publishes
+        which have been removed.
+        """
+        sg_data_list = self._add_publishes([("a", 1), ("b", 1), ("c", 1)])
+        sg_filters = [["entity", "is", self.shot]]
+        self.model._publish_query = (sg_filters, [], self.model._publish_fields)
+        self.model._before_data_processing(sg_data_list)
+
+        self._add_publishes([("a", 2)], start=3)
+        self.tk.shotgun.delete(self.published_file_entity_type, 2)
+
+        sg_data_list, publish_ids = self.model._task_find_publish_listing(
+            sg_filters,
+            self.model._publish_fields + ["code"],
+            self.model._publish_listing_watermark,
+        )
+        # publishes updated within the same second as the watermark are
+        # listed again.
+        self.assertEqual(sorted(x["id"] for x in sg_data_list), [3, 4])
+        self.assertEqual(publish_ids, set([1, 3, 4]))
+
+        self.model._on_publish_listing_found((sg_data_list, publish_ids))
+        publishes = self._get_publishes()
+        self.assertEqual(sorted(publishes), ["a", "c"])
+        self.assertEqual(publishes["a"]["version_number"], 2)
+        self.assertIsInstance(publishes["a"]["created_at"], float)
+
+        # nothing changed since
+        data_refreshed = mock.Mock()
+        self.model.data_refreshed.connect(data_refreshed)
+        self.model._on_publish_listing_found(
+            self.model._task_find_publish_listing(
+                sg_filters,
+                self.model._publish_fields + ["code"],
+                self.model._publish_listing_watermark,
+            )
+        )
+        data_refreshed.assert_called_once_with(False)
+
+    def test_result_cache_timestamps(self):
+        """
+        Ensures the result sets held in memory hold unix timestamps, so that
+        the items built from them can be displayed.
+        """
+        sg_data_list = self._add_publishes([("a", 1), ("a", 2)])
+        self.model._result_cache_key = "key"
+        self.model._before_data_processing(sg_data_list)
+
+        (sg_data,) = self.model._result_cache.get("key")
+        self.assertEqual(sg_data["version_number"], 2)
+        self.assertIsInstance(sg_data["created_at"], float)
+        self.assertIsInstance(sg_data["updated_at"], float)
+
+    def test_prefetched_timestamps(self):
+        """
+        Ensures prefetched result sets hold unix timestamps.
+        """
+        self._add_publishes([("a", 1), ("a", 2)])
+        sg_filters = [["entity", "is", self.shot]]
+        self.model.cache_publishes(
+            sg_filters, self.model.find_publishes(self.tk.shotgun, sg_filters)
+        )
+
+        self.assertTrue(self.model.is_result_cached(sg_filters))
+        (sg_data,) = self.model._result_cache.get(str(sg_filters))
+        self.assertEqual(sg_data["version_number"], 2)
+        self.assertIsInstance(sg_data["created_at"], float)
+
+    def test_publish_index_error(self):
+        """
+        Ensures the latest publishes are still retrieved when the publish
+        index can't be updated.
+        """
+        sg_data_list = self._add_publishes([("a", 1)])
+        self.model._publish_index = mock.Mock()
+        self.model._publish_index.update.side_effect = sqlite3.OperationalError(
+            "database is locked"
+        )
+
+        records = self.model._task_find_latest_publish_records([sg_data_list[0]["id"]])
+        self.assertEqual([x["id"] for x in records], [sg_data_list[0]["id"]])
+
+    def test_publish_versions(self):
+        """
+        Ensures the versions of a publish returned by the model query are
+        reused for its history straight away, and that their details are
+        retrieved in the background.
+        """
+        sg_data_list = self._add_publishes([("a", 1), ("a", 2)])
+        self.model._index_publish_versions(sg_data_list)
+
+        with mock.patch.object(
+            self.bg_task_manager, "add_task", return_value="details"
+        ) as add_task:
+            versions = self.model.get_publish_versions(sg_data_list[-1])
+        self.assertEqual([x["version_number"] for x in versions], [1, 2])
+        for version in versions:
+            self.assertFalse(self.model.has_publish_details(version))
+            self.assertIsInstance(version["created_at"], float)
+
+        publish_ids = add_task.call_args[1]["task_kwargs"]["publish_ids"]
+        self.assertEqual(sorted(publish_ids), [x["id"] for x in sg_data_list])
+
+        loaded = []
+        self.model.publish_details_loaded.connect(loaded.append)
+        self.model._on_task_completed(
+            "details", None, self.model._task_find_publish_details(publish_ids)
+        )
+        self.assertEqual(sorted(loaded[0]), sorted(publish_ids))
+        for publish_id in publish_ids:
+            self.assertIsNotNone(self.model.get_publish_details(publish_id))
+
+        with mock.patch.object(self.bg_task_manager, "add_task") as add_task:
+            versions = self.model.get_publish_versions(sg_data_list[-1])
+        add_task.assert_not_called()
+        for version in versions:
+            self.assertTrue(self.model.has_publish_details(version))
+
+
+class TestLatestPublishProxyModel(AppTestBase):
+    """
+    Tests filtering the publishes of the main view by type.
+    """
+
+    NUM_TYPES = 500
+    NUM_PUBLISHES = 5000
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestLatestPublishProxyModel, self).setUp()
+
+        from sgtk.platform.qt import QtGui
+
+        if not hasattr(QtGui, "QApplication"):
+            self.skipTest("Qt is not available.")
+        self.qt_app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        SgLatestPublishModel = tk_multi_loader.model_latestpublish.SgLatestPublishModel
+
+        rand = random.Random(0)
+        self.type_ids = list(range(1, self.NUM_TYPES + 1))
+        self.source_model = QtGui.QStandardItemModel()
+        for _ in range(self.NUM_PUBLISHES):
+            item = QtGui.QStandardItem()
+            item.setData(rand.choice(self.type_ids), SgLatestPublishModel.TYPE_ID_ROLE)
+            item.setData(False, SgLatestPublishModel.IS_FOLDER_ROLE)
+            self.source_model.appendRow(item)
+        # a publish without type and a folder
+        item = QtGui.QStandardItem()
+        item.setData(None, SgLatestPublishModel.TYPE_ID_ROLE)
+        item.setData(False, SgLatestPublishModel.IS_FOLDER_ROLE)
+        self.source_model.appendRow(item)
+        item = QtGui.QStandardItem()
+        item.setData(True, SgLatestPublishModel.IS_FOLDER_ROLE)
+        self.source_model.appendRow(item)
+
+        self.proxy_model = (
+            tk_multi_loader.proxymodel_latestpublish.SgLatestPublishProxyModel(None)
+        )
+        self.proxy_model.setSourceModel(self.source_model)
+        self.TYPE_ID_ROLE = SgLatestPublishModel.TYPE_ID_ROLE
+
+    def test_filter_by_type_ids(self):
+        """
+        Ensures only the publishes of the selected types go through, and that
+        selecting the same types again doesn't filter the rows again.
+        """
+        # every other type is selected
+        selected_type_ids = self.type_ids[::2]
+        num_changes = []
+        self.proxy_model.filter_changed.connect(lambda: num_changes.append(1))
+
+        self.proxy_model.set_filter_by_type_ids(selected_type_ids, False)
+        expected = [
+            row
+            for row in range(self.NUM_PUBLISHES)
+            if self.source_model.item(row).data(self.TYPE_ID_ROLE) in selected_type_ids
+        ]
+        # the publish without type is always shown, folders aren't
+        expected.append(self.NUM_PUBLISHES)
+        accepted = [
+            self.proxy_model.mapToSource(self.proxy_model.index(row, 0)).row()
+            for row in range(self.proxy_model.rowCount())
+        ]
+        self.assertEqual(sorted(accepted), expected)
+        self.assertEqual(len(num_changes), 1)
+
+        with mock.patch.object(
+            type(self.proxy_model), "filterAcceptsRow", return_value=True
+        ) as filter_accepts_row:
+            self.proxy_model.set_filter_by_type_ids(
+                list(reversed(selected_type_ids)), False
+            )
+        filter_accepts_row.assert_not_called()
+        self.assertEqual(len(num_changes), 1)
+
+        self.proxy_model.set_filter_by_type_ids(selected_type_ids, True)
+        self.assertEqual(self.proxy_model.rowCount(), len(expected) + 1)
+        self.assertEqual(len(num_changes), 2)
+
+
+class TestPublishTypeModel(AppTestBase):
+    """
+    Tests updating the counts of the publish types, and filtering the
+    publishes of the main view by type.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestPublishTypeModel, self).setUp()
+
+        from sgtk.platform.qt import QtCore, QtGui
+
+        if not hasattr(QtGui, "QApplication"):
+            self.skipTest("Qt is not available.")
+        self.QtCore = QtCore
+        self.qt_app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+        task_manager = sgtk.platform.import_framework(
+            "tk-framework-shotgunutils", "task_manager"
+        )
+        self.bg_task_manager = task_manager.BackgroundTaskManager(
+            parent=None, start_processing=True
+        )
+
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        SgLatestPublishModel = tk_multi_loader.model_latestpublish.SgLatestPublishModel
+        SgPublishTypeModel = tk_multi_loader.model_publishtype.SgPublishTypeModel
+        shotgun_model = tk_multi_loader.model_publishtype.shotgun_model
+
+        settings_manager = mock.Mock()
+        settings_manager.retrieve.side_effect = lambda key, default, *args: default
+        self.model = SgPublishTypeModel(
+            None, mock.Mock(), settings_manager, self.bg_task_manager
+        )
+        # publish types as loaded from Shotgun, all checked
+        self.type_items = {}
+        for type_id in (1, 2, 3):
+            item = shotgun_model.ShotgunStandardItem("type%d" % type_id)
+            item.setData(
+                {"type": "PublishedFileType", "id": type_id, "ids": [type_id]},
+                SgPublishTypeModel.SG_DATA_ROLE,
+            )
+            item.setData("type%d" % type_id, SgPublishTypeModel.DISPLAY_NAME_ROLE)
+            item.setCheckable(True)
+            item.setCheckState(QtCore.Qt.Checked)
+            item.setEnabled(False)
+            self.model.appendRow(item)
+            self.type_items[type_id] = item
+
+        # the publishes of the main view, filtered the way the dialog does
+        self.source_model = QtGui.QStandardItemModel()
+        for type_id in (1, 2, 3):
+            item = QtGui.QStandardItem()
+            item.setData(type_id, SgLatestPublishModel.TYPE_ID_ROLE)
+            item.setData(False, SgLatestPublishModel.IS_FOLDER_ROLE)
+            self.source_model.appendRow(item)
+        self.proxy_model = (
+            tk_multi_loader.proxymodel_latestpublish.SgLatestPublishProxyModel(None)
+        )
+        self.proxy_model.setSourceModel(self.source_model)
+        self.model.itemChanged.connect(self._apply_type_filters)
+        self._apply_type_filters()
+
+    def tearDown(self):
+        """
+        Fixtures teardown
+        """
+        self.model.destroy()
+        self.bg_task_manager.shut_down()
+        super(TestPublishTypeModel, self).tearDown()
+
+    def _apply_type_filters(self):
+        """
+        Filters the publishes by the checked types, see
+        AppDialog._apply_type_filters_on_publishes().
+        """
+        self.proxy_model.set_filter_by_type_ids(
+            self.model.get_selected_types(), self.model.get_show_folders()
+        )
+
+    def test_set_active_types(self):
+        """
+        Ensures updating the counts of the types signals a single layout
+        change, and nothing if the counts are unchanged.
+        """
+        layout_changes = []
+        item_changes = []
+        self.model.layoutChanged.connect(lambda *args: layout_changes.append(args))
+        self.model.itemChanged.connect(item_changes.append)
+
+        self.model.set_active_types({2: 3, 3: 1})
+        self.assertEqual(len(layout_changes), 1)
+        self.assertEqual(item_changes, [])
+        self.assertEqual(self.type_items[2].text(), "type2 (3)")
+        self.assertTrue(self.type_items[2].isEnabled())
+        self.assertFalse(self.type_items[1].isEnabled())
+        # the enabled types are sorted first
+        self.assertLess(self.type_items[2].row(), self.type_items[1].row())
+        self.assertLess(self.type_items[3].row(), self.type_items[1].row())
+
+        self.model.set_active_types({2: 3, 3: 1})
+        self.assertEqual(len(layout_changes), 1)
+
+    def test_check_state_changes(self):
+        """
+        Ensures the publishes are still filtered when types get unchecked
+        once their counts have been updated.
+        """
+        self.model.set_active_types({1: 1, 2: 1, 3: 1})
+        self.assertEqual(self.proxy_model.rowCount(), 3)
+
+        self.type_items[2].setCheckState(self.QtCore.Qt.Unchecked)
+        self.assertEqual(self.proxy_model.rowCount(), 2)
+
+        self.model.select_all()
+        self.assertEqual(self.proxy_model.rowCount(), 3)
@@ -0,0 +1,176 @@
+# Copyright (c) 2025 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from tank_test.tank_test_base import setUpModule  # noqa
+
+from test_api import AppTestBase
+
+
+class TestSearchIndex(AppTestBase):
+    """
+    Tests the index used to search the publish view.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestSearchIndex, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.SearchIndex = tk_multi_loader.search_index.SearchIndex
+
+    def test_search(self):
+        """
+        Ensures the index finds the strings containing the query, ignoring case.
+        """
+        search_index = self.SearchIndex()
+        for text in ["Maya Scene  chair v012", "Maya Scene  chair v112", "Table"]:
+            search_index.add(text)
+
+        self.assertEqual(search_index.search("V012"), set(["Maya Scene  chair v012"]))
+        self.assertEqual(len(search_index.search("chair")), 2)
+        self.assertEqual(len(search_index.search("a")), 3)
+        self.assertEqual(search_index.search("ch v"), set())
+        self.assertEqual(search_index.search("sofa"), set())
+
+        search_index.remove("Table")
+        self.assertEqual(len(search_index.search("a")), 2)
+        self.assertNotIn("Table", search_index)
+
+    def test_narrowing(self):
+        """
+        Ensures a refined query is only compared with the previous matches.
+        """
+        search_index = self.SearchIndex()
+        for text in ["chair", "character", "chart", "table"]:
+            search_index.add(text)
+
+        self.assertEqual(len(search_index.search("cha")), 3)
+        self.assertEqual(search_index.search("char"), set(["character", "chart"]))
+        self.assertEqual(search_index.num_compared, 3)
+        self.assertEqual(search_index.search("Chara"), set(["character"]))
+        self.assertEqual(search_index.num_compared, 2)
+
+        # adding strings invalidates the previous results
+        search_index.add("charango")
+        self.assertEqual(search_index.search("charan"), set(["charango"]))
+
+    def test_search_scale(self):
+        """
+        Ensures searching 20k strings only compares the query with the strings
+        containing its n-grams.
+        """
+        search_index = self.SearchIndex()
+        for x in range(20000):
+            search_index.add("Maya Scene  asset%d v%03d" % (x, x % 200))
+
+        matches = search_index.search("v012")
+        self.assertEqual(len(matches), 100)
+        self.assertEqual(search_index.num_compared, 100)
+
+
+class TestTreeSearchIndex(AppTestBase):
+    """
+    Tests the index used to search the entity trees.
+    """
+
+    def setUp(self):
+        """
+        Set up before any tests are executed.
+        """
+        super(TestTreeSearchIndex, self).setUp()
+        tk_multi_loader = self.app.import_module("tk_multi_loader")
+        self.TreeSearchIndex = tk_multi_loader.search_index.TreeSearchIndex
+
+    def test_search(self):
+        """
+        Ensures the matching nodes are returned along with their ancestors.
+        """
+        search_index = self.TreeSearchIndex(
+            [
+                ("seq01", "sh010"),
+                ("seq01", "sh020"),
+                ("seq02", "sh010"),
+                ("Character", "chair"),
+            ]
+        )
+        self.assertEqual(len(search_index), 7)
+        self.assertEqual(
+            search_index.search("SH010"),
+            set(
+                [
+                    ("seq01",),
+                    ("seq01", "sh010"),
+                    ("seq02",),
+                    ("seq02", "sh010"),
+                ]
+            ),
+        )
+        self.assertEqual(
+            search_index.search("cha"), set([("Character",), ("Character", "chair")])
+        )
+        # children of a matching node are not displayed unless they match
+        self.assertEqual(search_index.search("seq01"), set([("seq01",)]))
+        self.assertEqual(search_index.search("seq03"), set())
+
+    def test_fuzzy_search(self):
+        """
+        Ensures fuzzy searches match the paths of the nodes and rank them.
+        """
+        search_index = self.TreeSearchIndex(
+            [
+                ("seq01", "sh010", "Comp"),
+                ("seq01", "sh010", "Anim"),
+                ("seq01", "sh020", "Comp"),
+                ("seq02", "sh110", "Light"),
+            ],
+            fuzzy=True,
+        )
+        self.assertTrue(search_index.fuzzy)
+
+        results = search_index.fuzzy_search("sh010cmp", 10)
+        self.assertEqual(results[0][0], ("seq01", "sh010", "Comp"))
+        scores = [score for (_, score) in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertNotIn(("seq02", "sh110", "Light"), [x for (x, _) in results])
+
+        # exact matches come first, shortest paths first
+        results = search_index.fuzzy_search("sh010", 2)
+        self.assertEqual(
+            [x for (x, _) in results], [("seq01", "sh010"), ("seq01", "sh010", "Comp")]
+        )
+
+        # queries too short to hold trigrams are substring searches
+        self.assertEqual(
+            search_index.fuzzy_search("sh", 10)[0], (("seq01", "sh010"), 1.0)
+        )
+        self.assertEqual(search_index.fuzzy_search("zzzz", 10), [])
+
+    def test_fuzzy_search_scale(self):
+        """
+        Ensures fuzzy searches of 100k nodes only compare the query with a
+        fraction of the nodes, so that they can run for each keystroke.
+        """
+        steps = ["Anim", "Comp", "FX", "Layout", "Light", "Model", "Rig"]
+        search_index = self.TreeSearchIndex(
+            [
+                ("seq%03d" % seq, "sh%03d" % (shot * 10), step)
+                for seq in range(100)
+                for shot in range(1, 143)
+                for step in steps
+            ],
+            fuzzy=True,
+        )
+        self.assertEqual(len(search_index), 113700)
+
+        for query in ["sh010cmp", "seq012 sh100", "lyout", "comp"]:
+            results = search_index.fuzzy_search(query, 200)
+            self.assertTrue(results)
+            self.assertLess(search_index.num_compared, len(search_index) // 3)